@@ -0,0 +1,288 @@
+"""
+Headless HTTP/JSON API for the screening engine
+
+Lets other front ends (a careers site, a mobile app) run screenings without
+Streamlit. One asyncio event loop serves every connection with HTTP/1.1
+keep-alive, so a process holds thousands of concurrent sessions. Scripted
+steps take microseconds and run on the loop; turns that wait on the LLM or
+read the question cache run on a thread pool and are awaited, so a slow
+upstream call or a busy SQLite file never stalls other sessions.
+
+Endpoints:
+    POST   /sessions                     start a session; returns the greeting
+    POST   /sessions/{id}/messages       {"message": "..."}; returns the reply
+    GET    /sessions/{id}                the session's state (delivers technical
+                                         questions once background generation is done)
+    GET    /sessions/{id}/progress       current step out of the total, and seconds spent per step
+    DELETE /sessions/{id}                discard the session
+    GET    /health                       request counters
+
+Usage:
+    python api_server.py [--host HOST] [--port PORT]
+
+Sessions live in the store configured by SESSION_STORE; the per-browser
+Streamlit store makes no sense here, so it is replaced by an in-memory one.
+Use SESSION_STORE=sqlite to share sessions between several server processes.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from http import HTTPStatus
+from typing import Callable, Dict, Optional, Tuple
+
+from config import (
+    API_HOST, API_PORT, API_LLM_WORKERS, API_MAX_BODY_BYTES, API_KEEP_ALIVE_TIMEOUT,
+    SESSION_STORE, ConversationState
+)
+from session_store import MemorySessionStore, SessionStore, create_session_store
+
+SESSION_ROUTE = re.compile(r"^/sessions/([0-9a-f]{32})(/messages|/progress)?$")
+
+
+class HTTPError(Exception):
+    """Ends a request with an error status and message"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ScreeningAPI:
+    """Routes JSON requests to per-session views of one chatbot"""
+
+    def __init__(self, chatbot=None, store: Optional[SessionStore] = None):
+        if store is None:
+            store = MemorySessionStore() if SESSION_STORE == "streamlit" else create_session_store()
+        if chatbot is None:
+            # Imported here so that the module loads without the LLM backend's setup
+            from chatbot import HiringAssistantChatbot
+            chatbot = HiringAssistantChatbot(store=store)
+        self.chatbot = chatbot
+        self.store = chatbot.store
+        # Store I/O of the shared stores blocks, so it goes to a thread as well
+        self.inline = isinstance(self.store, MemorySessionStore)
+        self.llm_executor = ThreadPoolExecutor(max_workers=API_LLM_WORKERS, thread_name_prefix="api-llm")
+        # One turn at a time per session; locks go away with their last waiter
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+
+    async def _run(self, func: Callable, *args, llm: bool = False):
+        if llm:
+            return await asyncio.get_running_loop().run_in_executor(self.llm_executor, func, *args)
+        if self.inline:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def _existing_session(self, session_id: str):
+        if not await self._run(self.store.exists, session_id):
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Unknown session")
+        return self.chatbot.for_session(session_id)
+
+    @staticmethod
+    def _progress(chatbot) -> Dict:
+        step, total_steps = chatbot.get_conversation_progress()
+        return {"step": step, "total_steps": total_steps}
+
+    @staticmethod
+    def _step_seconds(state) -> Dict:
+        return {step: round(seconds, 3) for step, seconds in state.stats.step_durations().items()}
+
+    async def start_session(self) -> Tuple[HTTPStatus, Dict]:
+        chatbot = self.chatbot.for_session(uuid.uuid4().hex)
+        greeting = chatbot.generate_greeting()
+        await self._run(chatbot.add_to_chat_history, "assistant", greeting)
+        return HTTPStatus.CREATED, {
+            "session_id": chatbot.session_id,
+            "reply": greeting,
+            "conversation_state": ConversationState.GREETING
+        }
+
+    async def post_message(self, session_id: str, body: Dict) -> Tuple[HTTPStatus, Dict]:
+        message = body.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'message' must be a non-empty string")
+        message = message.strip()
+        async with self._lock(session_id):
+            chatbot = await self._existing_session(session_id)
+            blocks = await self._run(chatbot.waits_on_io, message)
+            reply = await self._run(chatbot.respond, message, llm=blocks)
+            state = await self._run(lambda: chatbot.state)
+            return HTTPStatus.OK, {
+                "reply": reply,
+                "conversation_state": state.conversation_state,
+                "progress": await self._run(self._progress, chatbot)
+            }
+
+    async def get_state(self, session_id: str) -> Tuple[HTTPStatus, Dict]:
+        async with self._lock(session_id):
+            chatbot = await self._existing_session(session_id)
+            state = await self._run(lambda: chatbot.state)
+            if state.conversation_state == ConversationState.GENERATING_QUESTIONS:
+                await self._run(chatbot.deliver_technical_questions, llm=True)
+                state = await self._run(lambda: chatbot.state)
+            return HTTPStatus.OK, {"session_id": session_id, **asdict(state)}
+
+    async def get_progress(self, session_id: str) -> Tuple[HTTPStatus, Dict]:
+        chatbot = await self._existing_session(session_id)
+        state = await self._run(lambda: chatbot.state)
+        return HTTPStatus.OK, {
+            "conversation_state": state.conversation_state,
+            **await self._run(self._progress, chatbot),
+            "step_seconds": self._step_seconds(state)
+        }
+
+    async def delete_session(self, session_id: str) -> Tuple[HTTPStatus, Optional[Dict]]:
+        async with self._lock(session_id):
+            chatbot = await self._existing_session(session_id)
+            await self._run(chatbot.end_session)
+        return HTTPStatus.NO_CONTENT, None
+
+    async def dispatch(self, method: str, path: str, body: Dict) -> Tuple[HTTPStatus, Optional[Dict]]:
+        """
+        Route one request
+
+        Raises:
+            HTTPError: unknown route, wrong method, unknown session or bad input
+        """
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+            return HTTPStatus.OK, {
+                "status": "ok", "requests": self.requests, "errors": self.errors,
+                "connections": self.connections
+            }
+        if path == "/sessions":
+            if method != "POST":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+            return await self.start_session()
+
+        match = SESSION_ROUTE.match(path)
+        if match is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Not found")
+        session_id, action = match.groups()
+        handlers = {
+            (None, "GET"): lambda: self.get_state(session_id),
+            (None, "DELETE"): lambda: self.delete_session(session_id),
+            ("/messages", "POST"): lambda: self.post_message(session_id, body),
+            ("/progress", "GET"): lambda: self.get_progress(session_id)
+        }
+        handler = handlers.get((action, method))
+        if handler is None:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Method not allowed")
+        return await handler()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one keep-alive connection until the client closes it or goes idle"""
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), API_KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _handle_request(self, request_line: bytes, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> bool:
+        self.requests += 1
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        parts = request_line.decode("latin-1").split()
+        version = parts[2] if len(parts) == 3 else "HTTP/1.0"
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+        status, payload = HTTPStatus.OK, None
+        try:
+            if len(parts) != 3:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+            length = headers.get("content-length", "0") or "0"
+            if not length.isdigit():
+                # The body's end is unknown, so the connection cannot carry another request
+                keep_alive = False
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+            length = int(length)
+            if length > API_MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+            body = {}
+            if length:
+                try:
+                    body = json.loads(await reader.readexactly(length))
+                except json.JSONDecodeError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+                if not isinstance(body, dict):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+            status, payload = await self.dispatch(parts[0].upper(), parts[1].split("?", 1)[0], body)
+        except HTTPError as error:
+            self.errors += 1
+            status, payload = error.status, {"error": error.message}
+        except Exception:
+            self.errors += 1
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+        data = json.dumps(payload).encode() if payload is not None else b""
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Length: {len(data)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        return keep_alive
+
+
+async def serve(host: str = API_HOST, port: int = API_PORT, api: Optional[ScreeningAPI] = None):
+    """Run the API until cancelled"""
+    api = api or ScreeningAPI()
+    server = await asyncio.start_server(api.handle_connection, host, port, backlog=4096)
+    print(f"Screening API listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP/JSON API for candidate screening")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ TalentScout Hiring Assistant - Main Streamlit Application
 
 import streamlit as st
 import os
+import uuid
+from typing import Dict, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 # Load Hugging Face API Key from Streamlit Secrets
 if 'HUGGING_FACE_API_KEY' in st.secrets:
@@ -17,7 +19,9 @@ load_dotenv()
 
 from chatbot import HiringAssistantChatbot
 from utils import sanitize_input, format_candidate_info
-from config import APP_TITLE, APP_DESCRIPTION
+from config import (
+    APP_TITLE, APP_DESCRIPTION, CHAT_WINDOW_SIZE, LLM_POLL_INTERVAL, SESSION_STORE, ConversationState
+)
 
 # Page configuration
 st.set_page_config(
@@ -206,25 +210,53 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def new_chatbot(session_id: Optional[str] = None) -> HiringAssistantChatbot:
+    """
+    Create the chatbot for this browser session
+    
+    With a store shared across processes, the conversation's id is kept in the
+    URL so whichever server process handles a reload can pick it up again.
+    """
+    if SESSION_STORE == "streamlit":
+        return HiringAssistantChatbot()
+    session_id = session_id or uuid.uuid4().hex
+    st.query_params["session"] = session_id
+    return HiringAssistantChatbot(session_id=session_id)
+
 def init_session_state():
     """Initialize session state variables"""
     if 'chatbot' not in st.session_state:
-        st.session_state.chatbot = HiringAssistantChatbot()
+        st.session_state.chatbot = new_chatbot(st.query_params.get("session"))
     
     if 'conversation_started' not in st.session_state:
-        st.session_state.conversation_started = False
+        # A conversation resumed from the session store has already started
+        st.session_state.conversation_started = bool(st.session_state.chatbot.state.chat_history)
     
     if 'input_key' not in st.session_state:
         st.session_state.input_key = 0
+    
+    if 'chat_window' not in st.session_state:
+        # How many of the latest messages the chat shows
+        st.session_state.chat_window = CHAT_WINDOW_SIZE
+    
+    if 'message_html' not in st.session_state:
+        # Rendered bubble HTML of the messages on screen, by message id
+        st.session_state.message_html = {}
+
+def format_duration(seconds: float) -> str:
+    """Seconds as m:ss"""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
 
 def display_header():
     """Display application header"""
     st.markdown(f'<div class="main-header">{APP_TITLE}</div>', unsafe_allow_html=True)
     st.markdown(f'<div class="subtitle">{APP_DESCRIPTION}</div>', unsafe_allow_html=True)
 
+@st.fragment(key="progress")
 def display_progress():
     """Display conversation progress"""
-    if hasattr(st.session_state, 'conversation_state'):
+    if st.session_state.chatbot.state.conversation_state:
         current_step, total_steps = st.session_state.chatbot.get_conversation_progress()
         
         with st.container():
@@ -244,28 +276,71 @@ def display_progress():
             
             st.markdown('</div>', unsafe_allow_html=True)
 
-def display_chat_history():
-    """Display chat conversation history"""
-    if 'chat_history' in st.session_state and st.session_state.chat_history:
+def render_message_html(role: str, message: str) -> str:
+    """Build the chat bubble HTML for one message"""
+    if role == 'user':
+        return (
+            f'<div class="user-message">'
+            f'<div style="font-size: 0.85rem; opacity: 0.9; margin-bottom: 0.4rem; font-weight: 600;">👤 YOU</div>'
+            f'{message}'
+            f'</div>'
+        )
+    return (
+        f'<div class="bot-message">'
+        f'<div style="font-size: 0.85rem; opacity: 0.9; margin-bottom: 0.4rem; font-weight: 600;">🤖 TALENTSCOUT ASSISTANT</div>'
+        f'{message}'
+        f'</div>'
+    )
+
+def load_earlier_messages():
+    """Widen the chat window by one window size"""
+    st.session_state.chat_window += CHAT_WINDOW_SIZE
+
+def message_key(index: int, chat: Dict) -> str:
+    """A message's id; messages saved before they had one are keyed by position"""
+    return chat.get('id') or f"#{index}"
+
+def display_chat_history(response_stream: Optional[Iterator[str]] = None) -> Optional[str]:
+    """
+    Display chat conversation history
+    
+    Only the latest `chat_window` messages are sent to the browser, so a turn
+    costs the same however long the conversation gets; earlier messages are
+    loaded on request. Bubble HTML is cached by message id, so each message
+    is rendered once while it stays on screen.
+    
+    If `response_stream` is given, the assistant reply is rendered below the
+    history as its pieces arrive and the full text is returned.
+    """
+    response_text = None
+    chat_history = st.session_state.chatbot.state.chat_history
+    if chat_history:
+        start = max(0, len(chat_history) - st.session_state.chat_window)
+        if start:
+            st.button(f"⬆️ Show earlier messages ({start} hidden)", use_container_width=True,
+                      key="load_earlier", on_click=load_earlier_messages)
+        
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
         
-        for chat in st.session_state.chat_history:
-            if chat['role'] == 'user':
-                st.markdown(
-                    f'<div class="user-message">'
-                    f'<div style="font-size: 0.85rem; opacity: 0.9; margin-bottom: 0.4rem; font-weight: 600;">👤 YOU</div>'
-                    f'{chat["message"]}'
-                    f'</div>', 
-                    unsafe_allow_html=True
-                )
-            else:
-                st.markdown(
-                    f'<div class="bot-message">'
-                    f'<div style="font-size: 0.85rem; opacity: 0.9; margin-bottom: 0.4rem; font-weight: 600;">🤖 TALENTSCOUT ASSISTANT</div>'
-                    f'{chat["message"]}'
-                    f'</div>', 
-                    unsafe_allow_html=True
-                )
+        cached = st.session_state.message_html
+        rendered = {}
+        for index in range(start, len(chat_history)):
+            chat = chat_history[index]
+            key = message_key(index, chat)
+            html = cached.get(key)
+            if html is None:
+                html = render_message_html(chat['role'], chat['message'])
+            rendered[key] = html
+            st.markdown(html, unsafe_allow_html=True)
+        # Messages scrolled out of the window leave the cache
+        st.session_state.message_html = rendered
+        
+        if response_stream is not None:
+            placeholder = st.empty()
+            response_text = ""
+            for chunk in response_stream:
+                response_text += chunk
+                placeholder.markdown(render_message_html('assistant', response_text), unsafe_allow_html=True)
         
         # Auto-scroll to bottom
         st.markdown("""
@@ -278,107 +353,195 @@ def display_chat_history():
         """, unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
+    return response_text
 
-def display_sidebar():
-    """Display sidebar with ALL candidate information and controls"""
-    with st.sidebar:
-        # Session Information
-        st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
-        st.markdown("## 📋 **Session Information**")
+@st.fragment(key="chat")
+def display_chat():
+    """The chat log; an LLM reply waiting to be generated is streamed into it"""
+    # LLM replies are streamed into the chat on the rerun after submission
+    pending_input = st.session_state.pop('pending_input', None)
+    response_stream = st.session_state.chatbot.stream_user_input(pending_input) if pending_input else None
+    
+    bot_response = display_chat_history(response_stream)
+    if response_stream is not None:
+        st.session_state.chatbot.add_to_chat_history("assistant", bot_response)
+
+def page_snapshot() -> Tuple:
+    """What the progress bar and candidate details show"""
+    state = st.session_state.chatbot.state
+    return state.conversation_state, state.flow, tuple(state.candidate_data)
+
+def rerun_changed_fragments(before: Tuple):
+    """
+    After a turn, rerun only the fragments whose data changed: the chat, the
+    input and the statistics always, progress and details when the turn
+    completed a step
+    """
+    fragments = ["chat", "input", "stats"]
+    if page_snapshot() != before:
+        fragments += ["progress", "details"]
+    st.rerun(fragments)
+
+def submit_response():
+    """Answer the submitted message (Submit Response callback)"""
+    user_input = st.session_state.get(f"user_input_{st.session_state.input_key}", "").strip()
+    if not user_input:
+        return
+    
+    chatbot = st.session_state.chatbot
+    before = page_snapshot()
+    # Add user message to chat history
+    chatbot.add_to_chat_history("user", user_input)
+    
+    if chatbot.will_stream(user_input):
+        # Generated while the chat renders on the next run
+        st.session_state.pending_input = user_input
+    else:
+        # Generate bot response and add it to chat history
+        bot_response = chatbot.process_user_input(user_input)
+        chatbot.add_to_chat_history("assistant", bot_response)
+    
+    # Change input key to clear the input for next question
+    st.session_state.input_key += 1
+    # Back to the latest messages only
+    st.session_state.chat_window = CHAT_WINDOW_SIZE
+    rerun_changed_fragments(before)
+
+def end_conversation():
+    """Say goodbye (End Session callback)"""
+    before = page_snapshot()
+    ending_message = st.session_state.chatbot.handle_conversation_end()
+    st.session_state.chatbot.add_to_chat_history("assistant", ending_message)
+    rerun_changed_fragments(before)
+
+@st.fragment(key="input")
+def display_input():
+    """The response box; a submitted answer reruns only the fragments it changed"""
+    if st.session_state.chatbot.state.conversation_state in (
+        ConversationState.GENERATING_QUESTIONS, ConversationState.COMPLETED
+    ):
+        # The input gives way to the question poller or the completion notice
+        st.rerun()
+    
+    st.markdown("## 💬 Your Response")
+    
+    st.markdown('<div class="input-container">', unsafe_allow_html=True)
+    
+    # Use dynamic key to avoid session state conflicts
+    st.text_area(
+        "Type your response here:",
+        value="",
+        height=130,
+        key=f"user_input_{st.session_state.input_key}",
+        placeholder="💡 Type your detailed answer here...\n\nBe specific and provide comprehensive responses for better assessment of your qualifications.",
+        label_visibility="collapsed"
+    )
+    
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.button("📤 Submit Response", type="primary", use_container_width=True, key="submit_btn",
+                  on_click=submit_response)
+    
+    with col2:
+        st.button("❌ End Session", use_container_width=True, key="end_btn", on_click=end_conversation)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment(run_every=LLM_POLL_INTERVAL)
+def display_pending_questions():
+    """Poll background question generation and add the questions to the chat when ready"""
+    if st.session_state.chatbot.deliver_technical_questions() is None:
+        st.info("⏳ Preparing your technical questions...")
+        return
+    
+    st.rerun()
+
+@st.fragment(key="details")
+def display_candidate_details():
+    """Sidebar candidate details and progress; they change when a step is completed"""
+    state = st.session_state.chatbot.state
+    # Session Information
+    st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
+    st.markdown("## 📋 **Session Information**")
+    
+    if state.candidate_data:
+        st.markdown("### 🧑‍💼 Candidate Details")
+        candidate_info = format_candidate_info(state.candidate_data)
+        st.markdown(candidate_info)
         
-        if 'candidate_data' in st.session_state and st.session_state.candidate_data:
-            st.markdown("### 🧑‍💼 Candidate Details")
-            candidate_info = format_candidate_info(st.session_state.candidate_data)
-            st.markdown(candidate_info)
-            
-            # Additional candidate stats
-            if st.session_state.candidate_data.get('experience'):
-                exp = st.session_state.candidate_data['experience']
-                st.markdown(f"**Experience Level:** {'Junior' if exp < 3 else 'Mid-level' if exp < 6 else 'Senior'}")
-            
-            if st.session_state.candidate_data.get('tech_stack_parsed'):
-                tech_data = st.session_state.candidate_data['tech_stack_parsed']
-                tech_count = sum(len(skills) for category, skills in tech_data.items() if category != 'soft_skills')
-                soft_count = len(tech_data.get('soft_skills', []))
-                st.markdown(f"**Technical Skills:** {tech_count}")
-                st.markdown(f"**Soft Skills:** {soft_count}")
-        else:
-            st.markdown("### 🧑‍💼 Candidate Details")
-            st.info("No candidate information collected yet. Start the screening process to begin.")
-        st.markdown('</div>', unsafe_allow_html=True)
+        # Additional candidate stats
+        if state.candidate_data.get('experience'):
+            exp = state.candidate_data['experience']
+            st.markdown(f"**Experience Level:** {'Junior' if exp < 3 else 'Mid-level' if exp < 6 else 'Senior'}")
         
-        # Progress Tracking
-        st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
-        st.markdown("## 📈 **Progress Tracking**")
+        if state.candidate_data.get('tech_stack_parsed'):
+            st.markdown(f"**Technical Skills:** {state.stats.technical_skills}")
+            st.markdown(f"**Soft Skills:** {state.stats.soft_skills}")
+    else:
+        st.markdown("### 🧑‍💼 Candidate Details")
+        st.info("No candidate information collected yet. Start the screening process to begin.")
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Progress Tracking
+    st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
+    st.markdown("## 📈 **Progress Tracking**")
+    
+    if state.conversation_state:
+        current_step, total_steps = st.session_state.chatbot.get_conversation_progress()
         
-        if hasattr(st.session_state, 'conversation_state'):
-            current_step, total_steps = st.session_state.chatbot.get_conversation_progress()
-            
-            progress_percentage = (current_step - 1) / (total_steps - 1) if total_steps > 1 else 0
-            st.progress(progress_percentage)
-            
-            st.markdown(f"**Current Progress:** {current_step}/{total_steps} steps")
-            st.markdown(f"**Completion:** {int(progress_percentage * 100)}%")
-            
-            # Detailed phase information
-            state_details = {
-                'greeting': '**Phase:** Initial Welcome\n**Status:** Introduction and setup',
-                'collecting_name': '**Phase:** Personal Information\n**Status:** Collecting candidate name',
-                'collecting_email': '**Phase:** Contact Details\n**Status:** Email verification',
-                'collecting_phone': '**Phase:** Phone Verification\n**Status:** 10-digit number validation',
-                'collecting_experience': '**Phase:** Professional Background\n**Status:** Years of experience',
-                'collecting_position': '**Phase:** Career Interests\n**Status:** Desired positions',
-                'collecting_location': '**Phase:** Location Info\n**Status:** Work location preferences',
-                'collecting_tech_stack': '**Phase:** Skills Assessment\n**Status:** Technical & soft skills',
-                'asking_questions': '**Phase:** Technical Evaluation\n**Status:** Skill-based questions',
-                'completed': '**Phase:** Screening Complete\n**Status:** Final assessment done'
-            }
-            
-            current_state_detail = state_details.get(st.session_state.conversation_state, '**Phase:** Starting\n**Status:** Initializing session')
-            st.markdown(current_state_detail)
-            
-            # Next steps preview
-            if current_step < total_steps:
-                next_steps_info = {
-                    1: "**Next:** Contact information collection",
-                    2: "**Next:** Phone number verification", 
-                    3: "**Next:** Professional experience assessment",
-                    4: "**Next:** Career position preferences",
-                    5: "**Next:** Location information",
-                    6: "**Next:** Technical skills evaluation",
-                    7: "**Next:** Soft skills assessment",
-                    8: "**Next:** Technical questions session",
-                    9: "**Next:** Final review and completion"
-                }
-                if current_step in next_steps_info:
-                    st.markdown(next_steps_info[current_step])
-        else:
-            st.info("Start the screening process to track your progress.")
-        st.markdown('</div>', unsafe_allow_html=True)
+        progress_percentage = (current_step - 1) / (total_steps - 1) if total_steps > 1 else 0
+        st.progress(progress_percentage)
         
-        # Session Statistics
-        st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
-        st.markdown("## 📊 **Session Statistics**")
+        st.markdown(f"**Current Progress:** {current_step}/{total_steps} steps")
+        st.markdown(f"**Completion:** {int(progress_percentage * 100)}%")
         
-        if 'chat_history' in st.session_state:
-            total_messages = len(st.session_state.chat_history)
-            user_messages = len([m for m in st.session_state.chat_history if m['role'] == 'user'])
-            bot_messages = len([m for m in st.session_state.chat_history if m['role'] == 'assistant'])
-            
-            st.markdown(f"**Total Messages:** {total_messages}")
-            st.markdown(f"**Your Responses:** {user_messages}")
-            st.markdown(f"**Assistant Messages:** {bot_messages}")
-            
-            if 'technical_questions' in st.session_state:
-                st.markdown(f"**Technical Questions:** {len(st.session_state.technical_questions)}")
-            
-            if 'current_question_index' in st.session_state:
-                st.markdown(f"**Questions Answered:** {st.session_state.current_question_index}")
+        # Detailed phase information, from the candidate's screening flow
+        flow = st.session_state.chatbot.flow
+        step = flow.steps.get(state.conversation_state)
+        if step is not None:
+            st.markdown(f"**Phase:** {step.phase}\n**Status:** {step.status}")
         else:
-            st.markdown("**Total Messages:** 0")
-            st.markdown("**Your Responses:** 0")
-            st.markdown("**Assistant Messages:** 0")
-        st.markdown('</div>', unsafe_allow_html=True)
+            st.markdown('**Phase:** Starting\n**Status:** Initializing session')
+        
+        # Next steps preview
+        upcoming = flow.upcoming.get(state.conversation_state)
+        if upcoming is not None:
+            st.markdown(f"**Next:** {upcoming.status}")
+    else:
+        st.info("Start the screening process to track your progress.")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment(key="stats")
+def display_session_statistics():
+    """Sidebar message and question counts; they change on every turn"""
+    state = st.session_state.chatbot.state
+    # Session Statistics
+    st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
+    st.markdown("## 📊 **Session Statistics**")
+    
+    # Counters kept up to date by the chatbot; nothing is recounted here
+    stats = state.stats
+    st.markdown(f"**Total Messages:** {stats.total_messages}")
+    st.markdown(f"**Your Responses:** {stats.user_messages}")
+    st.markdown(f"**Assistant Messages:** {stats.assistant_messages}")
+    st.markdown(f"**Technical Questions:** {len(state.technical_questions)}")
+    st.markdown(f"**Questions Answered:** {stats.questions_answered}")
+    
+    # Time per step, in flow order
+    durations = stats.step_durations()
+    if durations:
+        st.markdown("### ⏱️ Time per Step")
+        st.markdown("\n".join(
+            f"- {step.status}: {format_duration(durations[step.state])}"
+            for step in st.session_state.chatbot.flow.step_list if step.state in durations
+        ))
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def display_sidebar():
+    """Display sidebar with ALL candidate information and controls"""
+    with st.sidebar:
+        display_candidate_details()
+        display_session_statistics()
         
         # Requirements & Validation
         st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
@@ -416,11 +579,11 @@ def display_sidebar():
         
         with col1:
             if st.button("🔄 New Session", use_container_width=True, help="Start a completely new screening session"):
-                for key in ['conversation_state', 'candidate_data', 'technical_questions', 
-                           'current_question_index', 'chat_history', 'conversation_started', 'input_key']:
+                st.session_state.chatbot.end_session()
+                for key in ['conversation_started', 'input_key', 'pending_input', 'chat_window', 'message_html']:
                     if key in st.session_state:
                         del st.session_state[key]
-                st.session_state.chatbot = HiringAssistantChatbot()
+                st.session_state.chatbot = new_chatbot()
                 st.rerun()
         
         with col2:
@@ -504,50 +667,17 @@ def main():
         
         # Display chat history
         if st.session_state.conversation_started:
-            display_chat_history()
+            display_chat()
             
-            # Input area - FIXED SESSION STATE ISSUE
-            if hasattr(st.session_state, 'conversation_state') and st.session_state.conversation_state != 'completed':
-                st.markdown("## 💬 Your Response")
-                
-                st.markdown('<div class="input-container">', unsafe_allow_html=True)
-                
-                # Use dynamic key to avoid session state conflicts
-                user_input = st.text_area(
-                    "Type your response here:",
-                    value="",
-                    height=130,
-                    key=f"user_input_{st.session_state.input_key}",
-                    placeholder="💡 Type your detailed answer here...\n\nBe specific and provide comprehensive responses for better assessment of your qualifications.",
-                    label_visibility="collapsed"
-                )
-                
-                col1, col2 = st.columns([1, 1])
-                with col1:
-                    if st.button("📤 Submit Response", type="primary", use_container_width=True, key="submit_btn"):
-                        if user_input.strip():
-                            # Add user message to chat history
-                            st.session_state.chatbot.add_to_chat_history("user", user_input.strip())
-                            
-                            # Generate bot response
-                            bot_response = st.session_state.chatbot.process_user_input(user_input.strip())
-                            
-                            # Add bot response to chat history
-                            st.session_state.chatbot.add_to_chat_history("assistant", bot_response)
-                            
-                            # Change input key to clear the input for next question
-                            st.session_state.input_key += 1
-                            st.rerun()
-                
-                with col2:
-                    if st.button("❌ End Session", use_container_width=True, key="end_btn"):
-                        ending_message = st.session_state.chatbot.handle_conversation_end()
-                        st.session_state.chatbot.add_to_chat_history("assistant", ending_message)
-                        st.rerun()
-                
-                st.markdown('</div>', unsafe_allow_html=True)
+            # Technical questions are generated off the script thread; poll until ready
+            conversation_state = st.session_state.chatbot.state.conversation_state
+            if conversation_state == ConversationState.GENERATING_QUESTIONS:
+                display_pending_questions()
+            
+            elif conversation_state != ConversationState.COMPLETED:
+                display_input()
             
-            elif hasattr(st.session_state, 'conversation_state') and st.session_state.conversation_state == 'completed':
+            elif conversation_state == ConversationState.COMPLETED:
                 st.markdown('<div class="info-box">', unsafe_allow_html=True)
                 st.markdown("""
                 ## ✅ Screening Successfully Completed!
@@ -0,0 +1,153 @@
+"""
+Bulk candidate screening for TalentScout Hiring Assistant
+
+Runs the chatbot's validators over imported candidate records (CSV with a
+header row, or JSON Lines) and streams one JSON result per record.
+
+Usage:
+    python batch_screening.py candidates.csv -o results.jsonl --workers 4
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils import (
+    validate_email, validate_phone, validate_experience, validate_location,
+    validate_tech_stack
+)
+
+# Records per task sent to a worker process
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _field(record: Dict, name: str) -> str:
+    value = record.get(name)
+    return "" if value is None else str(value)
+
+
+def screen_record(record: Dict) -> Dict:
+    """Run every validator over one candidate record"""
+    errors = {}
+
+    is_valid, error_message = validate_email(_field(record, 'email'))
+    if not is_valid:
+        errors['email'] = error_message
+
+    is_valid, error_message = validate_phone(_field(record, 'phone'))
+    if not is_valid:
+        errors['phone'] = error_message
+
+    is_valid, error_message, years = validate_experience(_field(record, 'experience'))
+    if not is_valid:
+        errors['experience'] = error_message
+
+    is_valid, error_message = validate_location(_field(record, 'location'))
+    if not is_valid:
+        errors['location'] = error_message
+
+    is_valid, error_message, categorized_tech = validate_tech_stack(_field(record, 'tech_stack'))
+    if not is_valid:
+        errors['tech_stack'] = error_message
+
+    return {
+        "id": record.get('id'),
+        "valid": not errors,
+        "errors": errors,
+        "experience": years,
+        "tech_stack_parsed": {category: skills for category, skills in categorized_tech.items() if skills}
+    }
+
+
+def screen_chunk(records: List[Dict]) -> List[Dict]:
+    """Screen a list of records (the unit of work sent to worker processes)"""
+    return [screen_record(record) for record in records]
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Stream records from a .csv or .jsonl file (use '-' for JSON Lines on stdin)"""
+    if path == '-':
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    with open(path, newline='', encoding='utf-8') as source:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _chunks(records: Iterable[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def screen_records(records: Iterable[Dict], workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Screen records across a process pool, yielding results in input order.
+
+    At most two chunks per worker are in flight, so memory stays bounded no
+    matter how large the input is. workers=1 screens in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in _chunks(records, chunk_size):
+            yield from screen_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append(executor.submit(screen_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen candidate records in bulk")
+    parser.add_argument("input", help="Candidate records (.csv or .jsonl, '-' for JSON Lines on stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Results file (JSON Lines, default stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    total = 0
+    valid = 0
+    start = time.perf_counter()
+    try:
+        for result in screen_records(read_records(args.input), args.workers, args.chunk_size):
+            output.write(json.dumps(result) + "\n")
+            total += 1
+            valid += result['valid']
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Screened {total} records ({valid} valid) in {elapsed:.2f}s - {rate:.0f} records/sec",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
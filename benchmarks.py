@@ -0,0 +1,221 @@
+"""
+Micro-benchmarks for TalentScout Hiring Assistant
+
+Usage:
+    python benchmarks.py skill-matcher
+    python benchmarks.py fuzzy
+    python benchmarks.py taxonomy
+    python benchmarks.py question-bank
+"""
+
+import argparse
+import csv
+import os
+import random
+import string
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from config import TECH_CATEGORIES, SOFT_SKILL_KEYWORDS
+from question_bank import DIFFICULTY_LEVELS, QuestionBank
+from skill_index import FuzzySkillIndex, build_skill_matcher
+from skill_taxonomy import SkillTaxonomy, compile_taxonomy
+
+
+def _synthetic_taxonomy(size: int, rng: random.Random) -> Dict[str, List[str]]:
+    """Grow the configured taxonomy with random terms up to `size` entries"""
+    categories = {category: list(terms) for category, terms in TECH_CATEGORIES.items()}
+    names = list(categories.keys())
+    total = sum(len(terms) for terms in categories.values())
+    while total < size:
+        term = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+        categories[rng.choice(names)].append(term)
+        total += 1
+    return categories
+
+
+def _naive_categorize(tech_stack: str, categories: Dict[str, List[str]], soft_keywords: List[str]) -> list:
+    """Reference implementation: nested substring scan over the vocabulary"""
+    results = []
+    for item in tech_stack.lower().replace(';', ',').replace('|', ',').replace('\n', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if any(skill in item for skill in soft_keywords):
+            results.append((item, 'soft_skills'))
+            continue
+        found = None
+        for category, technologies in categories.items():
+            if any(tech in item or item in tech for tech in technologies):
+                found = category
+                break
+        results.append((item, found))
+    return results
+
+
+def _time_per_call(func: Callable[[str], object], inputs: List[str]) -> float:
+    """Return mean microseconds per call over all inputs"""
+    start = time.perf_counter()
+    for value in inputs:
+        func(value)
+    return (time.perf_counter() - start) / len(inputs) * 1e6
+
+
+def bench_skill_matcher(args):
+    """
+    Compare the matcher against the nested scan as the vocabulary grows.
+
+    One skill per input is misspelled so the fuzzy matcher parse_skills uses
+    pays for trigram resolution; the exact-only matcher is shown alongside.
+    Speedup is naive vs. the fuzzy (production) matcher.
+    """
+    rng = random.Random(args.seed)
+    print(f"{'vocabulary':>10} {'fragments':>10} {'build ms':>10} {'naive us':>10} "
+          f"{'exact us':>9} {'fuzzy us':>9} {'speedup':>8}")
+    for size in args.sizes:
+        categories = _synthetic_taxonomy(size, rng)
+        vocabulary = [term for terms in categories.values() for term in terms]
+        inputs = [
+            ', '.join(rng.choice(vocabulary) for _ in range(7))
+            + f", {_misspell(rng.choice(vocabulary), 1, rng)}, communication, unknownskill"
+            for _ in range(args.samples)
+        ]
+
+        start = time.perf_counter()
+        matcher = build_skill_matcher(categories, SOFT_SKILL_KEYWORDS)
+        build_ms = (time.perf_counter() - start) * 1e3
+        exact_matcher = build_skill_matcher(categories, SOFT_SKILL_KEYWORDS, fuzzy=False)
+
+        naive_us = _time_per_call(
+            lambda value: _naive_categorize(value, categories, SOFT_SKILL_KEYWORDS), inputs
+        )
+        exact_us = _time_per_call(exact_matcher.categorize, inputs)
+        fuzzy_us = _time_per_call(matcher.categorize, inputs)
+        print(f"{size:>10} {len(matcher._fragment_rank):>10} {build_ms:>10.1f} {naive_us:>10.1f} "
+              f"{exact_us:>9.1f} {fuzzy_us:>9.1f} {naive_us / fuzzy_us:>7.1f}x")
+
+
+def _misspell(term: str, edits: int, rng: random.Random) -> str:
+    """Apply random insertions, deletions and substitutions to a term"""
+    chars = list(term)
+    for _ in range(edits):
+        operation = rng.choice("ids") if len(chars) > 1 else "i"
+        position = rng.randrange(len(chars) + (operation == "i"))
+        if operation == "i":
+            chars.insert(position, rng.choice(string.ascii_lowercase))
+        elif operation == "d":
+            del chars[position]
+        else:
+            chars[position] = rng.choice(string.ascii_lowercase)
+    return ''.join(chars)
+
+
+def bench_fuzzy(args):
+    """Resolve noisy tokens through the trigram index"""
+    rng = random.Random(args.seed)
+    vocabulary = sorted({term for terms in TECH_CATEGORIES.values() for term in terms})
+    index = FuzzySkillIndex(vocabulary)
+    vocabulary = [term for term in vocabulary if len(term) >= index.min_length]
+    samples = []
+    for _ in range(args.tokens):
+        term = rng.choice(vocabulary)
+        samples.append((term, _misspell(term, rng.randint(0, args.max_edits), rng)))
+
+    start = time.perf_counter()
+    results = [index.lookup(noisy) for _, noisy in samples]
+    elapsed = time.perf_counter() - start
+
+    resolved = sum(1 for result in results if result is not None)
+    correct = sum(1 for (term, _), result in zip(samples, results) if result and result[0] == term)
+    print(f"tokens:       {len(samples)}")
+    print(f"per token:    {elapsed / len(samples) * 1e6:.1f} us")
+    print(f"resolved:     {resolved / len(samples):.1%}")
+    print(f"correct:      {correct / len(samples):.1%}")
+
+
+def bench_taxonomy(args):
+    """Compile, open and query synthetic taxonomies of growing size"""
+    rng = random.Random(args.seed)
+    print(f"{'skills':>8} {'file KB':>8} {'compile ms':>11} {'open ms':>8} {'lookup us':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            source_path = os.path.join(directory, f"taxonomy-{size}.csv")
+            output_path = os.path.join(directory, f"taxonomy-{size}.bin")
+            skills = set()
+            while len(skills) < size:
+                skills.add(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 14))))
+            skills = sorted(skills)
+            with open(source_path, 'w', newline='', encoding='utf-8') as source:
+                writer = csv.writer(source)
+                writer.writerow(['skill', 'category', 'aliases'])
+                for skill in skills:
+                    writer.writerow([skill, f"category{rng.randrange(40)}", f"{skill}js|{skill}-lang"])
+
+            start = time.perf_counter()
+            compile_taxonomy(source_path, output_path)
+            compile_ms = (time.perf_counter() - start) * 1e3
+
+            start = time.perf_counter()
+            taxonomy = SkillTaxonomy(output_path)
+            open_ms = (time.perf_counter() - start) * 1e3
+
+            queries = [rng.choice(skills) + rng.choice(['', 'js', 'x']) for _ in range(args.samples)]
+            lookup_us = _time_per_call(taxonomy.lookup, queries)
+            taxonomy.close()
+            file_kb = os.path.getsize(output_path) / 1024
+            print(f"{size:>8} {file_kb:>8.0f} {compile_ms:>11.1f} {open_ms:>8.2f} {lookup_us:>10.1f}")
+
+
+def bench_question_bank(args):
+    """Question selection cost vs. bank size"""
+    rng = random.Random(args.seed)
+    vocabulary = sorted({term for terms in TECH_CATEGORIES.values() for term in terms})
+    stacks = [rng.sample(vocabulary, rng.randint(3, 8)) for _ in range(args.samples)]
+    print(f"{'questions':>10} {'build ms':>9} {'select us':>10}")
+    for size in args.sizes:
+        start = time.perf_counter()
+        bank = QuestionBank()
+        for number in range(size):
+            skills = rng.sample(vocabulary, rng.randint(0, 2))
+            bank.add(f"Question {number}", skills, "general", rng.choice(DIFFICULTY_LEVELS))
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        for stack in stacks:
+            bank.select(stack, rng.choice(DIFFICULTY_LEVELS))
+        select_us = (time.perf_counter() - start) / len(stacks) * 1e6
+        print(f"{size:>10} {build_ms:>9.1f} {select_us:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TalentScout micro-benchmarks")
+    parser.add_argument("--seed", type=int, default=7)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    skill_parser = subparsers.add_parser("skill-matcher", help="Skill categorization vs. vocabulary size")
+    skill_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    skill_parser.add_argument("--samples", type=int, default=500)
+    skill_parser.set_defaults(func=bench_skill_matcher)
+
+    fuzzy_parser = subparsers.add_parser("fuzzy", help="Misspelled skill resolution")
+    fuzzy_parser.add_argument("--tokens", type=int, default=100000)
+    fuzzy_parser.add_argument("--max-edits", type=int, default=2)
+    fuzzy_parser.set_defaults(func=bench_fuzzy)
+
+    taxonomy_parser = subparsers.add_parser("taxonomy", help="Compiled taxonomy size, open and lookup cost")
+    taxonomy_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    taxonomy_parser.add_argument("--samples", type=int, default=20000)
+    taxonomy_parser.set_defaults(func=bench_taxonomy)
+
+    bank_parser = subparsers.add_parser("question-bank", help="Question selection vs. bank size")
+    bank_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    bank_parser.add_argument("--samples", type=int, default=2000)
+    bank_parser.set_defaults(func=bench_question_bank)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,45 +2,166 @@
 LLM integration and conversation management for TalentScout Hiring Assistant
 """
 
+import copy
+import functools
+import inspect
 import json
 import os
-import requests
 import re
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import streamlit as st
 
-from config import SYSTEM_PROMPTS, ConversationState, REQUIRED_FIELDS
+from config import (
+    SYSTEM_PROMPTS, ConversationState, REQUIRED_FIELDS, LLM_ENDPOINTS, LLM_TURN_BUDGET,
+    LLM_STREAM_RESPONSES, LLM_REQUEST_TIMEOUT, LLM_BACKEND, LOCAL_MODEL_NAME, SESSION_TTL
+)
+from llm_client import get_llm_client, get_llm_executor
+from llm_router import CALL_CHAT, CALL_QUESTIONS, get_endpoint_router
+from local_inference import get_local_generator
+from question_bank import get_question_bank
+from rate_limiter import Priority
+from question_cache import get_question_cache, question_cache_key
 from utils import (
     validate_email, validate_phone, validate_experience, parse_tech_stack,
     is_conversation_ending, extract_name_from_input, sanitize_input,
-    validate_location, validate_tech_stack
+    validate_location, validate_tech_stack, get_experience_level, format_phone_number
 )
+from profile_extraction import FIELD_LABELS, PROFILE_FIELDS, extract_profile
+from skill_index import parse_skills
+from response_engine import TIER_LLM, TIER_RULES, TIER_STATIC, get_response_engine, is_question
+from conversation_flow import SKIP_PATTERN, CompiledFlow, get_flow, select_flow
+from session_store import SessionState, SessionStore, get_session_store
+
+# Special tokens removed by _clean_llm_response
+RESPONSE_MARKERS = ("[INST]", "[/INST]", "<s>", "</s>")
+
+# Background question generation by session id; futures cannot leave the
+# process, so other processes find the result in the shared question cache
+_pending_questions: Dict[str, Future] = {}
+# When each generation was started (time.monotonic()), for expiring abandoned ones
+_pending_started_at: Dict[str, float] = {}
+_pending_lock = threading.Lock()
+
+
+def _add_pending_questions(session_id: str, future: Future, now: Optional[float] = None):
+    """
+    Track a session's question generation, dropping finished generations
+    started more than SESSION_TTL ago that nobody collected (their sessions
+    were abandoned; one that returns finds its questions in the question cache)
+    """
+    now = time.monotonic() if now is None else now
+    with _pending_lock:
+        for expired in [
+            other for other, started_at in _pending_started_at.items()
+            if now - started_at > SESSION_TTL and _pending_questions[other].done()
+        ]:
+            del _pending_questions[expired], _pending_started_at[expired]
+        _pending_questions[session_id] = future
+        _pending_started_at[session_id] = now
+
+
+def _pop_pending_questions(session_id: str):
+    with _pending_lock:
+        _pending_questions.pop(session_id, None)
+        _pending_started_at.pop(session_id, None)
+
+
+def _in_session(method: Optional[Callable] = None, *, save: bool = True):
+    """
+    Run a chatbot method against its session's state, loaded once for the
+    call, and save the state afterwards unless `save` is False
+    """
+    if method is None:
+        return functools.partial(_in_session, save=save)
+    
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def generator_wrapper(self, *args, **kwargs):
+            with self._session(save):
+                yield from method(self, *args, **kwargs)
+        return generator_wrapper
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._session(save):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class StreamingResponseCleaner:
+    """
+    Apply a response cleaner to text that arrives in pieces.
+    
+    The cleaner only removes markers up to the end of their line and strips
+    the ends, so cleaning a prefix of the response yields a prefix of the
+    final cleaned text. Each feed() re-cleans what has arrived (holding back a
+    possibly incomplete marker) and returns only the newly settled text.
+    """
+    
+    def __init__(self, clean: Callable[[str], str]):
+        self._clean = clean
+        self._raw = ""
+        self._emitted = 0
+    
+    def feed(self, chunk: str) -> str:
+        self._raw += chunk
+        return self._settle(self._raw[:len(self._raw) - self._partial_marker_length()])
+    
+    def finish(self) -> str:
+        return self._settle(self._raw)
+    
+    def _partial_marker_length(self) -> int:
+        """Length of the longest tail of the raw text that could start a marker"""
+        for length in range(max(len(marker) for marker in RESPONSE_MARKERS) - 1, 0, -1):
+            tail = self._raw[-length:]
+            if len(tail) == length and any(marker.startswith(tail) for marker in RESPONSE_MARKERS):
+                return length
+        return 0
+    
+    def _settle(self, raw: str) -> str:
+        cleaned = self._clean(raw)
+        delta = cleaned[self._emitted:]
+        self._emitted = max(self._emitted, len(cleaned))
+        return delta
+
 
 class HiringAssistantChatbot:
     """
     Main chatbot class for handling conversations with candidates
     """
     
-    def __init__(self):
-        """Initialize the chatbot with Hugging Face API"""
+    def __init__(self, store: Optional[SessionStore] = None, session_id: Optional[str] = None):
+        """
+        Initialize the chatbot with Hugging Face API or a local model
+        
+        Args:
+            store (SessionStore): Where the conversation state lives; defaults
+                to the store configured by SESSION_STORE
+            session_id (str): The conversation to work on; a new one by default
+        """
+        self.store = store if store is not None else get_session_store()
+        self.session_id = session_id or uuid.uuid4().hex
+        self._state: Optional[SessionState] = None
         try:
             from dotenv import load_dotenv
             load_dotenv()
             
-            self.api_key = os.getenv("HUGGING_FACE_API_KEY", "").strip()
-            
-            # If no API key found, check if we can get it from Streamlit secrets
-            if not self.api_key and hasattr(st, 'secrets'):
-                self.api_key = st.secrets.get("HUGGING_FACE_API_KEY", "").strip()
-            
-            self.use_llm = bool(self.api_key and len(self.api_key) > 10)
-            
-            if self.use_llm:
-                self.api_url = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
-                self.headers = {"Authorization": f"Bearer {self.api_key}"}
-                st.success("✅ Hugging Face API connected!")
+            if LLM_BACKEND == "local":
+                self.use_llm = True
+                # Names the model in question cache keys
+                self.api_url = f"local:{LOCAL_MODEL_NAME}"
+                # One model per process, shared by every session; loading starts now,
+                # off the request path, so the first turn is not spent waiting for it
+                self.backend = get_local_generator()
+                self.backend.warm_up()
+                st.success(f"✅ Local model {LOCAL_MODEL_NAME} enabled")
             else:
-                st.info("🔧 Using enhanced fallback mode. For AI features, add HUGGING_FACE_API_KEY to .env file")
+                self._init_inference_api()
         
         except Exception as e:
             st.info("🔧 Fallback mode activated")
@@ -48,63 +169,179 @@ class HiringAssistantChatbot:
         
         self.reset_conversation()
     
-    def reset_conversation(self):
-        """Reset conversation state for new candidate"""
-        if 'conversation_state' not in st.session_state:
-            st.session_state.conversation_state = ConversationState.GREETING
-        
-        if 'candidate_data' not in st.session_state:
-            st.session_state.candidate_data = {}
+    def _init_inference_api(self):
+        """Connect to the Hugging Face Inference API endpoints"""
+        self.api_key = os.getenv("HUGGING_FACE_API_KEY", "").strip()
         
-        if 'technical_questions' not in st.session_state:
-            st.session_state.technical_questions = []
+        # If no API key found, check if we can get it from Streamlit secrets
+        if not self.api_key and hasattr(st, 'secrets'):
+            self.api_key = st.secrets.get("HUGGING_FACE_API_KEY", "").strip()
         
-        if 'current_question_index' not in st.session_state:
-            st.session_state.current_question_index = 0
+        self.use_llm = bool(self.api_key and len(self.api_key) > 10)
         
-        if 'chat_history' not in st.session_state:
-            st.session_state.chat_history = []
+        if self.use_llm:
+            self.endpoints = LLM_ENDPOINTS
+            # The first endpoint names the model in question cache keys
+            self.api_url = self.endpoints[0]
+            # Pooled keep-alive client shared by every chatbot in the process
+            self.client = get_llm_client(self.api_key)
+            self.backend = get_endpoint_router(self.client, self.endpoints)
+            for url in self.endpoints:
+                self.client.start_keep_warm(url)
+            st.success("✅ Hugging Face API connected!")
+        else:
+            st.info("🔧 Using enhanced fallback mode. For AI features, add HUGGING_FACE_API_KEY to .env file")
+    
+    @property
+    def state(self) -> SessionState:
+        """The session's state: the one being worked on during a call, otherwise freshly loaded"""
+        return self._state if self._state is not None else self.store.load(self.session_id)
+    
+    @property
+    def flow(self) -> CompiledFlow:
+        """The compiled screening flow the session follows"""
+        return get_flow(self.state.flow)
+    
+    @contextmanager
+    def _session(self, save: bool = True):
+        """Load the session's state for the duration of a call and save it at the end"""
+        if self._state is not None:
+            # Nested call: the outer one saves
+            yield self._state
+            return
+        self._state = self.store.load(self.session_id)
+        try:
+            yield self._state
+            if save:
+                # Time per step starts when the call that entered it ends
+                self._state.stats.enter_step(self._state.conversation_state)
+                self.store.save(self.session_id, self._state)
+        finally:
+            self._state = None
+    
+    @_in_session
+    def reset_conversation(self):
+        """Make sure the session exists; a new one starts in the greeting state with no data"""
+    
+    def for_session(self, session_id: str) -> "HiringAssistantChatbot":
+        """A chatbot sharing this one's LLM backend and store, working on another session"""
+        chatbot = copy.copy(self)
+        chatbot.session_id = session_id
+        chatbot._state = None
+        return chatbot
     
+    def end_session(self):
+        """Discard the session's state"""
+        _pop_pending_questions(self.session_id)
+        self.store.delete(self.session_id)
+    
+    @_in_session
     def add_to_chat_history(self, role: str, message: str):
         """Add message to chat history"""
-        st.session_state.chat_history.append({
+        self.state.chat_history.append({
+            "id": uuid.uuid4().hex,
             "role": role,
             "message": message,
             "timestamp": None
         })
+        self.state.stats.record_message(role)
+    
+    def get_llm_response(self, messages: List[Dict], use_json: bool = False,
+                         deadline: Optional[float] = None, priority: int = Priority.DEFAULT,
+                         call_type: str = CALL_CHAT) -> str:
+        """
+        Get response from Hugging Face LLM with better error handling
+        
+        Args:
+            messages (List[Dict]): Conversation messages
+            use_json (bool): Ask for a JSON formatted answer
+            deadline (float): time.monotonic() by which the turn must be answered;
+                defaults to LLM_TURN_BUDGET from now. Past it, or while the shared
+                circuit breaker is open, the fallback response is returned.
+            priority (int): Rate limiter priority class of the call
+            call_type (str): CALL_CHAT or CALL_QUESTIONS, for latency-based routing
+        """
+        return (
+            self._generate_text(messages, use_json, deadline, priority, call_type)
+            or self._get_fallback_response(messages)
+        )
     
-    def get_llm_response(self, messages: List[Dict], use_json: bool = False) -> str:
-        """Get response from Hugging Face LLM with better error handling"""
+    def _generate_text(self, messages: List[Dict], use_json: bool = False,
+                       deadline: Optional[float] = None, priority: int = Priority.DEFAULT,
+                       call_type: str = CALL_CHAT) -> Optional[str]:
+        """The cleaned LLM response, or None when the LLM is unavailable or fails"""
+        if deadline is None:
+            deadline = time.monotonic() + LLM_TURN_BUDGET
+        
+        if not self.use_llm:
+            return None
+        
         try:
-            # If no API key, use fallback immediately
-            if not self.use_llm:
-                return self._get_fallback_response(messages)
-                
-            prompt = self._format_messages_for_mistral(messages, use_json)
+            payload = self._build_payload(messages, use_json)
             
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": 256,
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "return_full_text": False
-                }
+            # Routed to the fastest endpoint and coalesced with concurrent prompts
+            # from other sessions into one upstream call
+            generated_text = self.backend.generate(payload, call_type, deadline=deadline, priority=priority)
+        except Exception:
+            return None
+        
+        if generated_text:
+            return self._clean_llm_response(generated_text.strip()) or None
+        return None
+    
+    def stream_llm_response(self, messages: List[Dict], deadline: Optional[float] = None,
+                            priority: int = Priority.DEFAULT) -> Iterator[str]:
+        """
+        Yield the cleaned LLM response piece by piece as tokens arrive
+        
+        `deadline` bounds the wait for the first token (defaults to
+        LLM_TURN_BUDGET from now). If nothing could be streamed, the fallback
+        response is yielded instead.
+        """
+        streamed = False
+        for chunk in self._stream_text(messages, deadline, priority):
+            streamed = True
+            yield chunk
+        
+        if not streamed:
+            yield self._get_fallback_response(messages)
+    
+    def _stream_text(self, messages: List[Dict], deadline: Optional[float] = None,
+                     priority: int = Priority.DEFAULT) -> Iterator[str]:
+        """Yield cleaned LLM response pieces; yields nothing when the LLM is unavailable or fails"""
+        if deadline is None:
+            deadline = time.monotonic() + LLM_TURN_BUDGET
+        
+        if not self.use_llm:
+            return
+        
+        cleaner = StreamingResponseCleaner(self._clean_llm_response)
+        try:
+            payload = self._build_payload(messages, stream=True)
+            for token in self.backend.stream(payload, deadline=deadline, priority=priority):
+                chunk = cleaner.feed(token)
+                if chunk:
+                    yield chunk
+        except Exception:
+            pass
+        chunk = cleaner.finish()
+        if chunk:
+            yield chunk
+    
+    def _build_payload(self, messages: List[Dict], use_json: bool = False, stream: bool = False) -> Dict:
+        """Build the text-generation request body"""
+        payload = {
+            "inputs": self._format_messages_for_mistral(messages, use_json),
+            "parameters": {
+                "max_new_tokens": 256,
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "return_full_text": False
             }
-            
-            response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and len(result) > 0:
-                    generated_text = result[0].get('generated_text', '')
-                    return self._clean_llm_response(generated_text.strip())
-            
-            # If API fails, use fallback
-            return self._get_fallback_response(messages)
-            
-        except Exception as e:
-            return self._get_fallback_response(messages)
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
     
     def _get_fallback_response(self, messages: List[Dict]) -> str:
         """Provide fallback responses when LLM is unavailable"""
@@ -127,23 +364,21 @@ class HiringAssistantChatbot:
         return text.strip()
     
     def _format_messages_for_mistral(self, messages: List[Dict], use_json: bool = False) -> str:
-    """Simple prompt formatting that works with DialoGPT"""
-    last_user_message = ""
-    for msg in reversed(messages):
-        if msg.get('role') == 'user':
-            last_user_message = msg.get('content', '')
-            break
-    
-    # Simple prompt that works with DialoGPT
-    return f"User: {last_user_message}\nAssistant:"
-    
-    # Simple prompt that works with DialoGPT
-    return f"User: {last_user_message}\nAssistant:"
+        """Simple prompt formatting that works with DialoGPT"""
+        last_user_message = ""
+        for msg in reversed(messages):
+            if msg.get('role') == 'user':
+                last_user_message = msg.get('content', '')
+                break
+        
+        # Simple prompt that works with DialoGPT
+        return f"User: {last_user_message}\nAssistant:"
     
     def generate_greeting(self) -> str:
         """Generate initial greeting message - using simple fallback to avoid API issues"""
         return "👋 Hello! I'm TalentScout Hiring Assistant. I'm here to conduct your initial screening and technical assessment. Let's start by getting to know you better. What's your full name?"
     
+    @_in_session
     def process_user_input(self, user_input: str) -> str:
         """
         Process user input based on current conversation state
@@ -154,138 +389,209 @@ class HiringAssistantChatbot:
         Returns:
             str: Bot response
         """
-        if is_conversation_ending(user_input):
-            return self.handle_conversation_end()
-        
-        state = st.session_state.conversation_state
-        
-        if state == ConversationState.GREETING:
-            return self.start_information_collection()
-        
-        elif state == ConversationState.COLLECTING_NAME:
-            return self.collect_name(user_input)
-        
-        elif state == ConversationState.COLLECTING_EMAIL:
-            return self.collect_email(user_input)
+        state = self.state.conversation_state
+        flow = self.flow
         
-        elif state == ConversationState.COLLECTING_PHONE:
-            return self.collect_phone(user_input)
+        # A message holding several profile fields (or a pasted resume) fills
+        # them all at once; it is never a goodbye, whatever words it contains
+        if state in flow.profile_states:
+            fields = self._new_profile_fields(state, user_input)
+            if fields:
+                return self.collect_profile_fields(fields)
         
-        elif state == ConversationState.COLLECTING_EXPERIENCE:
-            return self.collect_experience(user_input)
-        
-        elif state == ConversationState.COLLECTING_POSITION:
-            return self.collect_position(user_input)
-        
-        elif state == ConversationState.COLLECTING_LOCATION:
-            return self.collect_location(user_input)
-        
-        elif state == ConversationState.COLLECTING_TECH_STACK:
-            return self.collect_tech_stack(user_input)
+        if is_conversation_ending(user_input):
+            return self.handle_conversation_end()
         
-        elif state == ConversationState.ASKING_QUESTIONS:
-            return self.handle_technical_question_response(user_input)
+        # Common off-script messages get an instant local answer
+        if state in flow.scripted_states:
+            started = time.perf_counter()
+            reply = self._rule_reply(state, user_input)
+            if reply is not None:
+                get_response_engine().record(TIER_RULES, time.perf_counter() - started)
+                return reply
         
-        else:
+        # Each step names the method that handles its input
+        step = flow.steps.get(state)
+        if step is None:
             return self.generate_fallback_response(user_input)
+        reply = getattr(self, step.handler)(user_input)
+        return self._skip_collected_fields(reply) if step.field else reply
     
-    def start_information_collection(self) -> str:
+    @_in_session
+    def start_information_collection(self, user_input: str = "") -> str:
         """Start collecting candidate information"""
-        st.session_state.conversation_state = ConversationState.COLLECTING_NAME
-        return "Great! Let's get started with the initial screening. First, could you please tell me your full name?"
+        return self._advance("Great! Let's get started with the initial screening. ")
+    
+    def _advance(self, acknowledgement: str) -> str:
+        """
+        Move on to the step after the current one and ask for it
+        
+        The flow is chosen again first, since the answer just recorded (the
+        position) may put the candidate on a role flow.
+        """
+        self.state.flow = select_flow(self.state.candidate_data)
+        flow = self.flow
+        next_state = flow.next_states.get(self.state.conversation_state)
+        if next_state is None:
+            # Not a state of this flow
+            return self._resume_collection(acknowledgement)
+        self.state.conversation_state = next_state
+        return acknowledgement + flow.steps[next_state].question
+    
+    def _new_profile_fields(self, state: str, user_input: str) -> Dict:
+        """
+        Fields of the message not collected yet, when there is more in it than
+        the answer to the current step (which that step handles as usual)
+        """
+        current_field = self.flow.state_fields.get(state)
+        fields = {
+            field: value for field, value in extract_profile(user_input, current_field).items()
+            if field not in self.state.candidate_data
+        }
+        if not fields or set(fields) <= {current_field, "tech_stack_parsed"}:
+            return {}
+        return fields
+    
+    @_in_session
+    def collect_profile_fields(self, fields: Dict) -> str:
+        """Record fields extracted from one message and move on to the first one still missing"""
+        self.state.candidate_data.update(fields)
+        recorded = "\n".join(
+            f"• **{FIELD_LABELS[field]}:** {fields[field]}" + (" years" if field == "experience" else "")
+            for field, _ in PROFILE_FIELDS if field in fields
+        )
+        return self._resume_collection(f"Thanks! I've recorded these details from your message:\n\n{recorded}\n\n")
+    
+    def _skip_collected_fields(self, reply: str) -> str:
+        """After a step, skip past the steps whose fields an earlier message already filled"""
+        field = self.flow.state_fields.get(self.state.conversation_state)
+        if field is None or field not in self.state.candidate_data:
+            return reply
+        return self._resume_collection("Thank you! ")
+    
+    def _resume_collection(self, preamble: str) -> str:
+        """Ask for the first missing profile field, or start the technical questions once none is"""
+        candidate_data = self.state.candidate_data
+        self.state.flow = select_flow(candidate_data)
+        step = self.flow.first_missing(candidate_data)
+        if step is not None:
+            self.state.conversation_state = step.state
+            return preamble + step.question
+        
+        self.state.conversation_state = ConversationState.COLLECTING_TECH_STACK
+        return preamble + self.collect_tech_stack(candidate_data['tech_stack'])
     
+    @_in_session
     def collect_name(self, user_input: str) -> str:
         """Collect candidate's full name"""
         name = extract_name_from_input(user_input)
         if len(name.split()) >= 2:  # Expect at least first and last name
-            st.session_state.candidate_data['name'] = name
-            st.session_state.conversation_state = ConversationState.COLLECTING_EMAIL
-            return f"Nice to meet you, {name}! Now, could you please provide your email address?"
+            self.state.candidate_data['name'] = name
+            return self._advance(f"Nice to meet you, {name}! ")
         else:
             return "I'd like to get your full name (first and last name). Could you please provide that?"
     
+    @_in_session
     def collect_email(self, user_input: str) -> str:
         """Collect and validate candidate's email"""
         is_valid, error_message = validate_email(user_input)
         if is_valid:
-            st.session_state.candidate_data['email'] = user_input.strip()
-            st.session_state.conversation_state = ConversationState.COLLECTING_PHONE
-            return "Perfect! Now I need your phone number for our records. Please provide a 10-digit phone number."
+            self.state.candidate_data['email'] = user_input.strip()
+            return self._advance("Perfect! ")
         else:
             return f"I need a valid email address. {error_message}"
     
+    @_in_session
     def collect_phone(self, user_input: str) -> str:
         """Collect and validate candidate's phone number - EXACTLY 10 DIGITS"""
         is_valid, error_message = validate_phone(user_input)
         if is_valid:
             # Format the phone number nicely
-            digits_only = re.sub(r'\D', '', user_input)
-            formatted_phone = f"({digits_only[:3]}) {digits_only[3:6]}-{digits_only[6:]}"
-            st.session_state.candidate_data['phone'] = formatted_phone
-            st.session_state.conversation_state = ConversationState.COLLECTING_EXPERIENCE
-            return "Thank you! How many years of professional experience do you have in technology/software development?"
+            self.state.candidate_data['phone'] = format_phone_number(user_input)
+            return self._advance("Thank you! ")
         else:
             return f"❌ {error_message} Please provide a valid 10-digit phone number (e.g., 123-456-7890 or (123) 456-7890)."
     
+    @_in_session
     def collect_experience(self, user_input: str) -> str:
         """Collect and validate years of experience"""
         is_valid, error_message, years = validate_experience(user_input)
         if is_valid:
-            st.session_state.candidate_data['experience'] = years
-            st.session_state.conversation_state = ConversationState.COLLECTING_POSITION
-            return "Excellent! What position or role are you interested in applying for? (You can mention multiple if applicable)"
+            self.state.candidate_data['experience'] = years
+            return self._advance("Excellent! ")
         else:
             return f"{error_message}"
     
+    @_in_session
     def collect_position(self, user_input: str) -> str:
         """Collect desired position(s)"""
         if user_input.strip():
-            st.session_state.candidate_data['position'] = user_input.strip()
-            st.session_state.conversation_state = ConversationState.COLLECTING_LOCATION
-            return "Great choice! What's your current location or preferred work location? (Please provide city, state, or country)"
+            self.state.candidate_data['position'] = user_input.strip()
+            return self._advance("Great choice! ")
         else:
             return "Please let me know what position or role you're interested in."
     
+    @_in_session
     def collect_location(self, user_input: str) -> str:
         """Collect current/preferred location with validation"""
         is_valid, error_message = validate_location(user_input)
         if is_valid:
-            st.session_state.candidate_data['location'] = user_input.strip()
-            st.session_state.conversation_state = ConversationState.COLLECTING_TECH_STACK
-            return """Perfect! Now, let's talk about your skills.
-
-**Please provide your tech stack including:**
-- At least **4 technical skills** (programming languages, frameworks, tools, databases)
-- At least **2 soft skills** (communication, teamwork, problem-solving, etc.)
-
-**Examples:**
-- **Technical:** Python, JavaScript, React, Node.js, MongoDB, Docker, AWS
-- **Soft Skills:** Communication, Teamwork, Problem Solving
-
-You can separate them with commas."""
+            self.state.candidate_data['location'] = user_input.strip()
+            return self._advance("Perfect! ")
         else:
             return f"❌ {error_message} Please provide a valid location (city, state, or country)."
     
+    @_in_session
+    def collect_field(self, user_input: str) -> str:
+        """Collect the answer to a flow step that has no dedicated collector"""
+        step = self.flow.steps[self.state.conversation_state]
+        answer = user_input.strip()
+        if step.optional and SKIP_PATTERN.match(answer):
+            # Recorded as skipped, so the step is not asked again
+            self.state.candidate_data[step.field] = None
+            return self._advance("No problem. ")
+        if not answer:
+            return step.question
+        self.state.candidate_data[step.field] = answer
+        return self._advance("Thank you! ")
+    
+    @_in_session
     def collect_tech_stack(self, user_input: str) -> str:
         """Collect and validate tech stack with minimum requirements"""
         is_valid, error_message, categorized_tech = validate_tech_stack(user_input)
         if is_valid:
-            st.session_state.candidate_data['tech_stack'] = user_input.strip()
-            st.session_state.candidate_data['tech_stack_parsed'] = categorized_tech
+            self.state.candidate_data['tech_stack'] = user_input.strip()
+            self.state.candidate_data['tech_stack_parsed'] = categorized_tech
             
             # Show summary of what was collected
             tech_summary = "Great! I've recorded your skills:\n\n"
             
-            # Technical skills summary
-            technical_count = 0
-            for category, skills in categorized_tech.items():
-                if category != 'soft_skills' and skills:
-                    technical_count += len(skills)
+            # Counts and flattened lists come from the cached parse used by validation
+            profile = parse_skills(user_input)
+            self.state.stats.technical_skills = profile.technical_count
+            self.state.stats.soft_skills = profile.soft_count
             
-            soft_skills = categorized_tech.get('soft_skills', [])
+            tech_summary += f"✅ **Technical Skills ({profile.technical_count}):** {', '.join(profile.technical_skills)}\n\n"
+            tech_summary += f"✅ **Soft Skills ({profile.soft_count}):** {', '.join(profile.soft_skills)}\n\n"
             
-            tech_summary += f"✅ **Technical Skills ({technical_count}):** {', '.join([skill for category in categorized_tech if category != 'soft_skills' for skill in categorized_tech[category]])}\n\n"
-            tech_summary += f"✅ **Soft Skills ({len(soft_skills)}):** {', '.join(soft_skills)}\n\n"
+            cached_questions = self._cached_technical_questions(
+                self.state.candidate_data['tech_stack'],
+                self.state.candidate_data.get('experience', 0)
+            )
+            if cached_questions:
+                return tech_summary + self._start_technical_questions(cached_questions)
+            
+            if self.use_llm:
+                # Generate questions on the shared executor; the app polls for them
+                _add_pending_questions(self.session_id, get_llm_executor().submit(
+                    self._request_technical_questions,
+                    self.state.candidate_data['tech_stack'],
+                    self.state.candidate_data.get('experience', 0),
+                    time.monotonic() + LLM_TURN_BUDGET
+                ))
+                self.state.questions_requested_at = time.time()
+                self.state.conversation_state = ConversationState.GENERATING_QUESTIONS
+                return tech_summary + "⏳ I'm preparing technical questions tailored to your skills..."
             
             # Generate technical questions
             questions_response = self.generate_technical_questions()
@@ -300,138 +606,198 @@ You can separate them with commas."""
 **Format:** Separate with commas
 **Example:** Python, JavaScript, React, AWS, Communication, Teamwork"""
     
+    @_in_session
     def generate_technical_questions(self) -> str:
         """Generate technical questions based on tech stack"""
+        tech_stack = self.state.candidate_data.get('tech_stack', '')
+        experience = self.state.candidate_data.get('experience', 0)
+        
+        # Latency budget for this turn; once spent, predefined questions are used
+        deadline = time.monotonic() + LLM_TURN_BUDGET
+        
+        questions = self._cached_technical_questions(tech_stack, experience)
+        if not questions and self.use_llm:
+            questions = self._request_technical_questions(tech_stack, experience, deadline)
+        return self._start_technical_questions(questions)
+    
+    def _cached_technical_questions(self, tech_stack: str, experience: int,
+                                    record_usage: bool = True) -> Optional[List[str]]:
+        """
+        Questions previously generated for the same skill profile, if any
+        
+        record_usage=False for repeated lookups of the same session, so that a
+        session counts as one lookup in the cache's hit rate.
+        """
+        if not self.use_llm:
+            return None
+        key = question_cache_key(tech_stack, get_experience_level(experience), self.api_url)
+        return get_question_cache().get(key, record_usage=record_usage)
+    
+    @_in_session
+    def poll_technical_questions(self) -> Optional[str]:
+        """
+        Check on background question generation
+        
+        Returns:
+            Optional[str]: The first question message once generation has finished
+            (falling back to predefined questions), or None while it is still running
+        """
+        future = _pending_questions.get(self.session_id)
+        if future is not None and not future.done():
+            return None
+        
+        if future is None:
+            # Started by another process: the result lands in the shared question
+            # cache. The session's lookup was counted when generation started.
+            questions = self._cached_technical_questions(
+                self.state.candidate_data.get('tech_stack', ''),
+                self.state.candidate_data.get('experience', 0),
+                record_usage=False
+            )
+            requested_at = self.state.questions_requested_at
+            if not questions and requested_at is not None and time.time() - requested_at < LLM_TURN_BUDGET:
+                return None
+        else:
+            try:
+                questions = future.result()
+            except Exception:
+                questions = []
+        
+        _pop_pending_questions(self.session_id)
+        self.state.questions_requested_at = None
+        return self._start_technical_questions(questions or [])
+    
+    @_in_session
+    def await_technical_questions(self, user_input: str = "") -> str:
+        """Reply to a message sent while questions are being generated"""
+        return self.poll_technical_questions() or "⏳ Your technical questions are still being prepared. They'll appear in a moment."
+    
+    @_in_session
+    def deliver_technical_questions(self) -> Optional[str]:
+        """Poll question generation and, once it has finished, add the first question to the chat"""
+        questions_message = self.poll_technical_questions()
+        if questions_message is not None:
+            self.add_to_chat_history("assistant", questions_message)
+        return questions_message
+    
+    def pregenerate_technical_questions(self, tech_stack: str, experience: int) -> List[str]:
+        """Generate and cache questions for a profile ahead of time (used by the warming job)"""
+        if not self.use_llm:
+            return []
+        questions = self._request_technical_questions(tech_stack, experience, time.monotonic() + LLM_REQUEST_TIMEOUT)
+        if questions:
+            key = question_cache_key(tech_stack, get_experience_level(experience), self.api_url)
+            get_question_cache().put(key, questions, precomputed=True)
+        return questions
+    
+    def _request_technical_questions(self, tech_stack: str, experience: int, deadline: float) -> List[str]:
+        """
+        Ask the LLM for technical questions
+        
+        Touches no session state, so it is safe to run on a background thread.
+        Returns an empty list when the LLM fails or the deadline is spent.
+        """
         try:
-            tech_stack = st.session_state.candidate_data.get('tech_stack', '')
-            experience = st.session_state.candidate_data.get('experience', 0)
-            
             # Simpler prompt that works better with open-source models
-            experience_level = "beginner" if experience < 3 else "intermediate" if experience < 6 else "senior"
+            experience_level = get_experience_level(experience)
             
-            if self.use_llm:
-                messages = [
-                    {"role": "system", "content": "You are a technical interviewer. Generate 3-5 relevant technical questions based on the candidate's tech stack and experience level. List each question on a new line starting with 'Q:'."},
-                    {"role": "user", "content": f"Generate technical questions for a {experience_level} level candidate with {experience} years of experience.\nTech stack: {tech_stack}\n\nProvide 3-5 questions, each on a new line starting with 'Q:'."}
-                ]
-                
-                response = self.get_llm_response(messages, use_json=False)
-                
-                # Parse questions from response
-                questions = []
-                for line in response.split('\n'):
-                    line = line.strip()
-                    # Look for lines starting with Q: or numbered questions
-                    if line.startswith('Q:') or line.startswith('Question'):
-                        # Remove Q: or Question prefix
-                        question = line.replace('Q:', '').replace('Question', '').strip()
-                        question = question.lstrip('0123456789.:) ').strip()
-                        if question and len(question) > 10:
-                            questions.append(question)
-                
-                # If parsing failed, try to extract any question-like sentences
-                if not questions:
-                    potential_questions = re.findall(r'[^.!?]*\?', response)
-                    questions = [q.strip() for q in potential_questions if len(q.strip()) > 20][:5]
-            else:
-                questions = []
+            messages = [
+                {"role": "system", "content": "You are a technical interviewer. Generate 3-5 relevant technical questions based on the candidate's tech stack and experience level. List each question on a new line starting with 'Q:'."},
+                {"role": "user", "content": f"Generate technical questions for a {experience_level} level candidate with {experience} years of experience.\nTech stack: {tech_stack}\n\nProvide 3-5 questions, each on a new line starting with 'Q:'."}
+            ]
+            
+            response = self.get_llm_response(messages, use_json=False, deadline=deadline,
+                                             priority=Priority.QUESTIONS, call_type=CALL_QUESTIONS)
             
-            # Use fallback to predefined questions if LLM fails or not available
+            # Parse questions from response
+            questions = []
+            for line in response.split('\n'):
+                line = line.strip()
+                # Look for lines starting with Q: or numbered questions
+                if line.startswith('Q:') or line.startswith('Question'):
+                    # Remove Q: or Question prefix
+                    question = line.replace('Q:', '').replace('Question', '').strip()
+                    question = question.lstrip('0123456789.:) ').strip()
+                    if question and len(question) > 10:
+                        questions.append(question)
+            
+            # If parsing failed, try to extract any question-like sentences
             if not questions:
-                questions = self._get_fallback_questions(tech_stack, experience)
+                potential_questions = re.findall(r'[^.!?]*\?', response)
+                questions = [q.strip() for q in potential_questions if len(q.strip()) > 20][:5]
             
             if questions:
-                st.session_state.technical_questions = questions
-                st.session_state.current_question_index = 0
-                st.session_state.conversation_state = ConversationState.ASKING_QUESTIONS
-                
-                return f"Now, I have {len(questions)} technical questions to help assess your skills. Let's start with the first one:\n\n**Question 1:** {questions[0]}"
-            else:
-                return "I've gathered all your information! However, I'm having trouble generating technical questions at the moment. Our team will review your profile and get back to you soon."
-                
-        except Exception as e:
-            st.error(f"Error generating questions: {str(e)}")
-            # Use fallback questions
+                get_question_cache().put(question_cache_key(tech_stack, experience_level, self.api_url), questions)
+            return questions
+        except Exception:
+            return []
+    
+    def _start_technical_questions(self, questions: List[str]) -> str:
+        """Store the questions (or predefined ones) and ask the first"""
+        # Use fallback to predefined questions if LLM fails or not available
+        if not questions:
             questions = self._get_fallback_questions(
-                st.session_state.candidate_data.get('tech_stack', ''),
-                st.session_state.candidate_data.get('experience', 0)
+                self.state.candidate_data.get('tech_stack', ''),
+                self.state.candidate_data.get('experience', 0)
             )
-            if questions:
-                st.session_state.technical_questions = questions
-                st.session_state.current_question_index = 0
-                st.session_state.conversation_state = ConversationState.ASKING_QUESTIONS
-                return f"Now, I have {len(questions)} technical questions to help assess your skills. Let's start with the first one:\n\n**Question 1:** {questions[0]}"
-            return "I've gathered all your information! Our technical team will review your profile and prepare appropriate questions for the next round."
+        
+        if questions:
+            self.state.technical_questions = questions
+            self.state.current_question_index = 0
+            self.state.conversation_state = ConversationState.ASKING_QUESTIONS
+            
+            return f"Now, I have {len(questions)} technical questions to help assess your skills. Let's start with the first one:\n\n**Question 1:** {questions[0]}"
+        else:
+            return "I've gathered all your information! However, I'm having trouble generating technical questions at the moment. Our team will review your profile and get back to you soon."
     
     def _get_fallback_questions(self, tech_stack: str, experience: int) -> List[str]:
-        """Generate fallback questions when LLM fails"""
-        tech_lower = tech_stack.lower()
-        questions = []
-        
-        # Generic questions that apply to most tech stacks
-        if experience < 3:
-            questions.append("Can you explain the difference between a variable and a constant in programming?")
-            questions.append("What is version control and why is it important in software development?")
-        elif experience < 6:
-            questions.append("Can you describe your approach to debugging complex issues in production?")
-            questions.append("How do you ensure code quality and maintainability in your projects?")
-        else:
-            questions.append("How do you approach system design for scalable applications?")
-            questions.append("Can you discuss a challenging technical problem you solved and your approach?")
-        
-        # Tech-specific questions
-        if 'python' in tech_lower:
-            questions.append("What are Python decorators and how have you used them in your projects?")
-        if 'javascript' in tech_lower or 'react' in tech_lower or 'node' in tech_lower:
-            questions.append("Can you explain the concept of asynchronous programming in JavaScript?")
-        if 'django' in tech_lower or 'flask' in tech_lower:
-            questions.append("How do you handle database migrations in Django/Flask applications?")
-        if 'sql' in tech_lower or 'database' in tech_lower or 'postgresql' in tech_lower or 'mysql' in tech_lower:
-            questions.append("How would you optimize a slow database query?")
-        if 'docker' in tech_lower or 'kubernetes' in tech_lower:
-            questions.append("Can you explain the benefits of containerization in your development workflow?")
-        
-        # Return up to 5 questions
-        return questions[:5] if len(questions) <= 5 else questions[:5]
+        """Select questions from the offline question bank when the LLM fails"""
+        return get_question_bank().select(
+            parse_skills(tech_stack).technical_skills,
+            get_experience_level(experience)
+        )
     
+    @_in_session
     def handle_technical_question_response(self, user_input: str) -> str:
         """Handle responses to technical questions"""
-        current_index = st.session_state.current_question_index
-        questions = st.session_state.technical_questions
+        current_index = self.state.current_question_index
+        questions = self.state.technical_questions
         
         # Store the answer
-        if 'technical_answers' not in st.session_state.candidate_data:
-            st.session_state.candidate_data['technical_answers'] = []
+        if 'technical_answers' not in self.state.candidate_data:
+            self.state.candidate_data['technical_answers'] = []
         
-        st.session_state.candidate_data['technical_answers'].append({
+        self.state.candidate_data['technical_answers'].append({
             'question': questions[current_index],
             'answer': user_input
         })
         
         # Move to next question or complete
-        st.session_state.current_question_index += 1
+        self.state.current_question_index += 1
+        self.state.stats.questions_answered += 1
         
-        if st.session_state.current_question_index < len(questions):
-            next_question = questions[st.session_state.current_question_index]
-            question_num = st.session_state.current_question_index + 1
+        if self.state.current_question_index < len(questions):
+            next_question = questions[self.state.current_question_index]
+            question_num = self.state.current_question_index + 1
             return f"Thank you for that response! Here's the next question:\n\n**Question {question_num}:** {next_question}"
         else:
-            st.session_state.conversation_state = ConversationState.COMPLETED
+            self.state.conversation_state = ConversationState.COMPLETED
             return self.complete_screening()
     
+    @_in_session(save=False)
     def complete_screening(self) -> str:
         """Complete the screening process"""
-        candidate_name = st.session_state.candidate_data.get('name', 'Candidate')
+        candidate_name = self.state.candidate_data.get('name', 'Candidate')
         return f"""🎉 **Screening Complete!**
 
 Thank you {candidate_name} for completing our initial screening process. 
 
 **Summary of Information Collected:**
 • Personal Details: Name, Contact Information
-• Professional Background: {st.session_state.candidate_data.get('experience', 0)} years experience
-• Position Interest: {st.session_state.candidate_data.get('position', 'N/A')}
-• Location: {st.session_state.candidate_data.get('location', 'N/A')}
-• Technical Assessment: {len(st.session_state.technical_questions)} questions answered
+• Professional Background: {self.state.candidate_data.get('experience', 0)} years experience
+• Position Interest: {self.state.candidate_data.get('position', 'N/A')}
+• Location: {self.state.candidate_data.get('location', 'N/A')}
+• Technical Assessment: {len(self.state.technical_questions)} questions answered
 
 **Next Steps:**
 • Our technical team will review your responses within 2-3 business days
@@ -448,34 +814,138 @@ Is there anything else you'd like to know about our process?"""
 
 We're here whenever you're ready to continue. Have a great day! 👋"""
     
+    @_in_session(save=False)
     def generate_fallback_response(self, user_input: str) -> str:
-        """Generate fallback response for unexpected inputs"""
-        messages = [
+        """
+        Reply to unexpected input: local intent rules first, the LLM only when
+        no rule is confident, and a static reminder when the LLM is unavailable
+        """
+        engine = get_response_engine()
+        state = self.state.conversation_state
+        started = time.perf_counter()
+        
+        reply = self._rule_reply(state, user_input)
+        if reply is not None:
+            engine.record(TIER_RULES, time.perf_counter() - started, escalation_avoided=True)
+            return reply
+        
+        reply = self._generate_text(self._fallback_messages(user_input), priority=Priority.LOW)
+        if reply:
+            engine.record(TIER_LLM, time.perf_counter() - started)
+            return reply
+        
+        engine.record(TIER_STATIC, time.perf_counter() - started)
+        return engine.static_response(state, self._state_prompt(state))
+    
+    @_in_session(save=False)
+    def stream_fallback_response(self, user_input: str) -> Iterator[str]:
+        """Stream the LLM reply to unexpected input (tiers as in generate_fallback_response)"""
+        engine = get_response_engine()
+        state = self.state.conversation_state
+        started = time.perf_counter()
+        
+        streamed = False
+        for chunk in self._stream_text(self._fallback_messages(user_input), priority=Priority.LOW):
+            if not streamed:
+                # Latency of a streamed reply is its time to first token
+                engine.record(TIER_LLM, time.perf_counter() - started)
+                streamed = True
+            yield chunk
+        
+        if not streamed:
+            engine.record(TIER_STATIC, time.perf_counter() - started)
+            yield engine.static_response(state, self._state_prompt(state))
+    
+    def _rule_reply(self, state: str, user_input: str) -> Optional[str]:
+        """
+        Tier 1 reply from the local intent rules, or None
+        
+        Never fires on input the current step would accept as its answer: in
+        steps with a validator, input it accepts; in free-text steps (name,
+        position, location, custom fields) and technical answers, anything
+        that is not clearly a question.
+        """
+        validator = self.flow.validators.get(state)
+        if validator is not None:
+            if validator(user_input)[0]:
+                return None
+        elif self._takes_free_text(state) and not is_question(user_input):
+            return None
+        intent_state = self.flow.intent_states.get(state, state)
+        return get_response_engine().respond(intent_state, user_input, self._state_prompt(state))
+    
+    def _takes_free_text(self, state: str) -> bool:
+        """Whether any text is a valid answer in this state"""
+        if state == ConversationState.ASKING_QUESTIONS:
+            return True
+        step = self.flow.steps.get(state)
+        return step is not None and step.field is not None and step.validator is None
+    
+    def _state_prompt(self, state: str) -> Optional[str]:
+        """The current technical question while asking them; the flow step's prompt otherwise"""
+        if state == ConversationState.ASKING_QUESTIONS:
+            questions = self.state.technical_questions
+            index = self.state.current_question_index
+            if index < len(questions):
+                return f"Here's the question again:\n\n**Question {index + 1}:** {questions[index]}"
+        return self.flow.prompts.get(state)
+    
+    def _fallback_messages(self, user_input: str) -> List[Dict]:
+        return [
             {"role": "system", "content": SYSTEM_PROMPTS["fallback"]},
             {"role": "user", "content": f"User input: {user_input}"}
         ]
-        
-        return self.get_llm_response(messages)
     
+    @_in_session(save=False)
+    def calls_llm(self, user_input: str) -> bool:
+        """Whether replying to this input waits on the LLM (scripted steps never do)"""
+        return (
+            self.use_llm
+            and not is_conversation_ending(user_input)
+            and self.state.conversation_state not in self.flow.scripted_states
+            and self._rule_reply(self.state.conversation_state, user_input) is None
+        )
+    
+    @_in_session(save=False)
+    def waits_on_io(self, user_input: str) -> bool:
+        """
+        Whether replying to this input may block: on the LLM, or on the shared
+        question cache, which the turn that completes the tech stack reads
+        """
+        if self.calls_llm(user_input):
+            return True
+        if not self.use_llm:
+            return False
+        state = self.state.conversation_state
+        if state in (ConversationState.COLLECTING_TECH_STACK, ConversationState.GENERATING_QUESTIONS):
+            return True
+        # A message may fill in the tech stack along with the current step's answer
+        return state in self.flow.profile_states and (
+            'tech_stack' in self.state.candidate_data
+            or 'tech_stack' in self._new_profile_fields(state, user_input)
+        )
+    
+    def will_stream(self, user_input: str) -> bool:
+        """Whether the reply to this input comes from the LLM and can be streamed"""
+        return LLM_STREAM_RESPONSES and self.calls_llm(user_input)
+    
+    @_in_session
+    def respond(self, user_input: str) -> str:
+        """Add a candidate message and the reply to it to the chat history; returns the reply"""
+        self.add_to_chat_history("user", user_input)
+        reply = self.process_user_input(user_input)
+        self.add_to_chat_history("assistant", reply)
+        return reply
+    
+    @_in_session
+    def stream_user_input(self, user_input: str) -> Iterator[str]:
+        """Like process_user_input, but yields LLM replies as they are generated"""
+        if self.will_stream(user_input):
+            yield from self.stream_fallback_response(user_input)
+        else:
+            yield self.process_user_input(user_input)
+    
+    @_in_session(save=False)
     def get_conversation_progress(self) -> Tuple[int, int]:
-        """Get conversation progress for display"""
-        state_order = [
-            ConversationState.GREETING,
-            ConversationState.COLLECTING_NAME,
-            ConversationState.COLLECTING_EMAIL,
-            ConversationState.COLLECTING_PHONE,
-            ConversationState.COLLECTING_EXPERIENCE,
-            ConversationState.COLLECTING_POSITION,
-            ConversationState.COLLECTING_LOCATION,
-            ConversationState.COLLECTING_TECH_STACK,
-            ConversationState.ASKING_QUESTIONS,
-            ConversationState.COMPLETED
-        ]
-        
-        current_state = st.session_state.conversation_state
-        try:
-            current_step = state_order.index(current_state) + 1
-        except ValueError:
-            current_step = 1
-        
-        return current_step, len(state_order)
+        """Get conversation progress for display: the current step and the number of steps"""
+        return self.flow.progress(self.state.conversation_state)
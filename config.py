@@ -2,10 +2,126 @@
 Configuration settings for TalentScout Hiring Assistant
 """
 
+import os
+
 # Application Settings
 APP_TITLE = "TalentScout Hiring Assistant"
 APP_DESCRIPTION = "AI-powered recruitment chatbot for initial candidate screening"
 
+# The chat shows the last CHAT_WINDOW_SIZE messages; earlier ones are loaded
+# on request, the same number at a time
+CHAT_WINDOW_SIZE = 20
+
+# Hugging Face Inference API
+LLM_API_URL = os.getenv(
+    "LLM_API_URL", "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
+)
+LLM_REQUEST_TIMEOUT = 30  # seconds
+
+# Endpoints to route between (comma separated LLM_API_URLS, defaulting to
+# LLM_API_URL). Each call goes to the healthy endpoint with the lowest median
+# latency over the last LLM_LATENCY_WINDOW calls of its type; with hedging on,
+# a call still unanswered after that endpoint's p95 latency is also sent to
+# the next best endpoint. Every LLM_ROUTER_EXPLORE_EVERY-th call re-measures the
+# least recently used endpoint.
+LLM_ENDPOINTS = [url.strip() for url in os.getenv("LLM_API_URLS", LLM_API_URL).split(",") if url.strip()]
+LLM_LATENCY_WINDOW = 50
+LLM_ROUTER_EXPLORE_EVERY = 20
+LLM_HEDGE_REQUESTS = True
+LLM_HEDGE_PERCENTILE = 0.95
+LLM_HEDGE_MIN_SAMPLES = 10
+
+# LLM backend: "api" for the Hugging Face Inference API, or "local" for a small
+# text-generation model run on CPU in every worker process (needs transformers
+# and torch). Local prompts are batched like API ones, on a bounded worker pool.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "api")
+LOCAL_MODEL_NAME = os.getenv("LOCAL_MODEL_NAME", "Qwen/Qwen2.5-0.5B-Instruct")
+LOCAL_MODEL_WORKERS = 2
+LOCAL_BATCH_MAX_SIZE = 8
+LOCAL_BATCH_MAX_WAIT = 0.02  # seconds
+
+# Shared HTTP connection pool and retry policy for inference calls
+LLM_POOL_CONNECTIONS = 4
+LLM_POOL_MAXSIZE = 32
+LLM_MAX_RETRIES = 2
+LLM_RETRY_BACKOFF = 0.5  # seconds, doubled on each retry
+LLM_RETRY_STATUSES = [429, 503]
+
+# Cold starts: the Inference API answers 503 with an `estimated_time` while the
+# model loads. Wait for it up to this many seconds per call (within the turn
+# budget), and ping idle models in the background to keep them loaded.
+LLM_MODEL_LOADING_WAIT = 20.0  # seconds
+LLM_KEEP_WARM_INTERVAL = 300.0  # seconds of idleness before a keep-warm ping; 0 disables
+
+# Per-turn latency budget for LLM work; past it the turn uses fallback content
+LLM_TURN_BUDGET = 8.0  # seconds
+
+# Background threads shared by all sessions for LLM work, and how often the UI
+# polls for results that are still pending
+LLM_EXECUTOR_WORKERS = 8
+LLM_POLL_INTERVAL = 0.5  # seconds
+
+# Upstream rate limit shared by every worker process using the API key: a token
+# bucket of LLM_RATE_LIMIT requests/second with bursts of LLM_RATE_BURST (0
+# disables), kept in the SQLite file at LLM_RATE_LIMIT_PATH when set. Each
+# priority level below the top must leave this many more tokens in the bucket.
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "5"))
+LLM_RATE_BURST = 10
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", "")
+LLM_RATE_PRIORITY_RESERVE = 1.0  # tokens
+
+# Micro-batching: prompts arriving within LLM_BATCH_MAX_WAIT of each other are
+# sent as one batched request of up to LLM_BATCH_MAX_SIZE inputs, on a pool of
+# LLM_BATCH_SENDERS threads (ready batches wait for a sender in priority order)
+LLM_BATCH_MAX_SIZE = 8
+LLM_BATCH_MAX_WAIT = 0.02  # seconds
+LLM_BATCH_SENDERS = 8
+
+# Stream free-form LLM replies into the chat token by token
+LLM_STREAM_RESPONSES = True
+
+# Circuit breaker shared by all sessions: open after consecutive failures, then
+# let a single probe through once the reset timeout has passed
+LLM_BREAKER_FAILURE_THRESHOLD = 3
+LLM_BREAKER_RESET_TIMEOUT = 30.0  # seconds
+
+# Generated question cache: in-memory LRU entries, time to live, and an optional
+# SQLite file shared by every worker process. Bump the prompt version whenever
+# the question prompt changes so stale sets are not served.
+QUESTION_CACHE_SIZE = 2048
+QUESTION_CACHE_TTL = 7 * 24 * 3600  # seconds
+QUESTION_CACHE_PATH = os.getenv("QUESTION_CACHE_PATH", "")
+QUESTION_PROMPT_VERSION = "1"
+# Lookup outcomes are tallied in memory and written to the SQLite tier this
+# often (and whenever questions are stored)
+QUESTION_CACHE_USAGE_FLUSH_INTERVAL = 30.0  # seconds
+
+# Offline question bank used when the LLM is unavailable (see question_bank.py);
+# QUESTION_BANK_PATH optionally adds questions from a JSON Lines file
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "")
+FALLBACK_QUESTION_COUNT = 5
+
+# Local intent rules answer off-script messages when at least this confident;
+# confidence is scaled down for messages longer than RESPONSE_RULE_MAX_WORDS
+RESPONSE_RULE_MIN_CONFIDENCE = 0.6
+RESPONSE_RULE_MAX_WORDS = 12
+
+# Where conversation state lives: "streamlit" (the browser session), "memory"
+# (this process) or "sqlite" (the file at SESSION_STORE_PATH, shared by every
+# worker process). SQLite sessions untouched for SESSION_TTL are discarded.
+SESSION_STORE = os.getenv("SESSION_STORE", "streamlit")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.db")
+SESSION_TTL = 24 * 3600  # seconds
+
+# Headless HTTP/JSON API (api_server.py). Turns that wait on the LLM run on a
+# pool of API_LLM_WORKERS threads so they never block the event loop; the
+# prompts are still coalesced into batched upstream calls.
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_LLM_WORKERS = 64
+API_MAX_BODY_BYTES = 64 * 1024
+API_KEEP_ALIVE_TIMEOUT = 30.0  # seconds
+
 # Conversation States
 class ConversationState:
     GREETING = "greeting"
@@ -25,6 +141,11 @@ REQUIRED_FIELDS = [
     "name", "email", "phone", "experience", "position", "location", "tech_stack"
 ]
 
+# Screening flows are data (see conversation_flow.py); CONVERSATION_FLOWS_PATH
+# optionally adds role flows from a JSON file shaped like ROLE_FLOWS, such as
+# conversation_flows.example.json
+CONVERSATION_FLOWS_PATH = os.getenv("CONVERSATION_FLOWS_PATH", "")
+
 # Tech Stack Categories
 TECH_CATEGORIES = {
     "languages": [
@@ -48,6 +169,42 @@ TECH_CATEGORIES = {
     ]
 }
 
+# Common aliases and abbreviations, mapped to their TECH_CATEGORIES term
+SKILL_ALIASES = {
+    "k8s": "kubernetes", "kube": "kubernetes",
+    "reactjs": "react", "react.js": "react",
+    "vuejs": "vue", "vue.js": "vue",
+    "angularjs": "angular", "next.js": "nextjs", "nuxtjs": "nuxt", "nuxt.js": "nuxt",
+    "nodejs": "node", "node.js": "node", "expressjs": "express", "express.js": "express",
+    "postgres": "postgresql", "psql": "postgresql", "mongo": "mongodb",
+    "golang": "go", "js": "javascript", "ts": "typescript", "py": "python",
+    "cpp": "c++", "csharp": "c#", "dotnet": "asp.net", ".net": "asp.net",
+    "ror": "rails", "ruby on rails": "rails", "spring boot": "spring",
+    "amazon web services": "aws", "google cloud": "gcp", "gcloud": "gcp",
+    "elastic": "elasticsearch", "tf": "terraform"
+}
+
+# Fuzzy skill matching: maximum edit distance for a misspelled skill, and the
+# shortest skill name that is matched fuzzily at all
+FUZZY_MATCH_MAX_DISTANCE = 2
+FUZZY_MATCH_MIN_LENGTH = 4
+
+# Compiled external skill taxonomy (see skill_taxonomy.py); opened lazily on first use.
+# Large vocabularies belong here: its terms are exact lookups in the compiled file,
+# whereas every TECH_CATEGORIES term adds O(L^2) substrings to the skill matcher
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH", "")
+
+# Soft Skill Keywords (a skill containing any of these is treated as a soft skill)
+SOFT_SKILL_KEYWORDS = [
+    "communication", "teamwork", "leadership", "problem solving", "critical thinking",
+    "adaptability", "time management", "creativity", "collaboration", "analytical",
+    "interpersonal", "presentation", "negotiation", "mentoring", "training",
+    "documentation", "project management", "agile", "scrum", "kanban"
+]
+
+# Maximum number of distinct tech stack inputs kept in the parse cache
+SKILL_PARSE_CACHE_SIZE = 1024
+
 # System Prompts
 SYSTEM_PROMPTS = {
     "main": """You are the TalentScout Hiring Assistant, a professional AI chatbot that helps screen candidates for technology positions. Your role is to:
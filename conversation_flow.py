@@ -0,0 +1,263 @@
+"""
+Declarative screening flows
+
+The steps of a screening (what each state asks, how its answer is validated,
+which chatbot method handles it, what follows it) are plain data, compiled
+once into a CompiledFlow of lookup tables: dispatching a turn, the next state
+and the progress position are each a single dict lookup.
+
+Role flows extend the default one with extra steps for candidates whose
+position matches, e.g. leadership questions for senior roles. They are loaded
+from a JSON file (CONVERSATION_FLOWS_PATH) with the same shape as ROLE_FLOWS,
+so new flows need no code changes. A candidate switches to a role flow once
+their position is known, and the step total shown to them grows to match.
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Pattern, Tuple
+
+from config import CONVERSATION_FLOWS_PATH, ConversationState
+from response_engine import CUSTOM_FIELD_STATE, STATE_PROMPTS
+from utils import validate_email, validate_experience, validate_phone, validate_tech_stack
+
+DEFAULT_FLOW = "default"
+
+TECH_STACK_PROMPT = """**Please provide your tech stack including:**
+- At least **4 technical skills** (programming languages, frameworks, tools, databases)
+- At least **2 soft skills** (communication, teamwork, problem-solving, etc.)
+
+**Examples:**
+- **Technical:** Python, JavaScript, React, Node.js, MongoDB, Docker, AWS
+- **Soft Skills:** Communication, Teamwork, Problem Solving
+
+You can separate them with commas."""
+
+# Validators flow steps refer to by name. They guard strict formats: input a
+# step's validator accepts is never treated as an off-script message.
+VALIDATORS: Dict[str, Callable] = {
+    "email": validate_email,
+    "phone": validate_phone,
+    "experience": validate_experience,
+    "tech_stack": validate_tech_stack
+}
+
+# Answers that skip an optional step
+SKIP_PATTERN = re.compile(
+    r"^\s*(skip|pass|next|n/?a|none|no comment|prefer not to (say|answer))\s*[.!]*\s*$", re.IGNORECASE
+)
+
+# The screening every candidate goes through, in order
+DEFAULT_STEPS: List[Dict] = [
+    {"state": ConversationState.GREETING, "handler": "start_information_collection",
+     "phase": "Initial Welcome", "status": "Introduction and setup"},
+    {"state": ConversationState.COLLECTING_NAME, "handler": "collect_name", "field": "name",
+     "question": "Could you please tell me your full name?",
+     "phase": "Personal Information", "status": "Collecting candidate name"},
+    {"state": ConversationState.COLLECTING_EMAIL, "handler": "collect_email", "field": "email", "validator": "email",
+     "question": "Now, could you please provide your email address?",
+     "phase": "Contact Details", "status": "Email verification"},
+    {"state": ConversationState.COLLECTING_PHONE, "handler": "collect_phone", "field": "phone", "validator": "phone",
+     "question": "Now I need your phone number for our records. Please provide a 10-digit phone number.",
+     "phase": "Phone Verification", "status": "10-digit number validation"},
+    {"state": ConversationState.COLLECTING_EXPERIENCE, "handler": "collect_experience", "field": "experience",
+     "validator": "experience",
+     "question": "How many years of professional experience do you have in technology/software development?",
+     "phase": "Professional Background", "status": "Years of experience"},
+    {"state": ConversationState.COLLECTING_POSITION, "handler": "collect_position", "field": "position",
+     "question": "What position or role are you interested in applying for? (You can mention multiple if applicable)",
+     "phase": "Career Interests", "status": "Desired positions"},
+    {"state": ConversationState.COLLECTING_LOCATION, "handler": "collect_location", "field": "location",
+     "question": "What's your current location or preferred work location? (Please provide city, state, or country)",
+     "phase": "Location Info", "status": "Work location preferences"},
+    {"state": ConversationState.COLLECTING_TECH_STACK, "handler": "collect_tech_stack", "field": "tech_stack",
+     "validator": "tech_stack", "question": f"Now, let's talk about your skills.\n\n{TECH_STACK_PROMPT}",
+     "phase": "Skills Assessment", "status": "Technical & soft skills"},
+    # Background question generation still counts as the tech stack step
+    {"state": ConversationState.GENERATING_QUESTIONS, "handler": "await_technical_questions",
+     "progress_as": ConversationState.COLLECTING_TECH_STACK,
+     "phase": "Skills Assessment", "status": "Preparing technical questions"},
+    {"state": ConversationState.ASKING_QUESTIONS, "handler": "handle_technical_question_response",
+     "phase": "Technical Evaluation", "status": "Skill-based questions"},
+    {"state": ConversationState.COMPLETED, "handler": "generate_fallback_response", "scripted": False,
+     "phase": "Screening Complete", "status": "Final assessment done"}
+]
+
+# Flows for particular roles: the default steps plus `steps`, inserted before
+# the `insert_before` state, for candidates whose position mentions one of
+# `positions` (whole words). Steps without a handler are collected by
+# collect_field. None are built in, so the default screening is what every
+# candidate gets unless CONVERSATION_FLOWS_PATH adds some; see
+# conversation_flows.example.json for a flow for senior roles.
+ROLE_FLOWS: Dict[str, Dict] = {}
+
+
+@dataclass(frozen=True)
+class FlowStep:
+    """One step of a screening flow"""
+    state: str
+    handler: str                     # chatbot method that takes the candidate's message in this state
+    field: Optional[str] = None      # candidate_data key the step fills
+    prompt: str = ""                 # short reminder of what the step asks, for off-script replies
+    question: str = ""               # what is asked on entering the step
+    validator: Optional[str] = None  # name in VALIDATORS
+    optional: bool = False           # an optional step may be skipped (SKIP_PATTERN)
+    scripted: bool = True            # False when replies come from the LLM
+    progress_as: Optional[str] = None  # counts as this state in progress instead of as a step of its own
+    intents: str = ""                # state whose intent rules answer off-script messages here
+    phase: str = ""
+    status: str = ""
+
+
+def _build_step(definition: Mapping) -> FlowStep:
+    """A FlowStep from its definition, with defaults filled in"""
+    if "state" not in definition:
+        raise ValueError(f"Flow step without a state: {definition!r}")
+    state = definition["state"]
+    unknown = set(definition) - set(FlowStep.__dataclass_fields__)
+    if unknown:
+        raise ValueError(f"Flow step {state!r} has unknown keys {sorted(unknown)}")
+    values = dict(definition)
+    if "handler" not in values:
+        if not values.get("field"):
+            raise ValueError(f"Flow step {state!r} needs a handler or a field")
+        values["handler"] = "collect_field"
+    if values.get("validator") is not None and values["validator"] not in VALIDATORS:
+        raise ValueError(f"Flow step {state!r} has unknown validator {values['validator']!r}")
+    values.setdefault("intents", CUSTOM_FIELD_STATE if values["handler"] == "collect_field" else state)
+    values.setdefault("prompt", STATE_PROMPTS.get(state, ""))
+    values.setdefault("question", values["prompt"])
+    if values.get("field") and not values["question"]:
+        raise ValueError(f"Flow step {state!r} collects {values['field']!r} but asks nothing")
+    return FlowStep(**values)
+
+
+class CompiledFlow:
+    """A flow's steps compiled into lookup tables; every per-turn query is a dict lookup"""
+
+    def __init__(self, name: str, steps: Iterable[FlowStep], positions: Iterable[str] = ()):
+        self.name = name
+        self.step_list: Tuple[FlowStep, ...] = tuple(steps)
+        if not self.step_list:
+            raise ValueError(f"Flow {name!r} has no steps")
+
+        self.steps: Dict[str, FlowStep] = {}
+        for step in self.step_list:
+            if step.state in self.steps:
+                raise ValueError(f"Flow {name!r} has more than one {step.state!r} step")
+            self.steps[step.state] = step
+
+        # Each step is followed by the next one in the list
+        self.next_states: Dict[str, str] = {
+            step.state: following.state for step, following in zip(self.step_list, self.step_list[1:])
+        }
+
+        counted = [step for step in self.step_list if step.progress_as is None]
+        self.total_steps = len(counted)
+        self.positions: Dict[str, int] = {step.state: index + 1 for index, step in enumerate(counted)}
+        for step in self.step_list:
+            if step.progress_as is not None:
+                if step.progress_as not in self.positions:
+                    raise ValueError(f"Flow {name!r}: {step.state!r} counts as unknown step {step.progress_as!r}")
+                self.positions[step.state] = self.positions[step.progress_as]
+        # The counted step that follows each state, for "what's next" displays
+        self.upcoming: Dict[str, FlowStep] = {}
+        for step in self.step_list:
+            position = self.positions[step.state]
+            if position < self.total_steps:
+                self.upcoming[step.state] = counted[position]
+
+        # Profile fields in collection order; a message may fill several of
+        # them at once in any state up to the last one
+        self.profile_steps: Tuple[FlowStep, ...] = tuple(step for step in self.step_list if step.field)
+        self.state_fields: Dict[str, str] = {step.state: step.field for step in self.profile_steps}
+        last_profile = max(
+            (index for index, step in enumerate(self.step_list) if step.field), default=-1
+        )
+        self.profile_states: FrozenSet[str] = frozenset(step.state for step in self.step_list[:last_profile + 1])
+
+        self.scripted_states: FrozenSet[str] = frozenset(step.state for step in self.step_list if step.scripted)
+        self.validators: Dict[str, Callable] = {
+            step.state: VALIDATORS[step.validator] for step in self.step_list if step.validator
+        }
+        self.prompts: Dict[str, str] = {step.state: step.prompt for step in self.step_list if step.prompt}
+        self.intent_states: Dict[str, str] = {step.state: step.intents for step in self.step_list}
+
+        self.position_pattern: Optional[Pattern] = None
+        positions = list(positions)
+        if positions:
+            self.position_pattern = re.compile(
+                r"\b(?:" + "|".join(map(re.escape, positions)) + r")\b", re.IGNORECASE
+            )
+
+    def progress(self, state: str) -> Tuple[int, int]:
+        """Position of a state (1-based) and the number of steps; unknown states count as the first"""
+        return self.positions.get(state, 1), self.total_steps
+
+    def first_missing(self, candidate_data: Dict) -> Optional[FlowStep]:
+        """The first profile step whose field has not been collected (a skipped optional one has)"""
+        for step in self.profile_steps:
+            if step.field not in candidate_data:
+                return step
+        return None
+
+
+def compile_flows(steps: Iterable[Mapping] = DEFAULT_STEPS,
+                  role_flows: Mapping[str, Mapping] = ROLE_FLOWS) -> Dict[str, CompiledFlow]:
+    """
+    Compile the default flow and every role flow
+
+    Raises:
+        ValueError: a step or flow definition is inconsistent
+    """
+    default_steps = [_build_step(definition) for definition in steps]
+    flows = {DEFAULT_FLOW: CompiledFlow(DEFAULT_FLOW, default_steps)}
+    for name, definition in role_flows.items():
+        anchor = definition.get("insert_before")
+        states = [step.state for step in default_steps]
+        if anchor is None:
+            index = len(states)
+        elif anchor in states:
+            index = states.index(anchor)
+        else:
+            raise ValueError(f"Flow {name!r} inserts before unknown state {anchor!r}")
+        extra = [_build_step(step) for step in definition.get("steps", [])]
+        flows[name] = CompiledFlow(name, default_steps[:index] + extra + default_steps[index:],
+                                   definition.get("positions", []))
+    return flows
+
+
+_flows: Optional[Dict[str, CompiledFlow]] = None
+_flows_lock = threading.Lock()
+
+
+def get_flows() -> Dict[str, CompiledFlow]:
+    """Return the process-wide compiled flows: the built-in ones plus CONVERSATION_FLOWS_PATH, if set"""
+    global _flows
+    if _flows is None:
+        with _flows_lock:
+            if _flows is None:
+                role_flows = dict(ROLE_FLOWS)
+                if CONVERSATION_FLOWS_PATH:
+                    with open(CONVERSATION_FLOWS_PATH, encoding="utf-8") as file:
+                        role_flows.update(json.load(file))
+                _flows = compile_flows(DEFAULT_STEPS, role_flows)
+    return _flows
+
+
+def get_flow(name: str = DEFAULT_FLOW) -> CompiledFlow:
+    """A compiled flow by name; the default one for names no longer configured"""
+    flows = get_flows()
+    return flows.get(name) or flows[DEFAULT_FLOW]
+
+
+def select_flow(candidate_data: Dict) -> str:
+    """Name of the flow for a candidate: the first role flow matching their position, else the default"""
+    position = candidate_data.get("position")
+    if position:
+        for name, flow in get_flows().items():
+            if flow.position_pattern is not None and flow.position_pattern.search(position):
+                return name
+    return DEFAULT_FLOW
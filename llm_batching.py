@@ -0,0 +1,229 @@
+"""
+Micro-batching of text-generation requests across sessions
+
+Prompts submitted within a short window by any session in the process are
+sent upstream as one request with a list of `inputs`, and each caller gets
+its own generated text back. A prompt that is already waiting or in flight
+with the same parameters is not sent again; its callers share one result.
+"""
+
+import heapq
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+
+from config import LLM_BATCH_MAX_SIZE, LLM_BATCH_MAX_WAIT, LLM_BATCH_SENDERS, LLM_REQUEST_TIMEOUT
+from llm_client import DeadlineExceededError, LLMClient
+from rate_limiter import Priority
+
+
+class _Batch:
+    """Prompts waiting to be sent together to one URL with the same parameters"""
+
+    def __init__(self, url: str, options: Dict):
+        self.url = url
+        self.options = options
+        self.prompts: List[str] = []
+        self.futures: List[Future] = []
+        self.keys: List[Tuple] = []
+        self.priorities: List[int] = []
+        self.deadline = 0.0
+        self.opened_at = time.monotonic()
+
+    @property
+    def priority(self) -> int:
+        """The highest priority among the batch's prompts"""
+        return min(self.priorities, default=Priority.LOW)
+
+    def add(self, prompt: str, future: Future, key: Tuple, priority: int, deadline: float):
+        self.prompts.append(prompt)
+        self.futures.append(future)
+        self.keys.append(key)
+        self.priorities.append(priority)
+        self.deadline = max(self.deadline, deadline)
+
+    def split(self, size: int) -> "_Batch":
+        """Keep the `size` most urgent prompts (in arrival order otherwise); return the rest as a new batch"""
+        order = sorted(range(len(self.prompts)), key=lambda index: self.priorities[index])
+        entries = [(self.prompts[index], self.futures[index], self.keys[index], self.priorities[index])
+                   for index in order]
+        overflow = _Batch(self.url, self.options)
+        self.prompts, self.futures, self.keys, self.priorities = [], [], [], []
+        for position, (prompt, future, key, priority) in enumerate(entries):
+            (self if position < size else overflow).add(prompt, future, key, priority, self.deadline)
+        return overflow
+
+
+class RequestCoalescer:
+    """
+    Gathers prompts for up to `max_wait` seconds or `max_batch_size` prompts,
+    whichever comes first, and sends each group as a single upstream call.
+
+    Batches are dispatched by one daemon thread and sent on a fixed pool of
+    sender threads, so a slow upstream call does not hold up later batches.
+    A batch takes the highest priority among its prompts; ready batches wait
+    for a free sender in priority order, then in the rate limiter's queue.
+    """
+
+    def __init__(self, client: LLMClient, max_batch_size: int = LLM_BATCH_MAX_SIZE,
+                 max_wait: float = LLM_BATCH_MAX_WAIT, senders: int = LLM_BATCH_SENDERS):
+        self.client = client
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+        self.prompts = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.batched_prompts = 0
+        self.largest_batch = 0
+        self._open: Dict[Tuple, _Batch] = {}
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._condition = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        # Batches waiting for a sender, as (priority, sequence, batch)
+        self._ready: List[Tuple[int, int, _Batch]] = []
+        self._sequence = itertools.count()
+        self._senders = ThreadPoolExecutor(max_workers=max(senders, 1), thread_name_prefix="llm-batch")
+
+    def generate(self, url: str, payload: Dict, deadline: Optional[float] = None,
+                 priority: int = Priority.DEFAULT) -> Optional[str]:
+        """
+        Return the generated text for a single-prompt payload, or None if the
+        endpoint did not answer with one
+
+        Raises:
+            DeadlineExceededError: no result arrived before the deadline
+            CircuitOpenError, RateLimitExceededError, requests.RequestException:
+                the upstream call failed
+        """
+        prompt = payload["inputs"]
+        options = {name: value for name, value in payload.items() if name != "inputs"}
+        group = (url, json.dumps(options, sort_keys=True))
+        key = group + (prompt,)
+        if deadline is None:
+            deadline = time.monotonic() + LLM_REQUEST_TIMEOUT
+
+        with self._condition:
+            self.prompts += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                batch = self._open.get(group)
+                if batch is not None and future in batch.futures:
+                    index = batch.futures.index(future)
+                    batch.priorities[index] = min(batch.priorities[index], priority)
+            else:
+                future = self._in_flight[key] = Future()
+                batch = self._open.get(group)
+                if batch is None:
+                    batch = self._open[group] = _Batch(url, options)
+                batch.add(prompt, future, key, priority, deadline)
+                self._ensure_dispatcher()
+                self._condition.notify()
+
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            raise DeadlineExceededError("LLM latency budget spent waiting for a batched response")
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, name="llm-batcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    ready = [
+                        group for group, batch in self._open.items()
+                        if len(batch.prompts) >= self.max_batch_size or now - batch.opened_at >= self.max_wait
+                    ]
+                    if ready:
+                        break
+                    if self._open:
+                        oldest = min(batch.opened_at for batch in self._open.values())
+                        self._condition.wait(max(oldest + self.max_wait - now, 0))
+                    else:
+                        self._condition.wait()
+                for group in ready:
+                    batch = self._open.pop(group)
+                    # The least urgent prompts past the size limit stay queued for the next batch
+                    if len(batch.prompts) > self.max_batch_size:
+                        self._open[group] = batch.split(self.max_batch_size)
+                    heapq.heappush(self._ready, (batch.priority, next(self._sequence), batch))
+                    self.batches += 1
+                    self.batched_prompts += len(batch.prompts)
+                    self.largest_batch = max(self.largest_batch, len(batch.prompts))
+            for _ in ready:
+                self._senders.submit(self._send_next)
+
+    def _send_next(self):
+        """Send the most urgent ready batch (one is queued per submitted task)"""
+        with self._condition:
+            _, _, batch = heapq.heappop(self._ready)
+        self._send(batch)
+
+    def _send(self, batch: _Batch):
+        try:
+            # A lone prompt goes out as a plain string, which every endpoint accepts
+            inputs = batch.prompts if len(batch.prompts) > 1 else batch.prompts[0]
+            response = self.client.post(batch.url, {"inputs": inputs, **batch.options},
+                                        deadline=batch.deadline, priority=batch.priority)
+            texts = self._generated_texts(response, len(batch.prompts)) if response.status_code == 200 else None
+            for index, future in enumerate(batch.futures):
+                future.set_result(texts[index] if texts else None)
+        except Exception as error:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+        finally:
+            with self._condition:
+                for key in batch.keys:
+                    self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _generated_texts(response, count: int) -> Optional[List[Optional[str]]]:
+        """
+        Split a text-generation response into one text per input. Batched
+        responses hold one list of generations per input; single ones a flat list.
+        """
+        result = response.json()
+        if not isinstance(result, list) or len(result) != count:
+            return None
+        texts = []
+        for item in result:
+            if isinstance(item, list):
+                item = item[0] if item else {}
+            texts.append(item.get('generated_text') if isinstance(item, dict) else None)
+        return texts
+
+    def stats(self) -> Dict:
+        """Batching and deduplication counters"""
+        with self._condition:
+            return {
+                "prompts": self.prompts,
+                "deduplicated": self.deduplicated,
+                "batches": self.batches,
+                "largest_batch": self.largest_batch,
+                "average_batch": round(self.batched_prompts / self.batches, 2) if self.batches else 0.0,
+                "upstream_calls_saved": self.prompts - self.batches
+            }
+
+
+_coalescers: Dict[int, RequestCoalescer] = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_request_coalescer(client: LLMClient) -> RequestCoalescer:
+    """Return the process-wide coalescer for a client, creating it on first use"""
+    coalescer = _coalescers.get(id(client))
+    if coalescer is None:
+        with _coalescers_lock:
+            coalescer = _coalescers.get(id(client))
+            if coalescer is None:
+                coalescer = _coalescers[id(client)] = RequestCoalescer(client)
+    return coalescer
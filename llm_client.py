@@ -0,0 +1,380 @@
+"""
+Shared HTTP client for Hugging Face inference calls
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    LLM_POOL_CONNECTIONS, LLM_POOL_MAXSIZE, LLM_MAX_RETRIES, LLM_RETRY_BACKOFF,
+    LLM_RETRY_STATUSES, LLM_REQUEST_TIMEOUT, LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_BREAKER_RESET_TIMEOUT, LLM_MODEL_LOADING_WAIT, LLM_KEEP_WARM_INTERVAL,
+    LLM_EXECUTOR_WORKERS
+)
+from rate_limiter import Priority, RateLimitExceededError, get_rate_limiter
+
+# Time kept free before a deadline for the request after a model-loading wait
+_LOADING_RETRY_MARGIN = 0.5
+
+_WARMUP_PAYLOAD = {
+    "inputs": "Hello",
+    "parameters": {"max_new_tokens": 1},
+    "options": {"wait_for_model": True}
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint the circuit breaker has given up on"""
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the latency budget is spent before a request can be sent"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: requests flow. After `failure_threshold` consecutive failures it
+    opens and rejects everything for `reset_timeout` seconds, then half-opens
+    and admits a single probe whose outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = LLM_BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while requests are being rejected (does not claim the half-open probe)"""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Give up a claimed request without a verdict on the endpoint's health"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class LLMClient:
+    """
+    Keep-alive session with a tuned connection pool, retry/backoff and a
+    circuit breaker per endpoint URL.
+
+    One instance is shared by every chatbot in the process (see
+    get_llm_client), so TCP/TLS connections to the inference API are reused
+    across turns and sessions, and an outage seen by one session sends every
+    session straight to its fallback path. A "model loading" 503 is waited
+    out using the server's estimate instead of being treated as a failure.
+    """
+
+    def __init__(self, api_key: str):
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        # Retries are handled in post() so they can respect the caller's deadline
+        self._adapter = HTTPAdapter(
+            pool_connections=LLM_POOL_CONNECTIONS,
+            pool_maxsize=LLM_POOL_MAXSIZE,
+            max_retries=0
+        )
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.limiter = get_rate_limiter()
+        self.cold_starts = 0
+        self.cold_start_wait_seconds = 0.0
+        self.warmup_pings = 0
+        self.warmup_failures = 0
+        self._last_request_at = 0.0
+        self._warm_urls = set()
+        self._metrics_lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Circuit breaker of an endpoint, created on first use"""
+        breaker = self._breakers.get(url)
+        if breaker is None:
+            with self._metrics_lock:
+                breaker = self._breakers.setdefault(url, CircuitBreaker())
+        return breaker
+
+    def post(self, url: str, payload: Dict, deadline: Optional[float] = None,
+             priority: int = Priority.DEFAULT) -> requests.Response:
+        """
+        POST a JSON payload over a pooled connection.
+
+        `deadline` is a time.monotonic() value; each attempt's timeout and any
+        retry backoff are cut short so the call never outlives it. Every
+        attempt first waits for the shared rate limiter at `priority`.
+
+        Raises:
+            CircuitOpenError: the endpoint is considered down
+            DeadlineExceededError: no time is left to send the request
+            RateLimitExceededError: the rate limiter had no capacity before the deadline
+        """
+        self._remaining(deadline)
+        # The breaker comes first: an open circuit fails fast, without spending a token
+        breaker = self.breaker(url)
+        if not breaker.allow_request():
+            raise CircuitOpenError("Inference endpoint circuit is open")
+
+        attempt = 0
+        loading_waited = 0.0
+        try:
+            while True:
+                self.limiter.acquire(priority, deadline)
+                self._last_request_at = time.monotonic()
+                response = self.session.post(url, json=payload, timeout=self._remaining(deadline))
+                estimate = self._loading_estimate(response)
+                if estimate is not None:
+                    delay = min(estimate, LLM_MODEL_LOADING_WAIT - loading_waited)
+                    if deadline is not None:
+                        delay = min(delay, deadline - time.monotonic() - _LOADING_RETRY_MARGIN)
+                    if delay <= 0:
+                        break
+                    time.sleep(delay)
+                    loading_waited += delay
+                    continue
+                if response.status_code not in LLM_RETRY_STATUSES or attempt >= LLM_MAX_RETRIES:
+                    break
+                delay = self._retry_delay(response, attempt)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
+                time.sleep(delay)
+                attempt += 1
+        except (DeadlineExceededError, RateLimitExceededError):
+            # The caller's budget ran out, not the endpoint
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        finally:
+            if loading_waited:
+                with self._metrics_lock:
+                    self.cold_starts += 1
+                    self.cold_start_wait_seconds += loading_waited
+
+        # A loading model is reachable, so it does not count against the circuit
+        if self._loading_estimate(response) is None and (
+                response.status_code >= 500 or response.status_code == 429):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def stream(self, url: str, payload: Dict, deadline: Optional[float] = None,
+               priority: int = Priority.DEFAULT) -> Iterator[str]:
+        """
+        POST a streaming request and yield generated token texts.
+        
+        Consumes the server-sent events of a text-generation stream
+        (`data: {"token": {"text": ...}}` lines). `deadline` bounds the wait for
+        the response and for each following chunk.
+
+        Raises:
+            CircuitOpenError: the endpoint is considered down
+            DeadlineExceededError: no time is left to send the request
+            RateLimitExceededError: the rate limiter had no capacity before the deadline
+            requests.HTTPError: the endpoint answered with an error status
+        """
+        self._remaining(deadline)
+        breaker = self.breaker(url)
+        if not breaker.allow_request():
+            raise CircuitOpenError("Inference endpoint circuit is open")
+
+        try:
+            self.limiter.acquire(priority, deadline)
+            self._last_request_at = time.monotonic()
+            response = self.session.post(url, json=payload, timeout=self._remaining(deadline), stream=True)
+        except (DeadlineExceededError, RateLimitExceededError):
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        with response:
+            if response.status_code != 200:
+                if self._loading_estimate(response) is None and (
+                        response.status_code >= 500 or response.status_code == 429):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                response.raise_for_status()
+                raise requests.HTTPError(f"Unexpected status {response.status_code}", response=response)
+            breaker.record_success()
+
+            # chunk_size=None hands over each chunk as soon as it arrives
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                token = event.get("token") or {}
+                if token.get("text") and not token.get("special"):
+                    yield token["text"]
+
+    def start_keep_warm(self, url: str, interval: float = LLM_KEEP_WARM_INTERVAL):
+        """
+        Warm the model at `url` now and re-ping it whenever it has been idle for
+        `interval` seconds. Runs on one daemon thread per URL; later calls are no-ops.
+        """
+        if interval <= 0:
+            return
+        with self._metrics_lock:
+            if url in self._warm_urls:
+                return
+            self._warm_urls.add(url)
+        threading.Thread(
+            target=self._keep_warm, args=(url, interval), name="llm-keep-warm", daemon=True
+        ).start()
+
+    def _keep_warm(self, url: str, interval: float):
+        first_ping = True
+        while True:
+            idle = time.monotonic() - self._last_request_at
+            if idle >= interval or first_ping:
+                first_ping = False
+                try:
+                    response = self.post(url, _WARMUP_PAYLOAD, priority=Priority.LOW)
+                    failed = response.status_code != 200
+                except Exception:
+                    failed = True
+                with self._metrics_lock:
+                    self.warmup_pings += 1
+                    self.warmup_failures += failed
+                idle = 0.0
+            time.sleep(max(interval - idle, 1.0))
+
+    @staticmethod
+    def _loading_estimate(response: requests.Response) -> Optional[float]:
+        """Seconds the server expects the model to need to load, if it is loading"""
+        if response.status_code != 503:
+            return None
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        if isinstance(body, dict) and isinstance(body.get("estimated_time"), (int, float)):
+            return max(float(body["estimated_time"]), 1.0)
+        return None
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> float:
+        """Timeout for the next attempt, bounded by the deadline"""
+        if deadline is None:
+            return LLM_REQUEST_TIMEOUT
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError("LLM latency budget spent")
+        return min(remaining, LLM_REQUEST_TIMEOUT)
+
+    @staticmethod
+    def _retry_delay(response: requests.Response, attempt: int) -> float:
+        """Honour Retry-After when present, else exponential backoff"""
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+        return LLM_RETRY_BACKOFF * (2 ** attempt)
+
+    def stats(self) -> Dict:
+        """Connection reuse, circuit breaker and cold start counters"""
+        pools = self._adapter.poolmanager.pools
+        request_count = 0
+        connection_count = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            request_count += pool.num_requests
+            connection_count += pool.num_connections
+        return {
+            "requests": request_count,
+            "new_connections": connection_count,
+            "reused_connections": max(request_count - connection_count, 0),
+            "circuit_states": {url: breaker.state for url, breaker in self._breakers.items()},
+            "circuit_trips": sum(breaker.trips for breaker in self._breakers.values()),
+            "cold_starts": self.cold_starts,
+            "cold_start_wait_seconds": round(self.cold_start_wait_seconds, 3),
+            "warmup_pings": self.warmup_pings,
+            "warmup_failures": self.warmup_failures,
+            "rate_limiter": self.limiter.stats()
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_clients: Dict[str, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(api_key: str) -> LLMClient:
+    """Return the process-wide client for an API key, creating it on first use"""
+    client = _clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = _clients[api_key] = LLMClient(api_key)
+    return client
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor that runs LLM work off the script thread"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=LLM_EXECUTOR_WORKERS, thread_name_prefix="llm")
+    return _executor
@@ -0,0 +1,172 @@
+"""
+Latency-aware routing and request hedging across inference endpoints
+
+Each call type (short chat replies, question generation) keeps a rolling
+window of latencies per endpoint. Calls go to the healthy endpoint with the
+lowest recent median latency; endpoints without samples are tried first, and
+every LLM_ROUTER_EXPLORE_EVERY-th call goes to the least recently measured
+healthy endpoint so a slow spell is not held against it forever. With
+hedging on, a call still unanswered after the endpoint's p95 latency is
+duplicated to the next best endpoint and whichever answers first wins.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    LLM_LATENCY_WINDOW, LLM_HEDGE_REQUESTS, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES,
+    LLM_ROUTER_EXPLORE_EVERY, LLM_REQUEST_TIMEOUT, LLM_POOL_MAXSIZE
+)
+from llm_batching import get_request_coalescer
+from llm_client import DeadlineExceededError, LLMClient
+from rate_limiter import Priority
+
+CALL_CHAT = "chat"
+CALL_QUESTIONS = "questions"
+
+
+class EndpointRouter:
+    """Routes text-generation calls over a list of endpoint URLs"""
+
+    def __init__(self, client: LLMClient, urls: List[str], hedge: bool = LLM_HEDGE_REQUESTS,
+                 window: int = LLM_LATENCY_WINDOW):
+        if not urls:
+            raise ValueError("At least one endpoint URL is required")
+        self.client = client
+        self.urls = list(dict.fromkeys(urls))
+        self.hedge = hedge and len(self.urls) > 1
+        self.window = window
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._measured_at: Dict[Tuple[str, str], float] = {}
+        self._calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=LLM_POOL_MAXSIZE, thread_name_prefix="llm-hedge")
+
+    def _record(self, url: str, call_type: str, latency: float):
+        with self._lock:
+            samples = self._latencies.setdefault((url, call_type), deque(maxlen=self.window))
+            samples.append(latency)
+            self._measured_at[(url, call_type)] = time.monotonic()
+
+    def _estimate(self, url: str, call_type: str) -> float:
+        """Median of the recent samples: typical latency, since hedging handles the tail"""
+        samples = sorted(self._latencies.get((url, call_type), ()))
+        return samples[len(samples) // 2] if samples else 0.0
+
+    def _hedge_delay(self, url: str, call_type: str) -> Optional[float]:
+        """The endpoint's p95 latency, once there are enough samples to trust it"""
+        with self._lock:
+            samples = sorted(self._latencies.get((url, call_type), ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * LLM_HEDGE_PERCENTILE), len(samples) - 1)]
+
+    def ranked(self, call_type: str = CALL_CHAT, explore: bool = False) -> List[str]:
+        """
+        Endpoints fastest first, those with an open circuit last; with
+        `explore`, the least recently measured healthy endpoint goes first
+        """
+        with self._lock:
+            ranked = sorted(
+                self.urls,
+                key=lambda url: (self.client.breaker(url).is_open(), self._estimate(url, call_type))
+            )
+            if explore:
+                healthy = [url for url in ranked if not self.client.breaker(url).is_open()]
+                if len(healthy) > 1:
+                    stalest = min(healthy, key=lambda url: self._measured_at.get((url, call_type), 0.0))
+                    ranked.remove(stalest)
+                    ranked.insert(0, stalest)
+            return ranked
+
+    def generate(self, payload: Dict, call_type: str = CALL_CHAT, deadline: Optional[float] = None,
+                 priority: int = Priority.DEFAULT) -> Optional[str]:
+        """
+        Return the generated text from the first endpoint to answer, or None
+
+        Raises whatever the primary endpoint's call raised when no endpoint answered.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + LLM_REQUEST_TIMEOUT
+        with self._lock:
+            calls = self._calls[call_type] = self._calls.get(call_type, 0) + 1
+        explore = LLM_ROUTER_EXPLORE_EVERY > 0 and calls % LLM_ROUTER_EXPLORE_EVERY == 0
+        endpoints = self.ranked(call_type, explore)
+        primary = endpoints[0]
+        delay = self._hedge_delay(primary, call_type) if self.hedge else None
+        if delay is None or len(endpoints) < 2:
+            return self._call(primary, payload, call_type, deadline, priority)
+
+        primary_call = self._executor.submit(self._call, primary, payload, call_type, deadline, priority)
+        done, _ = wait([primary_call], timeout=min(delay, max(deadline - time.monotonic(), 0)))
+        if done and primary_call.exception() is None and primary_call.result():
+            return primary_call.result()
+
+        # The primary is slow (or failed): race it against the next best endpoint.
+        # The loser's result is dropped; its latency is still recorded.
+        with self._lock:
+            self.hedged += 1
+        hedge_call = self._executor.submit(self._call, endpoints[1], payload, call_type, deadline, priority)
+        pending = {primary_call, hedge_call}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for call in done:
+                if call.exception() is None and call.result():
+                    if call is hedge_call:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    for loser in pending:
+                        loser.cancel()
+                    return call.result()
+        if primary_call.done():
+            return primary_call.result()
+        raise DeadlineExceededError("No endpoint answered within the latency budget")
+
+    def stream(self, payload: Dict, deadline: Optional[float] = None,
+               priority: int = Priority.DEFAULT) -> Iterator[str]:
+        """Stream generated tokens from the fastest healthy endpoint (streams are not hedged)"""
+        return self.client.stream(self.ranked(CALL_CHAT)[0], payload, deadline=deadline, priority=priority)
+
+    def _call(self, url: str, payload: Dict, call_type: str, deadline: float, priority: int) -> Optional[str]:
+        started = time.monotonic()
+        try:
+            text = get_request_coalescer(self.client).generate(url, payload, deadline=deadline, priority=priority)
+        except Exception:
+            # A failed call counts as a full timeout so a fast-failing endpoint never looks fastest
+            self._record(url, call_type, LLM_REQUEST_TIMEOUT)
+            raise
+        self._record(url, call_type, time.monotonic() - started if text else LLM_REQUEST_TIMEOUT)
+        return text
+
+    def stats(self) -> Dict:
+        """Rolling median latency per endpoint and call type, and hedging counters"""
+        with self._lock:
+            latencies = {
+                f"{call_type}:{url}": round(self._estimate(url, call_type), 3)
+                for (url, call_type) in self._latencies
+            }
+        return {"latencies": latencies, "hedged": self.hedged, "hedge_wins": self.hedge_wins}
+
+
+_routers: Dict[Tuple[int, Tuple[str, ...]], EndpointRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_endpoint_router(client: LLMClient, urls: List[str]) -> EndpointRouter:
+    """Return the process-wide router for a client and endpoint list"""
+    key = (id(client), tuple(urls))
+    router = _routers.get(key)
+    if router is None:
+        with _routers_lock:
+            router = _routers.get(key)
+            if router is None:
+                router = _routers[key] = EndpointRouter(client, urls)
+    return router
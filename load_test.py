@@ -0,0 +1,184 @@
+"""
+Load test for the screening API (api_server.py)
+
+Simulated candidates each open a keep-alive connection, start a session and
+go through the whole screening, with `--concurrency` of them in flight at
+once. Reports throughput and latency percentiles over every request.
+
+Usage:
+    python load_test.py --spawn --sessions 2000 --concurrency 1000
+    python load_test.py --url http://127.0.0.1:8000 --sessions 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SCRIPT = [
+    "Hi",
+    "Jordan Lee",
+    "jordan.lee@example.com",
+    "(415) 555-0134",
+    "6 years",
+    "Python Developer",
+    "Austin, TX",
+    "Python, Django, PostgreSQL, Docker, AWS, communication, teamwork"
+]
+ANSWER = "I would profile first, then fix the slowest path and add a regression test."
+MAX_QUESTIONS = 10
+
+
+class Connection:
+    """A minimal HTTP/1.1 keep-alive JSON client"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None) -> Tuple[int, Dict]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        payload = await self.reader.readexactly(length) if length else b""
+        return status, json.loads(payload) if payload else {}
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def candidate(host: str, port: int, latencies: List[float], errors: List[str]):
+    """One candidate's complete screening"""
+    connection = Connection(host, port)
+
+    async def call(method: str, path: str, body: Optional[Dict] = None) -> Dict:
+        started = time.perf_counter()
+        status, payload = await connection.request(method, path, body)
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} -> {status} {payload.get('error')}")
+        return payload
+
+    try:
+        session_id = (await call("POST", "/sessions"))["session_id"]
+        state = None
+        for message in SCRIPT:
+            state = (await call("POST", f"/sessions/{session_id}/messages", {"message": message}))["conversation_state"]
+        while state == "generating_questions":
+            await asyncio.sleep(0.2)
+            state = (await call("GET", f"/sessions/{session_id}"))["conversation_state"]
+        for _ in range(MAX_QUESTIONS):
+            if state != "asking_questions":
+                break
+            state = (await call("POST", f"/sessions/{session_id}/messages", {"message": ANSWER}))["conversation_state"]
+        await call("GET", f"/sessions/{session_id}/progress")
+        if state != "completed":
+            errors.append(f"session ended in {state}")
+    except Exception as error:
+        errors.append(str(error) or type(error).__name__)
+    finally:
+        connection.close()
+
+
+async def run(host: str, port: int, sessions: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors: List[str] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await candidate(host, port, latencies, errors)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(0.50), 2),
+        "p95_ms": round(percentile(0.95), 2),
+        "p99_ms": round(percentile(0.99), 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+
+def spawn_server() -> Tuple[subprocess.Popen, int]:
+    """Start api_server.py on a free local port and wait until it accepts connections"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_server.py"),
+         "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise SystemExit("api_server.py did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the screening API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--spawn", action="store_true", help="Start a local api_server.py to test")
+    parser.add_argument("--sessions", type=int, default=1000, help="Screenings to run")
+    parser.add_argument("--concurrency", type=int, default=500, help="Screenings in flight at once")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server, port = spawn_server()
+        host = "127.0.0.1"
+    else:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    try:
+        report = asyncio.run(run(host, port, args.sessions, args.concurrency))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+In-process CPU inference backend
+
+An alternative to the Hugging Face Inference API for on-prem deployments: a
+small text-generation model is loaded once per process, in the background
+as soon as a chatbot is created (see warm_up), and shared by every session. Prompts are queued by priority and a bounded
+pool of worker threads runs them through the model in batches.
+
+Needs the optional `transformers` and `torch` (CPU build) packages. Tests can
+set LOCAL_MODEL_NAME to a tiny model such as sshleifer/tiny-gpt2, or pass a
+stub `loader` returning any callable with the pipeline's calling convention.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config import (
+    LOCAL_MODEL_NAME, LOCAL_MODEL_WORKERS, LOCAL_BATCH_MAX_SIZE, LOCAL_BATCH_MAX_WAIT,
+    LLM_REQUEST_TIMEOUT
+)
+from llm_client import DeadlineExceededError
+from llm_router import CALL_CHAT
+from rate_limiter import Priority
+
+# Inference API parameters the transformers pipeline understands as well
+_GENERATION_PARAMETERS = ("max_new_tokens", "temperature", "top_p", "top_k", "return_full_text")
+
+
+def load_transformers_pipeline(model_name: str) -> Callable:
+    """Load a CPU text-generation pipeline"""
+    try:
+        from transformers import pipeline
+    except ImportError as error:
+        raise RuntimeError(
+            "The local LLM backend needs the transformers and torch packages "
+            "(pip install transformers torch --index-url https://download.pytorch.org/whl/cpu)"
+        ) from error
+    generator = pipeline("text-generation", model=model_name, device=-1)
+    if generator.tokenizer.pad_token_id is None:
+        # Batched generation pads prompts; causal LMs often ship without a pad token
+        generator.tokenizer.pad_token_id = generator.model.config.eos_token_id
+    generator.tokenizer.padding_side = "left"
+    return generator
+
+
+class _Request:
+    def __init__(self, prompt: str, parameters: Dict, deadline: float):
+        self.prompt = prompt
+        self.parameters = parameters
+        self.deadline = deadline
+        self.future: Future = Future()
+
+
+class LocalTextGenerator:
+    """
+    Local model with the same generate()/stream() interface as EndpointRouter
+
+    Each worker takes the highest-priority queued prompt, adds up to
+    `max_batch_size - 1` more with the same generation parameters that arrive
+    within `max_wait` seconds, and runs them as one batch.
+    """
+
+    def __init__(self, model_name: str = LOCAL_MODEL_NAME, workers: int = LOCAL_MODEL_WORKERS,
+                 max_batch_size: int = LOCAL_BATCH_MAX_SIZE, max_wait: float = LOCAL_BATCH_MAX_WAIT,
+                 loader: Callable[[str], Callable] = load_transformers_pipeline):
+        self.model_name = model_name
+        self.workers = max(workers, 1)
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+        self.loader = loader
+        self.batches = 0
+        self.prompts = 0
+        self.expired = 0
+        self.load_seconds = 0.0
+        self._lock = threading.Lock()
+        self._pipeline: Optional[Callable] = None
+        self._load_lock = threading.Lock()
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._threads_lock = threading.Lock()
+
+    def _model(self) -> Callable:
+        if self._pipeline is None:
+            with self._load_lock:
+                if self._pipeline is None:
+                    started = time.perf_counter()
+                    self._pipeline = self.loader(self.model_name)
+                    self.load_seconds = time.perf_counter() - started
+        return self._pipeline
+
+    def warm_up(self):
+        """Start loading the model on a background thread, unless it is loaded or loading"""
+        if self._pipeline is None and not self._load_lock.locked():
+            threading.Thread(target=self._warm_up, name="local-llm-load", daemon=True).start()
+
+    def _warm_up(self):
+        try:
+            self._model()
+        except Exception:
+            # Raised again to the first prompt that needs the model
+            pass
+
+    def _ensure_workers(self):
+        if len(self._threads) < self.workers:
+            with self._threads_lock:
+                while len(self._threads) < self.workers:
+                    thread = threading.Thread(target=self._work, name="local-llm", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def generate(self, payload: Dict, call_type: str = CALL_CHAT, deadline: Optional[float] = None,
+                 priority: int = Priority.DEFAULT) -> Optional[str]:
+        """
+        Return the generated text for a text-generation payload
+
+        Raises:
+            DeadlineExceededError: the prompt was not answered before the deadline
+            RuntimeError: the model could not be loaded
+        """
+        if deadline is None:
+            deadline = time.monotonic() + LLM_REQUEST_TIMEOUT
+        parameters = {
+            name: value for name, value in (payload.get("parameters") or {}).items()
+            if name in _GENERATION_PARAMETERS
+        }
+        if parameters.get("temperature"):
+            parameters["do_sample"] = True
+        request = _Request(payload["inputs"], parameters, deadline)
+        self._ensure_workers()
+        self._queue.put((priority, next(self._sequence), request))
+        try:
+            return request.future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            raise DeadlineExceededError("LLM latency budget spent waiting for the local model")
+
+    def stream(self, payload: Dict, deadline: Optional[float] = None,
+               priority: int = Priority.DEFAULT) -> Iterator[str]:
+        """Yield the generated text; the local model answers in one piece"""
+        text = self.generate(payload, deadline=deadline, priority=priority)
+        if text:
+            yield text
+
+    def _next_batch(self) -> List[_Request]:
+        _, _, first = self._queue.get()
+        batch = [first]
+        held_back = []
+        batch_deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = batch_deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry[2].parameters == first.parameters:
+                batch.append(entry[2])
+            else:
+                held_back.append(entry)
+        for entry in held_back:
+            self._queue.put(entry)
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                # Loading can take far longer than a turn, so deadlines are checked after it
+                model = self._model()
+            except Exception as error:
+                for request in batch:
+                    request.future.set_exception(error)
+                continue
+            now = time.monotonic()
+            live = [request for request in batch if request.deadline > now]
+            for request in batch:
+                if request.deadline <= now:
+                    request.future.set_exception(DeadlineExceededError("Expired while queued"))
+            with self._lock:
+                self.expired += len(batch) - len(live)
+            if not live:
+                continue
+            try:
+                outputs = model([request.prompt for request in live], batch_size=len(live), **live[0].parameters)
+                with self._lock:
+                    self.batches += 1
+                    self.prompts += len(live)
+                for request, output in zip(live, outputs):
+                    if isinstance(output, list):
+                        output = output[0] if output else {}
+                    request.future.set_result(output.get("generated_text") if isinstance(output, dict) else None)
+            except Exception as error:
+                for request in live:
+                    if not request.future.done():
+                        request.future.set_exception(error)
+
+    def stats(self) -> Dict:
+        """Model load time, batching and queue counters"""
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "loaded": self._pipeline is not None,
+                "load_seconds": round(self.load_seconds, 3),
+                "queued": self._queue.qsize(),
+                "prompts": self.prompts,
+                "batches": self.batches,
+                "average_batch": round(self.prompts / self.batches, 2) if self.batches else 0.0,
+                "expired": self.expired
+            }
+
+
+_generator: Optional[LocalTextGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def get_local_generator() -> LocalTextGenerator:
+    """Return the process-wide local model backend (the model loads once warm_up() or a prompt asks for it)"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = LocalTextGenerator()
+    return _generator
@@ -0,0 +1,194 @@
+"""
+One-pass extraction of candidate details from free text
+
+A candidate may answer several profile questions at once ("I'm John Smith,
+john@example.com, 5 years as a backend engineer, based in Berlin") or paste
+resume text. extract_profile() pulls every field it can find out of such a
+message: first from labelled segments ("Email: ..."), then from free-text
+patterns, and for the field currently being asked from whatever text is left
+over. Every value must pass the same validator as the scripted step that
+would otherwise collect it.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from config import ConversationState
+from utils import (
+    validate_email, validate_experience, validate_location, validate_tech_stack,
+    extract_name_from_input, format_phone_number
+)
+
+# Profile fields in collection order, with the state that asks for each
+PROFILE_FIELDS = [
+    ("name", ConversationState.COLLECTING_NAME),
+    ("email", ConversationState.COLLECTING_EMAIL),
+    ("phone", ConversationState.COLLECTING_PHONE),
+    ("experience", ConversationState.COLLECTING_EXPERIENCE),
+    ("position", ConversationState.COLLECTING_POSITION),
+    ("location", ConversationState.COLLECTING_LOCATION),
+    ("tech_stack", ConversationState.COLLECTING_TECH_STACK)
+]
+STATE_FIELDS = {state: field for field, state in PROFILE_FIELDS}
+
+FIELD_LABELS = {
+    "name": "Name", "email": "Email", "phone": "Phone", "experience": "Experience",
+    "position": "Position", "location": "Location", "tech_stack": "Skills"
+}
+
+# "Label: value" headings of forms and resumes, and the field each one fills
+LABEL_FIELDS = {
+    "name": "name", "full name": "name",
+    "email": "email", "e-mail": "email", "email address": "email",
+    "phone": "phone", "phone number": "phone", "mobile": "phone", "tel": "phone",
+    "experience": "experience", "years of experience": "experience",
+    "position": "position", "role": "position", "desired role": "position", "desired position": "position",
+    "location": "location", "city": "location", "based in": "location",
+    "skills": "tech_stack", "tech stack": "tech_stack", "technical skills": "tech_stack",
+    "soft skills": "tech_stack", "technologies": "tech_stack"
+}
+LABEL_PATTERN = re.compile(
+    r'(?<![\w-])(' + '|'.join(sorted(map(re.escape, LABEL_FIELDS), key=len, reverse=True)) + r')\s*:',
+    re.IGNORECASE
+)
+
+# Free-text patterns; each captures the value in group "v"
+_CAPITALIZED = r"[A-Z][^\W\d_]*(?:[ -][A-Z][^\W\d_]*)*"
+PHONE_PATTERN = re.compile(r"(?<![\d@])(?:\+?1[\s.-]?)?(?P<v>\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4})(?!\d)")
+FREE_TEXT_PATTERNS: List[Tuple[str, "re.Pattern"]] = [
+    ("email", re.compile(r"(?P<v>[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})")),
+    ("phone", PHONE_PATTERN),
+    ("experience", re.compile(r"(?<![\d.])(?P<v>\d{1,2})\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)),
+    ("name", re.compile(
+        r"(?i:\b(?:my name is|i am|i'm|this is|name's))\s+(?P<v>[A-Z][a-zA-Z'-]+(?:\s+[A-Z][a-zA-Z'-]+){1,3})"
+    )),
+    ("position", re.compile(
+        r"\b(?:applying|apply|interested in|looking for|seeking)(?: for)?\s+(?:an?\s+|the\s+)?"
+        r"(?P<v>[^,;.\n]+?)\s+(?:role|position|job|opening)s?\b",
+        re.IGNORECASE
+    )),
+    ("location", re.compile(
+        r"(?i:\b(?:based in|located in|live in|living in|reside in|residing in|i'm from|i am from|currently in))\s+"
+        r"(?P<v>" + _CAPITALIZED + r"(?:,\s*(?:[A-Z]{2,3}\b|" + _CAPITALIZED + r"(?=\s*(?:[.;\n]|$))))?)"
+    )),
+    ("tech_stack", re.compile(
+        r"\b(?:my skills(?: are| include)?|my tech stack(?: is)?|proficient (?:in|with)|experienced (?:in|with)"
+        r"|i (?:know|use|work with))\s*:?\s*(?P<v>(?:[^.\n]|\.(?=\S))+)",
+        re.IGNORECASE
+    ))
+]
+
+# Words that make a capitalized phrase a job title rather than a person's name
+ROLE_WORDS = frozenset({
+    "senior", "junior", "lead", "principal", "staff", "developer", "engineer", "scientist",
+    "analyst", "architect", "manager", "designer", "intern", "consultant", "administrator"
+})
+NAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z'.-]*(?:\s+[A-Za-z][A-Za-z'.-]*){1,3}")
+SEGMENT_SEPARATORS = re.compile(r"[,;|\n•]+")
+SKILL_CONJUNCTION = re.compile(r"\s+(?:and|&)\s+", re.IGNORECASE)
+MAX_FIELD_LENGTH = 100
+
+
+def _clean(value: str) -> str:
+    return value.strip().strip(",;|.•-").strip()
+
+
+def _is_name(value: str) -> bool:
+    return bool(NAME_PATTERN.fullmatch(value)) and not ROLE_WORDS & set(value.lower().split())
+
+
+def _normalize(field: str, value: str) -> Optional[Dict]:
+    """The candidate_data entries for a field value, or None if it does not validate"""
+    value = _clean(value)
+    if not value:
+        return None
+    if field == "name":
+        name = extract_name_from_input(value)
+        return {"name": name} if _is_name(name) else None
+    if field == "email":
+        return {"email": value} if validate_email(value)[0] else None
+    if field == "phone":
+        # Drops a +1 country code
+        match = PHONE_PATTERN.search(value)
+        return {"phone": format_phone_number(match.group("v"))} if match else None
+    if field == "experience":
+        is_valid, _, years = validate_experience(value)
+        return {"experience": years} if is_valid else None
+    if field == "position":
+        return {"position": value} if len(value) <= MAX_FIELD_LENGTH else None
+    if field == "location":
+        return {"location": value} if validate_location(value)[0] else None
+    if field == "tech_stack":
+        tech_stack = SKILL_CONJUNCTION.sub(", ", value)
+        is_valid, _, categorized = validate_tech_stack(tech_stack)
+        return {"tech_stack": tech_stack, "tech_stack_parsed": categorized} if is_valid else None
+    return None
+
+
+def extract_profile(text: str, expected: Optional[str] = None) -> Dict:
+    """
+    Extract every profile field found in a message
+
+    Args:
+        text (str): The candidate's message or pasted resume text
+        expected (str): The field currently being asked for, if any. Text not
+            claimed by another field may fill it, as the scripted step would.
+
+    Returns:
+        Dict: candidate_data entries (phone formatted, experience as an int,
+        tech_stack with its tech_stack_parsed categories) for the fields found
+    """
+    found: Dict = {}
+    claimed: List[Tuple[int, int]] = []
+
+    # Labelled segments run up to the next label or line break
+    labels = list(LABEL_PATTERN.finditer(text))
+    skills = []
+    for index, label in enumerate(labels):
+        end = labels[index + 1].start() if index + 1 < len(labels) else len(text)
+        newline = text.find("\n", label.end(), end)
+        end = newline if newline != -1 else end
+        field = LABEL_FIELDS[label.group(1).lower()]
+        claimed.append((label.start(), end))
+        if field == "tech_stack":
+            skills.append(_clean(text[label.end():end]))
+        elif field not in found:
+            found.update(_normalize(field, text[label.end():end]) or {})
+    if skills and "tech_stack" not in found:
+        found.update(_normalize("tech_stack", ", ".join(skill for skill in skills if skill)) or {})
+
+    for field, pattern in FREE_TEXT_PATTERNS:
+        if field in found:
+            continue
+        for match in pattern.finditer(text):
+            if any(start <= match.start() < end for start, end in claimed):
+                continue
+            values = _normalize(field, match.group("v"))
+            if values:
+                found.update(values)
+                claimed.append(match.span())
+                break
+
+    # A resume usually opens with the candidate's name on a line of its own
+    if "name" not in found and "\n" in text.strip():
+        first_line = _clean(text.strip().split("\n", 1)[0])
+        if _is_name(first_line) and not LABEL_PATTERN.search(first_line):
+            found["name"] = first_line
+            claimed.append((0, text.find("\n")))
+
+    if expected and expected not in found:
+        leftover = text
+        for start, end in sorted(claimed, reverse=True):
+            leftover = leftover[:start] + "\n" + leftover[end:]
+        segments = [_clean(segment) for segment in SEGMENT_SEPARATORS.split(leftover)]
+        segments = [segment for segment in segments if segment]
+        if expected == "tech_stack":
+            found.update(_normalize(expected, ", ".join(segments)) or {})
+        else:
+            for segment in segments:
+                values = _normalize(expected, segment)
+                if values:
+                    found.update(values)
+                    break
+
+    return found
@@ -0,0 +1,238 @@
+"""
+Indexed bank of technical screening questions
+
+Questions are tagged with the skills they assess, a category and a
+difficulty level. An inverted index from (skill, difficulty) to question ids
+makes selection for a candidate a handful of dictionary lookups plus ranking
+of a bounded candidate set, however many questions the bank holds.
+
+A larger bank can be loaded from a JSON Lines file (QUESTION_BANK_PATH), one
+question per line: {"text": ..., "skills": [...], "category": ..., "difficulty": ...}.
+Questions without skills are generic and pad out sets for thin tech stacks.
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import QUESTION_BANK_PATH, FALLBACK_QUESTION_COUNT
+from skill_index import parse_skills
+
+DIFFICULTY_LEVELS = ("beginner", "intermediate", "senior")
+
+# Generic questions opening every selected set
+GENERIC_QUESTIONS_PER_SET = 2
+
+# (text, skills, category, difficulty)
+BUILTIN_QUESTIONS = [
+    ("Can you explain the difference between a variable and a constant in programming?", (), "general", "beginner"),
+    ("What is version control and why is it important in software development?", (), "general", "beginner"),
+    ("How do you approach learning a new technology or codebase?", (), "general", "beginner"),
+    ("Can you describe your approach to debugging complex issues in production?", (), "general", "intermediate"),
+    ("How do you ensure code quality and maintainability in your projects?", (), "general", "intermediate"),
+    ("How do you decide what to cover with automated tests?", (), "general", "intermediate"),
+    ("How do you approach system design for scalable applications?", (), "general", "senior"),
+    ("Can you discuss a challenging technical problem you solved and your approach?", (), "general", "senior"),
+    ("How do you evaluate and introduce a new technology into an existing team's stack?", (), "general", "senior"),
+
+    ("What is the difference between a list and a tuple in Python?", ("python",), "languages", "beginner"),
+    ("What are Python decorators and how have you used them in your projects?", ("python",), "languages", "intermediate"),
+    ("How does the GIL affect multithreaded Python code, and how do you work around it?", ("python",), "languages", "senior"),
+    ("What is the difference between == and === in JavaScript?", ("javascript",), "languages", "beginner"),
+    ("Can you explain the concept of asynchronous programming in JavaScript?", ("javascript", "node"), "languages", "intermediate"),
+    ("How does the JavaScript event loop schedule microtasks and macrotasks?", ("javascript", "node"), "languages", "senior"),
+    ("What benefits does TypeScript's type system bring over plain JavaScript?", ("typescript",), "languages", "beginner"),
+    ("How do you use generics and discriminated unions in TypeScript?", ("typescript",), "languages", "intermediate"),
+    ("What is the difference between an interface and an abstract class in Java?", ("java",), "languages", "beginner"),
+    ("How does garbage collection work in the JVM and how have you tuned it?", ("java", "scala", "kotlin"), "languages", "senior"),
+    ("How do goroutines and channels help you write concurrent code in Go?", ("go",), "languages", "intermediate"),
+    ("How does Rust's ownership and borrowing model prevent memory errors?", ("rust",), "languages", "intermediate"),
+    ("What are smart pointers in C++ and when would you use each kind?", ("c++",), "languages", "intermediate"),
+    ("How does async/await work in C# and what pitfalls have you run into?", ("c#", "asp.net"), "languages", "intermediate"),
+    ("What are Kotlin coroutines and how do they differ from threads?", ("kotlin",), "languages", "intermediate"),
+    ("How do optionals work in Swift and why are they useful?", ("swift",), "languages", "beginner"),
+    ("What are blocks, procs and lambdas in Ruby?", ("ruby", "rails"), "languages", "intermediate"),
+    ("How has PHP changed in recent versions and which features do you rely on?", ("php", "laravel"), "languages", "intermediate"),
+
+    ("What are React hooks and how do useState and useEffect work?", ("react", "nextjs"), "frameworks", "beginner"),
+    ("How do you prevent unnecessary re-renders in a React application?", ("react", "nextjs"), "frameworks", "intermediate"),
+    ("How would you structure state management for a large React application?", ("react",), "frameworks", "senior"),
+    ("What are the trade-offs between server-side rendering and static generation in Next.js?", ("nextjs", "nuxt"), "frameworks", "intermediate"),
+    ("How does Angular's change detection work?", ("angular",), "frameworks", "intermediate"),
+    ("How does Vue's reactivity system track dependencies?", ("vue", "nuxt"), "frameworks", "intermediate"),
+    ("How do you handle database migrations in Django/Flask applications?", ("django", "flask"), "frameworks", "intermediate"),
+    ("How does the Django ORM avoid N+1 queries with select_related and prefetch_related?", ("django",), "frameworks", "intermediate"),
+    ("How would you structure a large Flask application?", ("flask",), "frameworks", "intermediate"),
+    ("How does FastAPI use type hints for validation and dependency injection?", ("fastapi",), "frameworks", "intermediate"),
+    ("What is dependency injection in Spring and how do bean scopes work?", ("spring", "java"), "frameworks", "intermediate"),
+    ("How does middleware work in Express?", ("express", "node"), "frameworks", "beginner"),
+    ("How would you scale a Node.js service across CPU cores?", ("node",), "frameworks", "senior"),
+    ("How does Rails' convention over configuration shape your application design?", ("rails",), "frameworks", "beginner"),
+    ("How do queues and jobs work in Laravel?", ("laravel",), "frameworks", "intermediate"),
+
+    ("What is the difference between an INNER JOIN and a LEFT JOIN?", ("mysql", "postgresql", "sqlite", "oracle"), "databases", "beginner"),
+    ("How would you optimize a slow database query?", ("mysql", "postgresql", "sqlite", "oracle"), "databases", "intermediate"),
+    ("How do transaction isolation levels affect concurrent writes?", ("mysql", "postgresql", "oracle"), "databases", "senior"),
+    ("How do you design a MongoDB schema: when do you embed and when do you reference?", ("mongodb",), "databases", "intermediate"),
+    ("Which Redis data structures have you used and for what?", ("redis",), "databases", "beginner"),
+    ("How would you use Redis for caching without serving stale data?", ("redis",), "databases", "intermediate"),
+    ("How does Elasticsearch score and rank search results?", ("elasticsearch",), "databases", "intermediate"),
+    ("How do you choose partition and clustering keys in Cassandra?", ("cassandra",), "databases", "senior"),
+    ("How do you design DynamoDB tables around access patterns?", ("dynamodb",), "databases", "senior"),
+    ("How do Firebase security rules protect your data?", ("firebase",), "databases", "intermediate"),
+
+    ("What is the difference between git merge and git rebase?", ("git",), "tools", "beginner"),
+    ("Can you explain the benefits of containerization in your development workflow?", ("docker", "kubernetes"), "tools", "beginner"),
+    ("How do you keep Docker images small and builds fast?", ("docker",), "tools", "intermediate"),
+    ("How do Kubernetes deployments roll out and roll back changes?", ("kubernetes",), "tools", "intermediate"),
+    ("How would you design autoscaling and resource limits for a Kubernetes workload?", ("kubernetes",), "tools", "senior"),
+    ("How do you structure a CI/CD pipeline in Jenkins?", ("jenkins",), "tools", "intermediate"),
+    ("How do you manage Terraform state and modules across environments?", ("terraform",), "tools", "intermediate"),
+    ("How do Ansible playbooks stay idempotent?", ("ansible",), "tools", "intermediate"),
+    ("How do you reduce bundle size in a webpack build?", ("webpack",), "tools", "intermediate"),
+    ("How do Maven or Gradle resolve dependency version conflicts?", ("maven", "gradle"), "tools", "intermediate"),
+
+    ("Which AWS services would you use to host a web application, and why?", ("aws",), "cloud", "beginner"),
+    ("How do you design IAM policies with least privilege in AWS?", ("aws",), "cloud", "intermediate"),
+    ("How would you design a highly available, multi-region architecture on AWS?", ("aws",), "cloud", "senior"),
+    ("How do you manage identities and access in Azure?", ("azure",), "cloud", "intermediate"),
+    ("How do you choose between Cloud Run, GKE and App Engine on GCP?", ("gcp",), "cloud", "intermediate"),
+    ("What are the limits of platforms like Heroku, Vercel or Netlify as an application grows?", ("heroku", "vercel", "netlify"), "cloud", "intermediate"),
+]
+
+
+@dataclass(frozen=True)
+class Question:
+    """A bank question, tagged with the canonical skills it assesses"""
+    id: int
+    text: str
+    skills: Tuple[str, ...]
+    category: str
+    difficulty: str
+
+
+def _canonical_skill(skill: str) -> str:
+    """Resolve aliases and spelling the same way candidate tech stacks are resolved"""
+    technical = parse_skills(skill).technical_skills
+    return technical[0] if technical else skill.strip().lower()
+
+
+class QuestionBank:
+    """Questions with an inverted (skill, difficulty) -> question ids index"""
+
+    def __init__(self, questions: Iterable[Tuple[str, Iterable[str], str, str]] = ()):
+        self.questions: List[Question] = []
+        self._by_skill: Dict[Tuple[str, str], List[int]] = {}
+        self._generic: Dict[str, List[int]] = {level: [] for level in DIFFICULTY_LEVELS}
+        self.extend(questions)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def add(self, text: str, skills: Iterable[str] = (), category: str = "general",
+            difficulty: str = "intermediate") -> Question:
+        """Add one question and index it"""
+        if difficulty not in DIFFICULTY_LEVELS:
+            raise ValueError(f"Unknown difficulty {difficulty!r}")
+        canonical = tuple(dict.fromkeys(_canonical_skill(skill) for skill in skills if skill.strip()))
+        question = Question(len(self.questions), text, canonical, category, difficulty)
+        self.questions.append(question)
+        if canonical:
+            for skill in canonical:
+                self._by_skill.setdefault((skill, difficulty), []).append(question.id)
+        else:
+            self._generic[difficulty].append(question.id)
+        return question
+
+    def extend(self, questions: Iterable[Tuple[str, Iterable[str], str, str]]):
+        for text, skills, category, difficulty in questions:
+            self.add(text, skills, category, difficulty)
+
+    def load(self, path: str) -> int:
+        """Add the questions in a JSON Lines file and return how many were added"""
+        added = 0
+        with open(path, encoding='utf-8') as source:
+            for line in source:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.add(record['text'], record.get('skills', ()), record.get('category', 'general'),
+                         record.get('difficulty', 'intermediate'))
+                added += 1
+        return added
+
+    @staticmethod
+    def _levels_by_distance(level: str) -> List[str]:
+        position = DIFFICULTY_LEVELS.index(level)
+        return sorted(DIFFICULTY_LEVELS, key=lambda other: (abs(DIFFICULTY_LEVELS.index(other) - position), other))
+
+    def select(self, skills: Iterable[str], experience_level: str,
+               count: int = FALLBACK_QUESTION_COUNT) -> List[str]:
+        """
+        Pick `count` questions for a candidate
+
+        Opens with generic questions for the level, then takes the best
+        skill questions: those covering more of the candidate's skills first,
+        then those closest to the level. Each pick prefers a skill not yet
+        asked about. Generic questions fill any remaining slots.
+        """
+        skills = list(dict.fromkeys(skills))
+        skill_set = set(skills)
+        levels = self._levels_by_distance(experience_level)
+
+        # Only the first `count` ids of each bucket can be picked, which bounds
+        # the ranking work regardless of bank size
+        candidates: Dict[int, int] = {}
+        for skill in skills:
+            for distance, level in enumerate(levels):
+                for question_id in self._by_skill.get((skill, level), ())[:count]:
+                    candidates.setdefault(question_id, distance)
+
+        ranked = sorted(
+            candidates,
+            key=lambda question_id: (
+                -len(skill_set.intersection(self.questions[question_id].skills)),
+                candidates[question_id],
+                question_id
+            )
+        )
+
+        generic = [question_id for level in levels for question_id in self._generic[level][:count]]
+        selected = generic[:min(GENERIC_QUESTIONS_PER_SET, count)]
+        covered = set()
+        for require_new_skill in (True, False):
+            for question_id in ranked:
+                if len(selected) >= count:
+                    break
+                if question_id in selected:
+                    continue
+                question_skills = set(self.questions[question_id].skills) & skill_set
+                if require_new_skill and question_skills <= covered:
+                    continue
+                selected.append(question_id)
+                covered |= question_skills
+
+        for question_id in generic:
+            if len(selected) >= count:
+                break
+            if question_id not in selected:
+                selected.append(question_id)
+        return [self.questions[question_id].text for question_id in selected]
+
+
+_bank: Optional[QuestionBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """Return the process-wide bank: built-in questions plus QUESTION_BANK_PATH, if set"""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                bank = QuestionBank(BUILTIN_QUESTIONS)
+                if QUESTION_BANK_PATH:
+                    bank.load(QUESTION_BANK_PATH)
+                _bank = bank
+    return _bank
@@ -0,0 +1,216 @@
+"""
+Cache for generated technical questions
+
+Candidates with the same technical skills and experience level get the same
+kind of questions, so LLM-generated question sets are cached under a key made
+of the canonical skill set, the experience level and the model/prompt
+version. An in-memory LRU tier sits in front of an optional SQLite tier that
+every worker process on the host shares.
+
+Sets stored by the offline warming job (warm_question_cache.py) are flagged
+as precomputed, and lookups are tallied in the SQLite tier so the job can
+report how many live sessions were served from precomputed sets. Tallies are
+kept in memory and flushed in the background, so a lookup never writes.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from config import (
+    QUESTION_CACHE_SIZE, QUESTION_CACHE_TTL, QUESTION_CACHE_PATH, QUESTION_PROMPT_VERSION,
+    QUESTION_CACHE_USAGE_FLUSH_INTERVAL
+)
+from skill_index import parse_skills
+
+
+def question_cache_key(tech_stack: str, experience_level: str, model: str) -> str:
+    """Key for a question set: canonical technical skills, level, model and prompt version"""
+    skills = sorted(set(parse_skills(tech_stack).technical_skills))
+    return f"{model}|{QUESTION_PROMPT_VERSION}|{experience_level}|{','.join(skills)}"
+
+
+class QuestionCache:
+    """Two-tier (memory LRU, optional SQLite) TTL cache of question lists"""
+
+    def __init__(self, max_size: int = QUESTION_CACHE_SIZE, ttl: float = QUESTION_CACHE_TTL,
+                 path: str = QUESTION_CACHE_PATH, flush_interval: float = QUESTION_CACHE_USAGE_FLUSH_INTERVAL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.precomputed_hits = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Lookup outcomes not yet written to the shared tier
+        self._pending_usage: Counter = Counter()
+        self._flusher: Optional[threading.Thread] = None
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS question_cache ("
+                "key TEXT PRIMARY KEY, questions TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "precomputed INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS question_cache_usage ("
+                "outcome TEXT PRIMARY KEY, count INTEGER NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str, record_usage: bool = True) -> Optional[List[str]]:
+        """
+        Return the cached questions for a key, or None
+
+        record_usage=False looks the key up without touching any counter, for
+        maintenance jobs that should not skew the hit rate.
+        """
+        now = time.time()
+        with self._lock:
+            questions = None
+            precomputed = False
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, cached_questions, precomputed = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    questions = cached_questions
+                    if record_usage:
+                        self.memory_hits += 1
+                else:
+                    del self._entries[key]
+
+            if questions is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT questions, expires_at, precomputed FROM question_cache "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    questions = json.loads(row[0])
+                    precomputed = bool(row[2])
+                    self._remember(key, row[1], questions, precomputed)
+                    if record_usage:
+                        self.disk_hits += 1
+
+            if record_usage:
+                if questions is None:
+                    self.misses += 1
+                elif precomputed:
+                    self.precomputed_hits += 1
+                self._record_usage("miss" if questions is None else "precomputed" if precomputed else "cached")
+            return list(questions) if questions is not None else None
+
+    def put(self, key: str, questions: List[str], precomputed: bool = False):
+        """Store questions in both tiers"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, questions, precomputed)
+            self.stores += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO question_cache (key, questions, expires_at, precomputed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(questions), expires_at, int(precomputed))
+                )
+                self._db.execute("DELETE FROM question_cache WHERE expires_at <= ?", (time.time(),))
+                self._write_usage()
+                self._db.commit()
+
+    def _record_usage(self, outcome: str):
+        """Tally a lookup outcome for the shared tier; call with the lock held"""
+        if self._db is None:
+            return
+        self._pending_usage[outcome] += 1
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="question-usage", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush_usage)
+
+    def _write_usage(self):
+        """Add the pending tallies to the shared tier, uncommitted; call with the lock held"""
+        if self._pending_usage:
+            self._db.executemany(
+                "INSERT INTO question_cache_usage (outcome, count) VALUES (?, ?) "
+                "ON CONFLICT(outcome) DO UPDATE SET count = count + excluded.count",
+                self._pending_usage.items()
+            )
+            self._pending_usage.clear()
+
+    def flush_usage(self):
+        """Write the lookup outcomes tallied so far to the shared tier"""
+        with self._lock:
+            if self._db is not None and self._pending_usage:
+                self._write_usage()
+                self._db.commit()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush_usage()
+
+    def usage(self) -> Dict[str, float]:
+        """
+        Lookup outcomes across all processes sharing the SQLite tier (this
+        process only without one) and the share served from precomputed sets
+        """
+        self.flush_usage()
+        with self._lock:
+            if self._db is not None:
+                counts = dict(self._db.execute("SELECT outcome, count FROM question_cache_usage").fetchall())
+            else:
+                counts = {
+                    "precomputed": self.precomputed_hits,
+                    "cached": self.memory_hits + self.disk_hits - self.precomputed_hits,
+                    "miss": self.misses
+                }
+        lookups = sum(counts.values())
+        return {
+            "lookups": lookups,
+            "precomputed": counts.get("precomputed", 0),
+            "cached": counts.get("cached", 0),
+            "misses": counts.get("miss", 0),
+            "coverage": round(counts.get("precomputed", 0) / lookups, 3) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, expires_at: float, questions: List[str], precomputed: bool):
+        self._entries[key] = (expires_at, tuple(questions), precomputed)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "precomputed_hits": self.precomputed_hits,
+            "entries": len(self._entries),
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+_cache: Optional[QuestionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_question_cache() -> QuestionCache:
+    """Return the process-wide question cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QuestionCache()
+    return _cache
@@ -0,0 +1,204 @@
+"""
+Rate limiting for upstream LLM calls
+
+All worker processes share one Hugging Face key, so they share one token
+bucket. With LLM_RATE_LIMIT_PATH set the bucket lives in a SQLite file and
+every refill/take runs in an immediate (write-locked) transaction, which
+serializes processes on the host; otherwise it is kept in memory.
+
+Within a process, callers queue by priority: only the highest-priority,
+longest-waiting caller may take the next token. Lower priorities must also
+leave a few tokens in the bucket, so they cannot drain it for another
+process's candidates either.
+"""
+
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import LLM_RATE_LIMIT, LLM_RATE_BURST, LLM_RATE_LIMIT_PATH, LLM_RATE_PRIORITY_RESERVE
+
+
+class Priority:
+    """Upstream call priority classes; lower values are served first"""
+    QUESTIONS = 0  # a candidate is waiting for technical questions
+    DEFAULT = 1
+    LOW = 2  # free-form fallback replies and keep-warm pings
+
+    NAMES = {QUESTIONS: "questions", DEFAULT: "default", LOW: "low"}
+
+
+class RateLimitExceededError(Exception):
+    """Raised when no token became available before the caller's deadline"""
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float, path: str = ""):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            # Autocommit mode, so the explicit BEGIN IMMEDIATE below controls locking
+            self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS token_bucket ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        """
+        Take a token if more than `reserve` would be left over
+
+        Returns 0.0 on success, otherwise the seconds until enough tokens
+        will have accumulated.
+        """
+        with self._lock:
+            if self._db is None:
+                self._tokens, self._updated_at, wait = self._take(self._tokens, self._updated_at, reserve)
+                return wait
+
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT tokens, updated_at FROM token_bucket WHERE name = 'llm'").fetchone()
+                tokens, updated_at = row if row is not None else (self.capacity, time.time())
+                tokens, updated_at, wait = self._take(tokens, updated_at, reserve)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO token_bucket (name, tokens, updated_at) VALUES ('llm', ?, ?)",
+                    (tokens, updated_at)
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return wait
+
+    def _take(self, tokens: float, updated_at: float, reserve: float):
+        # Wall-clock time, since the timestamp is compared across processes
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(now - updated_at, 0.0) * self.rate)
+        needed = 1.0 + min(reserve, self.capacity - 1.0)
+        if tokens >= needed:
+            return tokens - 1.0, now, 0.0
+        return tokens, now, (needed - tokens) / self.rate
+
+
+class PriorityRateLimiter:
+    """
+    Admits callers to a token bucket in priority order, tracking queue depth
+    and time spent waiting per priority class
+    """
+
+    def __init__(self, bucket: Optional[TokenBucket], reserve_per_level: float = LLM_RATE_PRIORITY_RESERVE):
+        self.bucket = bucket
+        self.reserve_per_level = reserve_per_level
+        self.max_queue_depth = 0
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._metrics: Dict[int, Dict[str, float]] = {}
+
+    def acquire(self, priority: int = Priority.DEFAULT, deadline: Optional[float] = None):
+        """
+        Block until this caller may make an upstream call
+
+        `deadline` is a time.monotonic() value.
+
+        Raises:
+            RateLimitExceededError: the deadline passed while queued
+        """
+        if self.bucket is None:
+            return
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+            # A new head may have jumped the queue; let the current one re-check
+            self._condition.notify_all()
+        try:
+            while True:
+                with self._condition:
+                    while self._waiters[0] != entry:
+                        self._condition.wait(self._time_left(priority, started, deadline))
+                # Outside the lock: with a shared bucket this may wait on other processes
+                wait = self.bucket.try_acquire(priority * self.reserve_per_level)
+                with self._condition:
+                    if wait == 0.0:
+                        self._record(priority, time.monotonic() - started, admitted=True)
+                        return
+                    remaining = self._time_left(priority, started, deadline)
+                    # Sleep until the tokens have accumulated, unless overtaken meanwhile
+                    if self._waiters[0] == entry:
+                        self._condition.wait(wait if remaining is None else min(wait, remaining))
+        finally:
+            with self._condition:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def _time_left(self, priority: int, started: float, deadline: Optional[float]) -> Optional[float]:
+        """
+        Seconds until the deadline, None without one; call with the lock held
+
+        Raises:
+            RateLimitExceededError: the deadline has passed
+        """
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._record(priority, time.monotonic() - started, admitted=False)
+            raise RateLimitExceededError("No upstream capacity before the deadline")
+        return remaining
+
+    def _record(self, priority: int, waited: float, admitted: bool):
+        metrics = self._metrics.setdefault(
+            priority, {"admitted": 0, "timed_out": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        )
+        metrics["admitted" if admitted else "timed_out"] += 1
+        metrics["wait_seconds"] += waited
+        metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited)
+
+    def stats(self) -> Dict:
+        """Queue depth and wait times per priority class"""
+        with self._condition:
+            classes = {}
+            for priority, metrics in sorted(self._metrics.items()):
+                calls = metrics["admitted"] + metrics["timed_out"]
+                classes[Priority.NAMES.get(priority, str(priority))] = {
+                    "admitted": metrics["admitted"],
+                    "timed_out": metrics["timed_out"],
+                    "average_wait_seconds": round(metrics["wait_seconds"] / calls, 3) if calls else 0.0,
+                    "max_wait_seconds": round(metrics["max_wait_seconds"], 3)
+                }
+            return {
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "classes": classes
+            }
+
+
+_limiter: Optional[PriorityRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> PriorityRateLimiter:
+    """Return the process-wide limiter; it admits everything when LLM_RATE_LIMIT is 0"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                bucket = None
+                if LLM_RATE_LIMIT > 0:
+                    bucket = TokenBucket(LLM_RATE_LIMIT, max(LLM_RATE_BURST, 1), LLM_RATE_LIMIT_PATH)
+                _limiter = PriorityRateLimiter(bucket)
+    return _limiter
@@ -0,0 +1,234 @@
+"""
+Tiered replies to off-script input
+
+Tier 1 answers common off-script messages ("why do you need my phone?",
+"are you a bot?") from precompiled intent patterns and templates, per
+conversation state. Only when no rule is confident enough does the chatbot
+escalate to tier 2, the LLM, and when that is unavailable tier 3 replies
+with a static reminder of what is being asked. Hits and latency are counted
+per tier so the upstream calls avoided can be tracked.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional, Pattern, Tuple
+
+from config import ConversationState, RESPONSE_RULE_MIN_CONFIDENCE, RESPONSE_RULE_MAX_WORDS
+
+TIER_RULES = "rules"
+TIER_LLM = "llm"
+TIER_STATIC = "static"
+TIERS = (TIER_RULES, TIER_LLM, TIER_STATIC)
+
+# Intents of the extra collection steps declared by role flows (see conversation_flow.py)
+CUSTOM_FIELD_STATE = "collecting_custom_field"
+
+COLLECTION_STATES = frozenset({
+    ConversationState.COLLECTING_NAME, ConversationState.COLLECTING_EMAIL,
+    ConversationState.COLLECTING_PHONE, ConversationState.COLLECTING_EXPERIENCE,
+    ConversationState.COLLECTING_POSITION, ConversationState.COLLECTING_LOCATION,
+    ConversationState.COLLECTING_TECH_STACK, CUSTOM_FIELD_STATE
+})
+SCREENING_STATES = COLLECTION_STATES | {ConversationState.ASKING_QUESTIONS}
+
+# What each state asks for; rule templates end with it so the conversation moves on
+STATE_PROMPTS = {
+    ConversationState.COLLECTING_NAME: "Could you please tell me your full name (first and last name)?",
+    ConversationState.COLLECTING_EMAIL: "Could you please provide your email address?",
+    ConversationState.COLLECTING_PHONE: "Please provide a 10-digit phone number.",
+    ConversationState.COLLECTING_EXPERIENCE: "How many years of professional experience do you have?",
+    ConversationState.COLLECTING_POSITION: "What position(s) are you interested in?",
+    ConversationState.COLLECTING_LOCATION: "Where are you currently located (city, state, or country)?",
+    ConversationState.COLLECTING_TECH_STACK: "Please list your tech stack: at least 4 technical skills and 2 soft skills.",
+    ConversationState.ASKING_QUESTIONS: "Please answer the current technical question in your own words.",
+    ConversationState.COMPLETED: "Our technical team will review your responses within 2-3 business days, and you'll receive an email update about your application status."
+}
+
+# Input shaped like a question: ends in "?" or starts with an interrogative,
+# possibly after a filler word ("sorry, can you ...")
+QUESTION_PATTERN = re.compile(
+    r"\?\s*$|^\s*(?:(?:sorry|please|ok|okay|so|and|but|um+|uh+|hey|excuse me)[,.!]?\s+)*"
+    r"(who|whom|whose|what|why|how|when|where|which|can|could|would|will|"
+    r"should|shall|may|is|are|am|do|does|did)\b",
+    re.IGNORECASE
+)
+
+# Why each field is collected
+FIELD_REASONS = {
+    ConversationState.COLLECTING_NAME: "so our recruiters know who they're speaking with",
+    ConversationState.COLLECTING_EMAIL: "so our team can send you updates about your application",
+    ConversationState.COLLECTING_PHONE: "so a recruiter can reach you to schedule interviews",
+    ConversationState.COLLECTING_EXPERIENCE: "to match you with roles and questions at the right level",
+    ConversationState.COLLECTING_POSITION: "to match you with suitable openings",
+    ConversationState.COLLECTING_LOCATION: "to find roles in or near your area, or remote ones",
+    ConversationState.COLLECTING_TECH_STACK: "to tailor the technical questions to your skills"
+}
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    """An intent pattern, its reply template and the states it applies in"""
+    name: str
+    pattern: str
+    template: str
+    confidence: float
+    states: FrozenSet[str]
+
+
+INTENT_RULES = [
+    IntentRule(
+        "why_needed",
+        r"\bwhy\b.{0,40}\b(need|want|ask|require)\w*|\bwhat(?: is|'s) (?:this|that|it) for\b|^\s*what for\b",
+        "We ask for this {reason}. {prompt}", 0.9, COLLECTION_STATES
+    ),
+    IntentRule(
+        "privacy",
+        r"\b(privacy|gdpr|personal data)\b|\b(is|will) my (data|information|info|details)\b"
+        r"|\bwho (will )?(see|sees|has access)\b|\bdo you (store|share|sell)\b",
+        "Your information is used only for this screening and is shared only with the TalentScout "
+        "recruiting team. {prompt}", 0.9, COLLECTION_STATES | {ConversationState.COMPLETED}
+    ),
+    IntentRule(
+        "identity",
+        r"\b(who|what) are you\b|\bare you (a |an )?(bot|robot|human|real person|ai)\b",
+        "I'm the TalentScout Hiring Assistant, an automated assistant that runs the initial screening "
+        "before a recruiter reviews your profile. {prompt}", 0.95, COLLECTION_STATES | {ConversationState.COMPLETED}
+    ),
+    IntentRule(
+        "help",
+        r"^\s*(help|\?+)\s*[.!?]*\s*$|\bwhat (do|should) i (do|say|type|enter|write)\b"
+        r"|\bi(?:'m| am) (confused|lost|not sure what)\b|\bhow does this work\b",
+        "No problem! {prompt}", 0.85, SCREENING_STATES
+    ),
+    IntentRule(
+        "duration",
+        r"\bhow long (will|does|is) (this|it)\b|\bhow many (more )?(steps|questions)\b",
+        "The screening takes about 5-10 minutes: a few details about you, then 3-5 technical "
+        "questions. {prompt}", 0.85, COLLECTION_STATES | {ConversationState.COMPLETED}
+    ),
+    IntentRule(
+        "repeat",
+        r"\b(repeat|say (that|it) again)\b|\bwhat was the question\b|\bdidn'?t (get|understand) (that|the question)\b",
+        "Sure! {prompt}", 0.9, SCREENING_STATES
+    ),
+    IntentRule(
+        "human",
+        r"\b(talk|speak|chat) (to|with) (a |an )?(human|person|recruiter|someone)\b",
+        "A TalentScout recruiter will contact you personally once the screening is complete. {prompt}",
+        0.9, COLLECTION_STATES | {ConversationState.COMPLETED}
+    ),
+    IntentRule(
+        "thanks",
+        r"^\s*(thanks|thank you|thx|ty|cheers)\b",
+        "You're welcome! {prompt}", 0.95, frozenset({ConversationState.COMPLETED})
+    ),
+    IntentRule(
+        "greeting",
+        r"^\s*(hi|hello|hey)\b",
+        "Hello again! Your screening is complete. {prompt}", 0.9, frozenset({ConversationState.COMPLETED})
+    ),
+    IntentRule(
+        "next_steps",
+        r"\bnext steps?\b|\bhear back\b|\bwhen will\b|\b(application )?(status|result|outcome)\b",
+        "{prompt}", 0.9, frozenset({ConversationState.COMPLETED})
+    ),
+]
+
+
+class ResponseEngine:
+    """Intent rules compiled into one alternation per conversation state, plus per-tier metrics"""
+
+    def __init__(self, rules: Iterable[IntentRule] = INTENT_RULES,
+                 min_confidence: float = RESPONSE_RULE_MIN_CONFIDENCE,
+                 max_words: int = RESPONSE_RULE_MAX_WORDS):
+        self.rules = list(rules)
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self._patterns: Dict[str, Pattern] = {}
+        states = set().union(*(rule.states for rule in self.rules)) if self.rules else set()
+        for state in states:
+            alternatives = [
+                f"(?P<r{index}>{rule.pattern})" for index, rule in enumerate(self.rules) if state in rule.states
+            ]
+            self._patterns[state] = re.compile('|'.join(alternatives), re.IGNORECASE)
+        self._lock = threading.Lock()
+        self._hits = {tier: 0 for tier in TIERS}
+        self._seconds = {tier: 0.0 for tier in TIERS}
+        self.escalations_avoided = 0
+
+    def match(self, state: str, text: str) -> Optional[Tuple[IntentRule, float]]:
+        """
+        Best matching rule and its confidence, or None
+
+        Confidence drops for messages longer than `max_words`: the longer the
+        message, the less a keyword match says about what it is about.
+        """
+        pattern = self._patterns.get(state)
+        if pattern is None:
+            return None
+        best = None
+        for found in pattern.finditer(text):
+            rule = self.rules[int(found.lastgroup[1:])]
+            if best is None or rule.confidence > best.confidence:
+                best = rule
+        if best is None:
+            return None
+        words = len(text.split())
+        confidence = best.confidence * min(1.0, self.max_words / words) if words else best.confidence
+        return best, confidence
+
+    def respond(self, state: str, text: str, prompt: Optional[str] = None) -> Optional[str]:
+        """The tier 1 reply for a message, or None when it should go to the next tier"""
+        matched = self.match(state, text)
+        if matched is None or matched[1] < self.min_confidence:
+            return None
+        rule, _ = matched
+        return rule.template.format(
+            prompt=prompt or STATE_PROMPTS.get(state, ""),
+            reason=FIELD_REASONS.get(state, "to complete your screening")
+        ).strip()
+
+    def static_response(self, state: str, prompt: Optional[str] = None) -> str:
+        """Tier 3: a reminder of what the current step needs"""
+        return f"I'm here to assist with your screening process. {prompt or STATE_PROMPTS.get(state, '')}".strip()
+
+    def record(self, tier: str, seconds: float, escalation_avoided: bool = False):
+        """Count a reply served by `tier`"""
+        with self._lock:
+            self._hits[tier] += 1
+            self._seconds[tier] += seconds
+            self.escalations_avoided += escalation_avoided
+
+    def stats(self) -> Dict:
+        """Hits, share of replies and mean latency per tier, and LLM calls avoided"""
+        with self._lock:
+            total = sum(self._hits.values())
+            tiers = {
+                tier: {
+                    "hits": self._hits[tier],
+                    "hit_rate": round(self._hits[tier] / total, 3) if total else 0.0,
+                    "average_ms": round(self._seconds[tier] / self._hits[tier] * 1000, 3) if self._hits[tier] else 0.0
+                }
+                for tier in TIERS
+            }
+            return {"tiers": tiers, "llm_calls_avoided": self.escalations_avoided}
+
+
+def is_question(text: str) -> bool:
+    """Whether a message is clearly a question rather than an answer"""
+    return QUESTION_PATTERN.search(text) is not None
+
+
+_engine: Optional[ResponseEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_response_engine() -> ResponseEngine:
+    """Return the process-wide response engine"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ResponseEngine()
+    return _engine
@@ -0,0 +1,250 @@
+"""
+Conversation state storage
+
+The chatbot keeps everything it knows about a conversation in a SessionState
+and reads/writes it through a session store, so the same engine runs inside
+Streamlit, headless (scripts, benchmarks, an API server) and across worker
+processes. Stores:
+
+- StreamlitSessionStore: the browser session's st.session_state
+- MemorySessionStore: a dict in this process
+- SQLiteSessionStore: a SQLite file every worker process on the host shares
+
+A turn loads the state, works on it and saves it back; with SQLite, the last
+save of a session wins if two processes handle it at the same time.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from config import ConversationState, SESSION_STORE, SESSION_STORE_PATH, SESSION_TTL
+from conversation_flow import DEFAULT_FLOW
+
+
+@dataclass
+class SessionStats:
+    """
+    Counters of one conversation, updated as it goes so that reading them is O(1)
+
+    Time per step is wall-clock seconds spent in each conversation state, so
+    it adds up across the processes that handle the session.
+    """
+    user_messages: int = 0
+    assistant_messages: int = 0
+    questions_answered: int = 0
+    technical_skills: int = 0
+    soft_skills: int = 0
+    step_seconds: Dict[str, float] = field(default_factory=dict)
+    # The state being timed and when it was entered
+    current_step: Optional[str] = None
+    step_started_at: Optional[float] = None
+
+    @property
+    def total_messages(self) -> int:
+        return self.user_messages + self.assistant_messages
+
+    def record_message(self, role: str):
+        if role == "user":
+            self.user_messages += 1
+        else:
+            self.assistant_messages += 1
+
+    def enter_step(self, step: str, now: Optional[float] = None):
+        """Start timing `step`, adding the time spent in the previous one to its total"""
+        if step == self.current_step:
+            return
+        now = time.time() if now is None else now
+        if self.current_step is not None and self.step_started_at is not None:
+            self.step_seconds[self.current_step] = (
+                self.step_seconds.get(self.current_step, 0.0) + now - self.step_started_at
+            )
+        self.current_step = step
+        self.step_started_at = now
+
+    def step_durations(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Seconds spent per step, including the time in the current one so far"""
+        durations = dict(self.step_seconds)
+        if self.current_step is not None and self.step_started_at is not None:
+            now = time.time() if now is None else now
+            durations[self.current_step] = durations.get(self.current_step, 0.0) + now - self.step_started_at
+        return durations
+
+
+@dataclass
+class SessionState:
+    """Everything the chatbot tracks about one candidate's conversation"""
+    conversation_state: str = ConversationState.GREETING
+    candidate_data: Dict = field(default_factory=dict)
+    technical_questions: List[str] = field(default_factory=list)
+    current_question_index: int = 0
+    chat_history: List[Dict] = field(default_factory=list)
+    # Wall-clock time background question generation started, while it runs
+    questions_requested_at: Optional[float] = None
+    # Name of the screening flow the candidate follows (see conversation_flow.py)
+    flow: str = DEFAULT_FLOW
+    stats: SessionStats = field(default_factory=SessionStats)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> "SessionState":
+        values = json.loads(data)
+        stats = values.pop("stats", None)
+        state = cls(**{name: value for name, value in values.items() if name in cls.__dataclass_fields__})
+        if stats is not None:
+            state.stats = SessionStats(**{
+                name: value for name, value in stats.items() if name in SessionStats.__dataclass_fields__
+            })
+        else:
+            # Saved before sessions kept statistics: count what the history shows
+            for message in state.chat_history:
+                state.stats.record_message(message["role"])
+            state.stats.questions_answered = len(state.candidate_data.get("technical_answers", []))
+        return state
+
+
+class SessionStore(ABC):
+    """Loads and saves SessionState by session id"""
+
+    @abstractmethod
+    def load(self, session_id: str) -> SessionState:
+        """Return the session's state, a fresh one for an unknown session"""
+
+    @abstractmethod
+    def save(self, session_id: str, state: SessionState):
+        """Store the session's state"""
+
+    @abstractmethod
+    def exists(self, session_id: str) -> bool:
+        """Whether the session has any state"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Discard the session's state"""
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions held in this process; load() hands out the live object"""
+
+    def __init__(self):
+        self._sessions: Dict[str, SessionState] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> SessionState:
+        with self._lock:
+            return self._sessions.setdefault(session_id, SessionState())
+
+    def save(self, session_id: str, state: SessionState):
+        with self._lock:
+            self._sessions[session_id] = state
+
+    def exists(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class StreamlitSessionStore(SessionStore):
+    """
+    The state of the current browser session, kept in st.session_state
+
+    A Streamlit session holds one conversation, so the session id is ignored.
+    """
+
+    KEY = "conversation"
+
+    def __init__(self):
+        # Imported here so that the headless stores work without Streamlit
+        import streamlit as st
+        self._session_state = st.session_state
+
+    def load(self, session_id: str) -> SessionState:
+        if self.KEY not in self._session_state:
+            self._session_state[self.KEY] = SessionState()
+        return self._session_state[self.KEY]
+
+    def save(self, session_id: str, state: SessionState):
+        self._session_state[self.KEY] = state
+
+    def exists(self, session_id: str) -> bool:
+        return self.KEY in self._session_state
+
+    def delete(self, session_id: str):
+        self._session_state.pop(self.KEY, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions serialized as JSON rows of a SQLite file"""
+
+    def __init__(self, path: str = SESSION_STORE_PATH, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - ttl,))
+        self._db.commit()
+
+    def load(self, session_id: str) -> SessionState:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl)
+            ).fetchone()
+        return SessionState.from_json(row[0]) if row is not None else SessionState()
+
+    def save(self, session_id: str, state: SessionState):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)",
+                (session_id, state.to_json(), time.time())
+            )
+            self._db.commit()
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl)
+            ).fetchone() is not None
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def create_session_store(kind: str = SESSION_STORE, path: str = SESSION_STORE_PATH) -> SessionStore:
+    """Build a session store of the given kind (streamlit, memory or sqlite)"""
+    if kind == "streamlit":
+        return StreamlitSessionStore()
+    if kind == "memory":
+        return MemorySessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionStore(path)
+    raise ValueError(f"Unknown session store {kind!r}; expected streamlit, memory or sqlite")
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store configured by SESSION_STORE"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_session_store()
+    return _store
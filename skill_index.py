@@ -0,0 +1,326 @@
+"""
+Precompiled skill matching for TalentScout Hiring Assistant
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config import (
+    TECH_CATEGORIES, SOFT_SKILL_KEYWORDS, SKILL_PARSE_CACHE_SIZE, SKILL_ALIASES,
+    FUZZY_MATCH_MAX_DISTANCE, FUZZY_MATCH_MIN_LENGTH
+)
+from skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+
+# Characters that separate skills in a candidate's tech stack
+SKILL_SEPARATORS = frozenset(',;|\n')
+
+SOFT_SKILL_CATEGORY = "soft_skills"
+OTHER_CATEGORY = "other"
+
+_NO_RANK = 1 << 30
+
+
+def bounded_edit_distance(source: str, target: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit"""
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    previous = list(range(len(target) + 1))
+    for row, source_char in enumerate(source, 1):
+        current = [row]
+        row_min = row
+        for column, target_char in enumerate(target, 1):
+            cost = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (source_char != target_char)
+            )
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzySkillIndex:
+    """
+    Trigram index for resolving misspelled skill names.
+
+    Candidates are the terms sharing enough padded trigrams with the query to
+    be within the distance limit (q-gram count filter); only those are
+    verified with a bounded edit distance.
+    """
+
+    def __init__(self, terms: Iterable[str], max_distance: int = FUZZY_MATCH_MAX_DISTANCE,
+                 min_length: int = FUZZY_MATCH_MIN_LENGTH):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self._terms: List[str] = sorted(set(term.lower() for term in terms))
+        self._postings: Dict[str, List[int]] = {}
+        for term_id, term in enumerate(self._terms):
+            for gram in set(self._trigrams(term)):
+                self._postings.setdefault(gram, []).append(term_id)
+
+    @staticmethod
+    def _trigrams(text: str) -> List[str]:
+        padded = f"  {text} "
+        return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    def lookup(self, token: str) -> Optional[Tuple[str, int]]:
+        """Return (closest term, distance) within the limit, or None"""
+        limit = min(self.max_distance, len(token) // 3)
+        if len(token) < self.min_length or limit <= 0:
+            return None
+
+        grams = self._trigrams(token)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for term_id in self._postings.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        best = None
+        best_distance = limit + 1
+        for term_id, count in shared.items():
+            term = self._terms[term_id]
+            # Each edit destroys at most three trigrams
+            if count < max(len(grams), len(term) + 1) - 3 * limit:
+                continue
+            distance = bounded_edit_distance(token, term, min(limit, best_distance))
+            if distance < best_distance or (distance == best_distance and best is not None and term < best):
+                best, best_distance = term, distance
+        if best is None or best_distance > limit:
+            return None
+        return best, best_distance
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over the skill vocabulary.
+
+    Categorizes every skill in a tech stack string in a single pass. Any
+    soft-skill keyword inside a skill makes it a soft skill. Otherwise an exact
+    entry in the external taxonomy (if one is configured), an exact term or
+    alias, then a close misspelling (see FuzzySkillIndex), resolves to the
+    canonical term. Remaining skills belong to the first category (in
+    taxonomy order) having a term that is a substring of the skill or that the
+    skill is a substring of, the original `tech in item or item in tech` rule.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], soft_skill_keywords: Iterable[str],
+                 aliases: Optional[Dict[str, str]] = None, fuzzy: bool = True,
+                 taxonomy_loader: Optional[Callable[[], Optional[SkillTaxonomy]]] = None):
+        self.category_names = list(categories.keys())
+        self._taxonomy_loader = taxonomy_loader
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._rank: List[int] = [_NO_RANK]
+        self._soft: List[bool] = [False]
+        # Every substring of every term -> best category rank ("item in tech").
+        # That is O(L^2) entries and build time per term of length L, so a large
+        # vocabulary with long terms costs memory here (~215k fragments at 10k terms)
+        self._fragment_rank: Dict[str, int] = {}
+
+        for rank, terms in enumerate(categories.values()):
+            for term in terms:
+                term = term.lower()
+                state = self._insert(term)
+                self._rank[state] = min(self._rank[state], rank)
+                for start in range(len(term)):
+                    for end in range(start + 1, len(term) + 1):
+                        fragment = term[start:end]
+                        if self._fragment_rank.get(fragment, _NO_RANK) > rank:
+                            self._fragment_rank[fragment] = rank
+
+        for keyword in soft_skill_keywords:
+            self._soft[self._insert(keyword.lower())] = True
+
+        self._build_failure_links()
+
+        # Exact term/alias -> (canonical term, best category rank)
+        self._exact: Dict[str, Tuple[str, int]] = {}
+        for rank, terms in enumerate(categories.values()):
+            for term in terms:
+                term = term.lower()
+                if term not in self._exact:
+                    self._exact[term] = (term, rank)
+        for alias, term in (aliases or {}).items():
+            if term.lower() in self._exact:
+                self._exact.setdefault(alias.lower(), self._exact[term.lower()])
+
+        self._fuzzy = FuzzySkillIndex(self._exact.keys()) if fuzzy else None
+
+    def _insert(self, term: str) -> int:
+        """Add a term to the trie and return its terminal state"""
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._rank.append(_NO_RANK)
+                self._soft.append(False)
+                self._goto[state][char] = next_state
+            state = next_state
+        return state
+
+    def _build_failure_links(self):
+        """Compute failure links and fold outputs along them (BFS order)"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._rank[next_state] = min(self._rank[next_state], self._rank[self._fail[next_state]])
+                self._soft[next_state] = self._soft[next_state] or self._soft[self._fail[next_state]]
+                queue.append(next_state)
+
+    def categorize(self, tech_stack: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        Split a tech stack string into skills and categorize each one.
+
+        Returns (skill, category) pairs in input order. Skills resolved by
+        exact, alias or fuzzy match are reported by their canonical term;
+        category is SOFT_SKILL_CATEGORY for soft skills and None when no term
+        matches.
+        """
+        text = tech_stack.lower()
+        goto, fail, rank_of, soft_of = self._goto, self._fail, self._rank, self._soft
+        results = []
+        state = 0
+        start = 0
+        best_rank = _NO_RANK
+        is_soft = False
+
+        for index, char in enumerate(text):
+            if char in SKILL_SEPARATORS:
+                self._emit(results, text[start:index], best_rank, is_soft)
+                state, start, best_rank, is_soft = 0, index + 1, _NO_RANK, False
+                continue
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if rank_of[state] < best_rank:
+                best_rank = rank_of[state]
+            if soft_of[state]:
+                is_soft = True
+
+        self._emit(results, text[start:], best_rank, is_soft)
+        return results
+
+    def _emit(self, results: List[Tuple[str, Optional[str]]], segment: str, best_rank: int, is_soft: bool):
+        """Resolve the category of one skill and append it to results"""
+        item = segment.strip()
+        if not item:
+            return
+        if is_soft:
+            results.append((item, SOFT_SKILL_CATEGORY))
+            return
+        resolved = self.resolve(item)
+        if resolved is not None:
+            results.append(resolved)
+            return
+        best_rank = min(best_rank, self._fragment_rank.get(item, _NO_RANK))
+        category = self.category_names[best_rank] if best_rank != _NO_RANK else None
+        results.append((item, category))
+
+    def resolve(self, item: str) -> Optional[Tuple[str, str]]:
+        """Map a skill to (canonical term, category) by taxonomy, exact, alias or fuzzy match"""
+        taxonomy = self._taxonomy_loader() if self._taxonomy_loader else None
+        if taxonomy is not None:
+            found = taxonomy.lookup(item)
+            if found is not None:
+                return found
+        exact = self._exact.get(item)
+        if exact is None and self._fuzzy is not None:
+            match = self._fuzzy.lookup(item)
+            exact = self._exact[match[0]] if match else None
+        if exact is None:
+            return None
+        # The external taxonomy also decides the category of built-in terms
+        found = taxonomy.lookup(exact[0]) if taxonomy is not None else None
+        return found or (exact[0], self.category_names[exact[1]])
+
+
+def build_skill_matcher(categories: Optional[Dict[str, List[str]]] = None,
+                        soft_skill_keywords: Optional[Iterable[str]] = None,
+                        fuzzy: bool = True) -> SkillMatcher:
+    """Build a skill matcher over the given (or configured) taxonomy"""
+    return SkillMatcher(
+        categories if categories is not None else TECH_CATEGORIES,
+        soft_skill_keywords if soft_skill_keywords is not None else SOFT_SKILL_KEYWORDS,
+        aliases=SKILL_ALIASES if categories is None else None,
+        fuzzy=fuzzy,
+        taxonomy_loader=get_skill_taxonomy if categories is None else None
+    )
+
+
+@dataclass(frozen=True)
+class SkillProfile:
+    """Immutable result of parsing one tech stack string"""
+    tokens: Tuple[str, ...]
+    categories: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    technical_skills: Tuple[str, ...]
+    soft_skills: Tuple[str, ...]
+
+    @property
+    def technical_count(self) -> int:
+        return len(self.technical_skills)
+
+    @property
+    def soft_count(self) -> int:
+        return len(self.soft_skills)
+
+    def as_dict(self, include_empty: bool = False) -> Dict[str, List[str]]:
+        """Return the categories as a fresh, mutable dict of lists"""
+        return {
+            category: list(skills)
+            for category, skills in self.categories
+            if skills or include_empty
+        }
+
+
+_MATCHER = build_skill_matcher()
+
+
+def parse_skills(tech_stack: str) -> SkillProfile:
+    """Tokenize and categorize a tech stack, reusing cached results for repeated input"""
+    return _parse_normalized(tech_stack.strip().lower())
+
+
+@lru_cache(maxsize=SKILL_PARSE_CACHE_SIZE)
+def _parse_normalized(tech_stack: str) -> SkillProfile:
+    """Build the SkillProfile for an already normalized tech stack"""
+    categorized = {category: [] for category in _MATCHER.category_names}
+    soft_skills = []
+    uncategorized = []
+
+    tokens = _MATCHER.categorize(tech_stack)
+    for item, category in tokens:
+        if category == SOFT_SKILL_CATEGORY:
+            soft_skills.append(item)
+            continue
+        if category is None:
+            uncategorized.append(item)
+        elif item not in categorized.setdefault(category, []):
+            categorized[category].append(item)
+
+    if uncategorized:
+        categorized[OTHER_CATEGORY] = uncategorized
+    if soft_skills:
+        categorized[SOFT_SKILL_CATEGORY] = soft_skills
+
+    return SkillProfile(
+        tokens=tuple(item for item, _ in tokens),
+        categories=tuple((category, tuple(skills)) for category, skills in categorized.items()),
+        technical_skills=tuple(skill for category, skills in categorized.items()
+                               if category != SOFT_SKILL_CATEGORY for skill in skills),
+        soft_skills=tuple(soft_skills)
+    )
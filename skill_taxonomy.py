@@ -0,0 +1,156 @@
+"""
+Compact on-disk skill taxonomy for TalentScout Hiring Assistant
+
+A taxonomy source is a CSV file with the columns ``skill,category,aliases``
+(aliases separated by ``|``). It is compiled once into a binary file that is
+memory-mapped read-only, so every Streamlit worker process shares the same
+pages through the OS page cache instead of building its own dictionaries.
+
+Binary layout (little-endian):
+    header      magic, version, category count, entry count, category table size
+    categories  newline separated UTF-8 category names
+    entries     fixed-size records sorted by key bytes:
+                key offset (u32), key length (u16), category id (u16), canonical entry (u32)
+    strings     concatenated UTF-8 keys
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config import SKILL_TAXONOMY_PATH
+
+_MAGIC = b"TSTX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIIII")
+_ENTRY = struct.Struct("<IHHI")
+
+
+def compile_taxonomy(source_path: str, output_path: str) -> int:
+    """Compile a taxonomy CSV into the binary format and return the entry count"""
+    categories: List[str] = []
+    category_ids: Dict[str, int] = {}
+    # key -> (category id, canonical key); the first occurrence of a key wins
+    entries: Dict[str, Tuple[int, str]] = {}
+    aliases: List[Tuple[str, str]] = []
+
+    with open(source_path, newline='', encoding='utf-8') as source:
+        for row in csv.DictReader(source):
+            skill = (row.get('skill') or '').strip().lower()
+            category = (row.get('category') or '').strip().lower()
+            if not skill or not category:
+                continue
+            if category not in category_ids:
+                category_ids[category] = len(categories)
+                categories.append(category)
+            entries.setdefault(skill, (category_ids[category], skill))
+            for alias in (row.get('aliases') or '').split('|'):
+                alias = alias.strip().lower()
+                if alias:
+                    aliases.append((alias, skill))
+
+    for alias, skill in aliases:
+        entries.setdefault(alias, (entries[skill][0], skill))
+
+    keys = sorted(entries, key=lambda key: key.encode('utf-8'))
+    positions = {key: index for index, key in enumerate(keys)}
+    category_blob = '\n'.join(categories).encode('utf-8')
+
+    records = bytearray()
+    strings = bytearray()
+    for key in keys:
+        encoded = key.encode('utf-8')
+        category_id, canonical = entries[key]
+        records += _ENTRY.pack(len(strings), len(encoded), category_id, positions[canonical])
+        strings += encoded
+
+    temporary_path = f"{output_path}.tmp"
+    with open(temporary_path, 'wb') as output:
+        output.write(_HEADER.pack(_MAGIC, _VERSION, len(categories), len(keys), len(category_blob)))
+        output.write(category_blob)
+        output.write(records)
+        output.write(strings)
+    # Atomic replace so running processes never map a half-written file
+    os.replace(temporary_path, output_path)
+    return len(keys)
+
+
+class SkillTaxonomy:
+    """Read-only, memory-mapped view of a compiled taxonomy"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, category_count, self.entry_count, category_size = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a compiled skill taxonomy")
+
+        categories_start = _HEADER.size
+        self.categories = self._map[categories_start:categories_start + category_size].decode('utf-8').split('\n')
+        if category_count == 0:
+            self.categories = []
+        self._entries_start = categories_start + category_size
+        self._strings_start = self._entries_start + self.entry_count * _ENTRY.size
+
+    def _entry(self, index: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._map, self._entries_start + index * _ENTRY.size)
+
+    def _key(self, offset: int, length: int) -> bytes:
+        start = self._strings_start + offset
+        return self._map[start:start + length]
+
+    def lookup(self, skill: str) -> Optional[Tuple[str, str]]:
+        """Return (canonical skill, category) for a skill or alias, or None"""
+        target = skill.encode('utf-8')
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, category_id, canonical = self._entry(middle)
+            key = self._key(offset, length)
+            if key < target:
+                low = middle + 1
+            elif key > target:
+                high = middle
+            else:
+                if canonical != middle:
+                    offset, length, _, _ = self._entry(canonical)
+                    key = self._key(offset, length)
+                return key.decode('utf-8'), self.categories[category_id]
+        return None
+
+    def close(self):
+        self._map.close()
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_loaded = False
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> Optional[SkillTaxonomy]:
+    """Open the configured taxonomy on first use; None when none is configured"""
+    global _taxonomy, _taxonomy_loaded
+    if not _taxonomy_loaded:
+        with _taxonomy_lock:
+            if not _taxonomy_loaded:
+                if SKILL_TAXONOMY_PATH and os.path.exists(SKILL_TAXONOMY_PATH):
+                    _taxonomy = SkillTaxonomy(SKILL_TAXONOMY_PATH)
+                _taxonomy_loaded = True
+    return _taxonomy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a skill taxonomy CSV (skill,category,aliases)")
+    parser.add_argument("source", help="Taxonomy CSV file")
+    parser.add_argument("output", help="Compiled taxonomy file")
+    args = parser.parse_args()
+    count = compile_taxonomy(args.source, args.output)
+    print(f"Compiled {count} skills and aliases into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
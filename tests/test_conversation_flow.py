@@ -0,0 +1,44 @@
+"""
+Role flow selection by desired position
+"""
+
+import json
+import os
+
+import pytest
+
+import conversation_flow
+from conversation_flow import DEFAULT_FLOW, DEFAULT_STEPS, compile_flows, get_flow, select_flow
+
+EXAMPLE_FLOWS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "conversation_flows.example.json")
+
+
+@pytest.fixture
+def example_flows(monkeypatch):
+    with open(EXAMPLE_FLOWS, encoding="utf-8") as file:
+        monkeypatch.setattr(conversation_flow, "_flows", compile_flows(DEFAULT_STEPS, json.load(file)))
+
+
+def test_default_screening_has_no_role_flows():
+    assert select_flow({"position": "Senior Backend Developer"}) == DEFAULT_FLOW
+    assert get_flow().total_steps == 10
+
+
+@pytest.mark.parametrize("position", [
+    "Senior Backend Developer", "Sr. Data Engineer", "Tech Lead", "Principal Engineer",
+    "Staff Engineer", "Staff Software Engineer", "Engineering Manager", "Head of Platform",
+    "Director of Engineering"
+])
+def test_senior_positions_get_the_example_senior_flow(example_flows, position):
+    assert select_flow({"position": position}) == "senior"
+
+
+@pytest.mark.parametrize("position", [
+    "Product Manager", "Project Manager", "Staff accountant", "Python Developer", "Data Analyst"
+])
+def test_other_positions_get_the_default_flow(example_flows, position):
+    assert select_flow({"position": position}) == DEFAULT_FLOW
+
+
+def test_no_position_gets_the_default_flow(example_flows):
+    assert select_flow({}) == DEFAULT_FLOW
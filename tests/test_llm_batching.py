@@ -0,0 +1,119 @@
+"""
+Request coalescing: deduplication, batching and overflow
+"""
+
+import threading
+import time
+
+from llm_batching import RequestCoalescer
+from rate_limiter import Priority
+
+URL = "http://endpoint"
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+
+    def json(self):
+        if isinstance(self.inputs, str):
+            return [{"generated_text": f"reply to {self.inputs}"}]
+        return [[{"generated_text": f"reply to {prompt}"}] for prompt in self.inputs]
+
+
+class StubClient:
+    """Records each upstream call's inputs and priority"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def post(self, url, payload, deadline=None, priority=Priority.DEFAULT):
+        self.calls.append((payload["inputs"], priority))
+        time.sleep(self.delay)
+        return StubResponse(payload["inputs"])
+
+
+def _ask_all(coalescer, prompts, priorities=None):
+    """Submit prompts from threads, waiting until each is queued; returns (threads, results)"""
+    results = {}
+    threads = []
+    for index, prompt in enumerate(prompts):
+        priority = priorities[index] if priorities else Priority.DEFAULT
+
+        def ask(index=index, prompt=prompt, priority=priority):
+            results[index] = coalescer.generate(URL, {"inputs": prompt}, deadline=time.monotonic() + 5,
+                                                priority=priority)
+
+        thread = threading.Thread(target=ask)
+        thread.start()
+        threads.append(thread)
+        while coalescer.stats()["prompts"] < index + 1:
+            time.sleep(0.001)
+    return threads, results
+
+
+def _hold_dispatch(coalescer):
+    # A placeholder dispatcher keeps generate() from starting the real one
+    coalescer._dispatcher = threading.current_thread()
+
+
+def _release_dispatch(coalescer):
+    with coalescer._condition:
+        coalescer._dispatcher = None
+        coalescer._ensure_dispatcher()
+        coalescer._condition.notify()
+
+
+def test_identical_prompts_share_one_upstream_input():
+    client = StubClient()
+    coalescer = RequestCoalescer(client, max_batch_size=8, max_wait=0.05)
+    _hold_dispatch(coalescer)
+    threads, results = _ask_all(coalescer, ["hello", "hello", "bye"])
+    _release_dispatch(coalescer)
+    for thread in threads:
+        thread.join(2)
+    assert results == {0: "reply to hello", 1: "reply to hello", 2: "reply to bye"}
+    assert client.calls == [(["hello", "bye"], Priority.DEFAULT)]
+    assert coalescer.stats()["deduplicated"] == 1
+
+
+def test_prompts_past_the_size_limit_overflow_into_the_next_batch():
+    client = StubClient()
+    coalescer = RequestCoalescer(client, max_batch_size=2, max_wait=0.05, senders=1)
+    _hold_dispatch(coalescer)
+    prompts = [f"p{index}" for index in range(5)]
+    threads, results = _ask_all(coalescer, prompts)
+    _release_dispatch(coalescer)
+    for thread in threads:
+        thread.join(2)
+    assert results == {index: f"reply to {prompt}" for index, prompt in enumerate(prompts)}
+    assert sorted(len(inputs) if isinstance(inputs, list) else 1 for inputs, _ in client.calls) == [1, 2, 2]
+    stats = coalescer.stats()
+    assert stats["batches"] == 3 and stats["largest_batch"] == 2 and stats["upstream_calls_saved"] == 2
+
+
+def test_a_batch_takes_the_highest_priority_of_its_prompts():
+    client = StubClient()
+    coalescer = RequestCoalescer(client, max_batch_size=8, max_wait=0.05)
+    _hold_dispatch(coalescer)
+    threads, _ = _ask_all(coalescer, ["a", "b"], [Priority.LOW, Priority.QUESTIONS])
+    _release_dispatch(coalescer)
+    for thread in threads:
+        thread.join(2)
+    assert client.calls == [(["a", "b"], Priority.QUESTIONS)]
+
+
+def test_busy_senders_take_ready_batches_in_priority_order():
+    client = StubClient(delay=0.1)
+    coalescer = RequestCoalescer(client, max_batch_size=1, max_wait=0.0, senders=1)
+    first, _ = _ask_all(coalescer, ["first"])
+    while not client.calls:
+        time.sleep(0.001)
+    # Both queue behind the busy sender; the urgent one goes next
+    others, _ = _ask_all(coalescer, ["low", "urgent"], [Priority.LOW, Priority.QUESTIONS])
+    for thread in first + others:
+        thread.join(2)
+    assert [inputs for inputs, _ in client.calls] == ["first", "urgent", "low"]
@@ -0,0 +1,144 @@
+"""
+LLMClient: circuit breaker, rate limiter and deadline interplay
+"""
+
+import pytest
+
+from llm_client import CircuitBreaker, CircuitOpenError, LLMClient
+from rate_limiter import RateLimitExceededError
+
+URL = "http://endpoint"
+
+
+class StubLimiter:
+    """Counts acquisitions; raises once `capacity` is used up"""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.acquired = 0
+
+    def acquire(self, priority, deadline=None):
+        if self.capacity is not None and self.acquired >= self.capacity:
+            raise RateLimitExceededError("No upstream capacity before the deadline")
+        self.acquired += 1
+
+    def stats(self):
+        return {}
+
+
+class StubResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {"Retry-After": "0"}
+
+    def json(self):
+        return {}
+
+
+@pytest.fixture
+def client():
+    client = LLMClient("hf_test")
+    client.limiter = StubLimiter()
+    return client
+
+
+def test_open_circuit_fails_fast_without_a_token(client):
+    breaker = client.breaker(URL)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        client.post(URL, {"inputs": "hi"})
+    assert client.limiter.acquired == 0
+
+
+def test_rate_limit_timeout_releases_the_probe_without_a_verdict(client):
+    breaker = client.breaker(URL)
+    breaker.reset_timeout = 0.0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    client.limiter = StubLimiter(capacity=0)
+    with pytest.raises(RateLimitExceededError):
+        client.post(URL, {"inputs": "hi"})
+    # The half-open probe slot is free again, and nothing was held against the endpoint
+    assert breaker.allow_request()
+    assert breaker.consecutive_failures == breaker.failure_threshold
+
+
+def test_budget_errors_do_not_trip_a_healthy_endpoint(client):
+    client.session.post = lambda *args, **kwargs: StubResponse(429)
+    client.limiter = StubLimiter(capacity=1)
+    breaker = client.breaker(URL)
+    for _ in range(breaker.failure_threshold + 1):
+        client.limiter.acquired = 0
+        with pytest.raises(RateLimitExceededError):
+            client.post(URL, {"inputs": "hi"})
+    assert breaker.state == breaker.CLOSED
+
+
+def test_server_errors_open_the_circuit(client):
+    client.session.post = lambda *args, **kwargs: StubResponse(500)
+    breaker = client.breaker(URL)
+    for _ in range(breaker.failure_threshold):
+        assert client.post(URL, {"inputs": "hi"}).status_code == 500
+    assert breaker.state == breaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.post(URL, {"inputs": "hi"})
+
+
+class FakeClock:
+    """Stands in for the time module; only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    import llm_client
+    clock = FakeClock()
+    monkeypatch.setattr(llm_client, "time", clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == breaker.CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and breaker.trips == 1
+    assert not breaker.allow_request() and breaker.is_open()
+
+
+def test_breaker_half_opens_for_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(29)
+    assert not breaker.allow_request()
+    clock.advance(1)
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED and breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and breaker.trips == 2
+    clock.advance(29)
+    assert not breaker.allow_request()
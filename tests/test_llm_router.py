@@ -0,0 +1,116 @@
+"""
+Endpoint ranking and request hedging, with a stub coalescer
+"""
+
+import threading
+import time
+
+import pytest
+
+import llm_router
+from config import LLM_HEDGE_MIN_SAMPLES
+from llm_client import DeadlineExceededError, LLMClient
+from llm_router import CALL_CHAT, CALL_QUESTIONS, EndpointRouter
+
+FAST, SLOW, DOWN = "http://fast", "http://slow", "http://down"
+
+
+class StubCoalescer:
+    """Answers after a per-endpoint delay, or raises; records every call"""
+
+    def __init__(self, delays, failures=()):
+        self.delays = delays
+        self.failures = set(failures)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, url, payload, deadline=None, priority=None):
+        with self._lock:
+            self.calls.append(url)
+        time.sleep(self.delays.get(url, 0.0))
+        if url in self.failures:
+            raise ConnectionError(url)
+        return f"reply from {url}"
+
+
+@pytest.fixture
+def client():
+    return LLMClient("hf_test")
+
+
+def _use(monkeypatch, coalescer):
+    monkeypatch.setattr(llm_router, "get_request_coalescer", lambda client: coalescer)
+
+
+def _measure(router, url, latency, samples=LLM_HEDGE_MIN_SAMPLES, call_type=CALL_CHAT):
+    for _ in range(samples):
+        router._record(url, call_type, latency)
+
+
+def test_endpoints_rank_by_median_latency_per_call_type(client):
+    router = EndpointRouter(client, [SLOW, FAST], hedge=False)
+    _measure(router, SLOW, 2.0)
+    _measure(router, FAST, 0.1)
+    _measure(router, SLOW, 0.1, call_type=CALL_QUESTIONS)
+    _measure(router, FAST, 3.0, call_type=CALL_QUESTIONS)
+    assert router.ranked(CALL_CHAT) == [FAST, SLOW]
+    assert router.ranked(CALL_QUESTIONS) == [SLOW, FAST]
+
+
+def test_an_open_circuit_ranks_last(client):
+    router = EndpointRouter(client, [FAST, SLOW], hedge=False)
+    _measure(router, FAST, 0.1)
+    _measure(router, SLOW, 2.0)
+    breaker = client.breaker(FAST)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert router.ranked() == [SLOW, FAST]
+
+
+def test_exploring_tries_the_least_recently_measured_endpoint(client):
+    router = EndpointRouter(client, [FAST, SLOW], hedge=False)
+    _measure(router, SLOW, 2.0)
+    _measure(router, FAST, 0.1)
+    assert router.ranked(explore=True) == [SLOW, FAST]
+
+
+def test_failed_calls_count_as_timeouts(client, monkeypatch):
+    _use(monkeypatch, StubCoalescer({}, failures={DOWN}))
+    router = EndpointRouter(client, [DOWN, FAST], hedge=False)
+    with pytest.raises(ConnectionError):
+        router.generate({"inputs": "hi"})
+    assert router.generate({"inputs": "hi"}) == f"reply from {FAST}"
+    assert router.ranked() == [FAST, DOWN]
+
+
+def test_a_slow_primary_is_hedged_and_the_hedge_wins(client, monkeypatch):
+    coalescer = StubCoalescer({FAST: 0.5, SLOW: 0.0})
+    _use(monkeypatch, coalescer)
+    router = EndpointRouter(client, [FAST, SLOW], hedge=True)
+    # FAST is usually quick (p95 of 50 ms), SLOW is ranked second
+    _measure(router, FAST, 0.05)
+    _measure(router, SLOW, 1.0)
+    started = time.monotonic()
+    assert router.generate({"inputs": "hi"}, deadline=time.monotonic() + 5) == f"reply from {SLOW}"
+    assert time.monotonic() - started < 0.4
+    assert coalescer.calls == [FAST, SLOW]
+    assert router.stats()["hedged"] == 1 and router.stats()["hedge_wins"] == 1
+
+
+def test_a_primary_answering_within_its_p95_is_not_hedged(client, monkeypatch):
+    coalescer = StubCoalescer({FAST: 0.0})
+    _use(monkeypatch, coalescer)
+    router = EndpointRouter(client, [FAST, SLOW], hedge=True)
+    _measure(router, FAST, 0.5)
+    _measure(router, SLOW, 1.0)
+    assert router.generate({"inputs": "hi"}) == f"reply from {FAST}"
+    assert coalescer.calls == [FAST] and router.stats()["hedged"] == 0
+
+
+def test_no_answer_within_the_deadline_raises(client, monkeypatch):
+    _use(monkeypatch, StubCoalescer({FAST: 0.5, SLOW: 0.5}))
+    router = EndpointRouter(client, [FAST, SLOW], hedge=True)
+    _measure(router, FAST, 0.01)
+    _measure(router, SLOW, 1.0)
+    with pytest.raises(DeadlineExceededError):
+        router.generate({"inputs": "hi"}, deadline=time.monotonic() + 0.1)
@@ -0,0 +1,63 @@
+"""
+Local model backend, driven by a stub pipeline
+"""
+
+import threading
+import time
+
+import pytest
+
+from llm_client import DeadlineExceededError
+from local_inference import LocalTextGenerator
+
+
+class StubPipeline:
+    """Echoes prompts in the pipeline's output shape and records each batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, prompts, batch_size, **parameters):
+        self.batches.append(list(prompts))
+        return [[{"generated_text": f"reply to {prompt}"}] for prompt in prompts]
+
+
+def test_concurrent_prompts_are_batched():
+    pipeline = StubPipeline()
+    generator = LocalTextGenerator(workers=1, max_batch_size=4, max_wait=0.2, loader=lambda name: pipeline)
+    results = {}
+
+    def ask(index):
+        results[index] = generator.generate({"inputs": f"p{index}"}, deadline=time.monotonic() + 5)
+
+    threads = [threading.Thread(target=ask, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {index: f"reply to p{index}" for index in range(4)}
+    stats = generator.stats()
+    assert stats["prompts"] == 4 and stats["batches"] == len(pipeline.batches) < 4
+
+
+def test_prompts_that_expire_while_the_model_loads_are_not_run():
+    pipeline = StubPipeline()
+
+    def slow_loader(name):
+        time.sleep(0.3)
+        return pipeline
+
+    generator = LocalTextGenerator(workers=1, max_wait=0.0, loader=slow_loader)
+    with pytest.raises(DeadlineExceededError):
+        generator.generate({"inputs": "hello"}, deadline=time.monotonic() + 0.1)
+    time.sleep(0.4)
+    assert pipeline.batches == []
+    assert generator.stats()["expired"] == 1
+
+
+def test_warm_up_loads_the_model_in_the_background():
+    loaded = threading.Event()
+    generator = LocalTextGenerator(loader=lambda name: loaded.set() or StubPipeline())
+    generator.warm_up()
+    assert loaded.wait(1)
+    assert generator.generate({"inputs": "hi"}, deadline=time.monotonic() + 1) == "reply to hi"
@@ -0,0 +1,62 @@
+"""
+Off-script intent rules must never swallow a valid answer
+"""
+
+import pytest
+
+from chatbot import HiringAssistantChatbot
+from config import ConversationState
+from session_store import MemorySessionStore
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.delenv("HUGGING_FACE_API_KEY", raising=False)
+    return HiringAssistantChatbot(store=MemorySessionStore())
+
+
+def _at_state(bot, state, **candidate_data):
+    with bot._session():
+        bot.state.conversation_state = state
+        bot.state.candidate_data.update(candidate_data)
+
+
+PROFILE = {"name": "Jane Doe", "email": "jane@example.com", "phone": "1234567890", "experience": 4}
+
+
+@pytest.mark.parametrize("position", ["Data privacy engineer", "GDPR compliance analyst"])
+def test_position_mentioning_privacy_is_recorded(bot, position):
+    _at_state(bot, ConversationState.COLLECTING_POSITION, **PROFILE)
+    bot.process_user_input(position)
+    with bot._session(save=False):
+        assert bot.state.candidate_data["position"] == position
+        assert bot.state.conversation_state == ConversationState.COLLECTING_LOCATION
+
+
+def test_technical_answer_mentioning_repeat_is_recorded(bot):
+    _at_state(bot, ConversationState.ASKING_QUESTIONS, **PROFILE)
+    with bot._session():
+        bot.state.technical_questions = ["How do you run code many times?", "What is a closure?"]
+    reply = bot.process_user_input("Use a loop to repeat it")
+    assert "Question 2" in reply
+    with bot._session(save=False):
+        assert bot.state.current_question_index == 1
+        assert bot.state.candidate_data["technical_answers"][0]["answer"] == "Use a loop to repeat it"
+
+
+def test_questions_still_get_rule_replies(bot):
+    _at_state(bot, ConversationState.COLLECTING_POSITION, **PROFILE)
+    reply = bot.process_user_input("Why do you need this?")
+    assert "suitable openings" in reply
+    with bot._session(save=False):
+        assert "position" not in bot.state.candidate_data
+
+
+def test_repeat_request_during_questions_repeats_the_question(bot):
+    _at_state(bot, ConversationState.ASKING_QUESTIONS, **PROFILE)
+    with bot._session():
+        bot.state.technical_questions = ["How do you run code many times?", "What is a closure?"]
+    reply = bot.process_user_input("sorry can you repeat the question")
+    assert "Question 1" in reply
+    with bot._session(save=False):
+        assert bot.state.current_question_index == 0
@@ -0,0 +1,61 @@
+"""
+Question cache lookups and their usage tally
+"""
+
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import chatbot
+import question_cache
+from chatbot import HiringAssistantChatbot
+from config import ConversationState
+from question_cache import QuestionCache
+from session_store import MemorySessionStore
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = QuestionCache(path=str(tmp_path / "questions.db"))
+    monkeypatch.setattr(question_cache, "_cache", cache)
+    return cache
+
+
+def test_usage_is_tallied_in_memory_and_flushed(cache):
+    cache.put("key", ["Q1"], precomputed=True)
+    for _ in range(3):
+        cache.get("key")
+    cache.get("other")
+    assert cache._db.execute("SELECT count(*) FROM question_cache_usage").fetchone()[0] == 0
+    assert cache.usage() == {"lookups": 4, "precomputed": 3, "cached": 0, "misses": 1, "coverage": 0.75}
+
+
+def test_polling_for_questions_from_another_process_counts_one_lookup(cache, monkeypatch):
+    monkeypatch.setenv("HUGGING_FACE_API_KEY", "hf_test_key_123")
+    bot = HiringAssistantChatbot(store=MemorySessionStore())
+    assert bot.use_llm
+    with bot._session():
+        bot.state.conversation_state = ConversationState.COLLECTING_TECH_STACK
+        bot.state.candidate_data.update(experience=4)
+    # Generation starts here, then is polled while another process runs it
+    monkeypatch.setattr(bot, "_request_technical_questions", lambda *args: time.sleep(0.5) or [])
+    bot.process_user_input("Python, Django, Docker, PostgreSQL, communication, teamwork")
+    with bot._session():
+        bot.state.questions_requested_at = time.time()
+    chatbot._pop_pending_questions(bot.session_id)
+    for _ in range(10):
+        assert bot.poll_technical_questions() is None
+    assert cache.usage()["lookups"] == 1
+
+
+def test_abandoned_generations_expire_after_the_session_ttl(monkeypatch):
+    done, running = Future(), Future()
+    done.set_result(["Q1"])
+    monkeypatch.setattr(chatbot, "_pending_questions", {})
+    monkeypatch.setattr(chatbot, "_pending_started_at", {})
+    now = time.monotonic()
+    chatbot._add_pending_questions("abandoned", done, now - chatbot.SESSION_TTL - 1)
+    chatbot._add_pending_questions("slow", running, now - chatbot.SESSION_TTL - 1)
+    chatbot._add_pending_questions("new", Future(), now)
+    assert set(chatbot._pending_questions) == {"slow", "new"}
@@ -0,0 +1,98 @@
+"""
+Token bucket arithmetic and priority admission
+"""
+
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import Priority, PriorityRateLimiter, RateLimitExceededError, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class StubBucket:
+    """Grants a token only when the test adds one, recording which thread took it"""
+
+    def __init__(self):
+        self.tokens = 0
+        self.takers = []
+        self._lock = threading.Lock()
+
+    def try_acquire(self, reserve=0.0):
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.takers.append(threading.current_thread().name)
+                return 0.0
+            return 0.01
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0.0
+    clock.now += 100
+    assert [bucket.try_acquire() for _ in range(4)][-1] > 0
+
+
+def test_bucket_reserve_leaves_tokens_for_higher_priorities(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert bucket.try_acquire(reserve=2) == 0.0
+    # Two tokens left: a caller that must leave two behind waits for a third
+    assert bucket.try_acquire(reserve=2) == pytest.approx(1.0)
+    assert bucket.try_acquire() == 0.0
+
+
+def test_higher_priorities_are_admitted_first():
+    bucket = StubBucket()
+    limiter = PriorityRateLimiter(bucket, reserve_per_level=0.0)
+    arrivals = [("low-0", Priority.LOW), ("default-0", Priority.DEFAULT), ("questions-0", Priority.QUESTIONS),
+                ("low-1", Priority.LOW), ("questions-1", Priority.QUESTIONS)]
+    threads = []
+    for name, priority in arrivals:
+        thread = threading.Thread(target=limiter.acquire, args=(priority,), name=name)
+        thread.start()
+        threads.append(thread)
+        while limiter.stats()["queue_depth"] < len(threads):
+            time.sleep(0.001)
+    bucket.tokens = len(arrivals)
+    for thread in threads:
+        thread.join(2)
+    assert bucket.takers == ["questions-0", "questions-1", "default-0", "low-0", "low-1"]
+    stats = limiter.stats()
+    assert stats["queue_depth"] == 0 and stats["max_queue_depth"] == len(arrivals)
+    assert stats["classes"]["low"]["admitted"] == 2
+
+
+def test_waiting_past_the_deadline_raises_and_frees_the_queue():
+    bucket = StubBucket()
+    limiter = PriorityRateLimiter(bucket, reserve_per_level=0.0)
+    with pytest.raises(RateLimitExceededError):
+        limiter.acquire(Priority.QUESTIONS, deadline=time.monotonic() + 0.05)
+    stats = limiter.stats()
+    assert stats["queue_depth"] == 0
+    questions = stats["classes"]["questions"]
+    assert (questions["admitted"], questions["timed_out"]) == (0, 1)
+    assert questions["max_wait_seconds"] >= 0.05
+    bucket.tokens = 1
+    limiter.acquire(Priority.LOW, deadline=time.monotonic() + 1)
+    assert limiter.stats()["classes"]["low"]["admitted"] == 1
+
+
+def test_no_bucket_admits_everything():
+    PriorityRateLimiter(None).acquire(Priority.LOW, deadline=time.monotonic() - 1)
@@ -5,15 +5,19 @@ Utility functions for TalentScout Hiring Assistant
 import re
 import json
 from typing import Dict, List, Optional, Tuple
-from config import TECH_CATEGORIES
+from skill_index import parse_skills
+
+# Validator patterns are compiled once at import time
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+NON_DIGIT_PATTERN = re.compile(r'\D')
+NUMBER_PATTERN = re.compile(r'\d+')
 
 def validate_email(email: str) -> Tuple[bool, str]:
     """Validate email address format"""
     if not email:
         return False, "Email address is required"
     
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if re.match(email_pattern, email.strip()):
+    if EMAIL_PATTERN.match(email.strip()):
         return True, ""
     else:
         return False, "Please provide a valid email address (e.g., john@example.com)"
@@ -24,7 +28,7 @@ def validate_phone(phone: str) -> Tuple[bool, str]:
         return False, "Phone number is required"
     
     # Remove all non-digit characters
-    digits_only = re.sub(r'\D', '', phone)
+    digits_only = NON_DIGIT_PATTERN.sub('', phone)
     
     # Check if it's exactly 10 digits
     if len(digits_only) == 10:
@@ -32,15 +36,20 @@ def validate_phone(phone: str) -> Tuple[bool, str]:
     else:
         return False, "Please provide a valid 10-digit phone number"
 
+def format_phone_number(phone: str) -> str:
+    """Format a 10-digit phone number as (123) 456-7890"""
+    digits_only = NON_DIGIT_PATTERN.sub('', phone)
+    return f"({digits_only[:3]}) {digits_only[3:6]}-{digits_only[6:]}"
+
 def validate_experience(experience: str) -> Tuple[bool, str, Optional[int]]:
     """Validate and extract years of experience"""
     if not experience:
         return False, "Years of experience is required", None
     
-    # Extract number from string
-    numbers = re.findall(r'\d+', experience)
-    if numbers:
-        years = int(numbers[0])
+    # Extract the first number from string
+    number = NUMBER_PATTERN.search(experience)
+    if number:
+        years = int(number.group())
         if 0 <= years <= 50:
             return True, "", years
         else:
@@ -67,60 +76,16 @@ def validate_tech_stack(tech_stack: str) -> Tuple[bool, str, Dict[str, List[str]
     if not tech_stack:
         return False, "Please provide your skills", {}
     
-    # Split and clean tech stack
-    tech_items = re.split(r'[,;|\n]+', tech_stack.lower())
-    tech_items = [item.strip() for item in tech_items if item.strip()]
+    profile = parse_skills(tech_stack)
     
-    if len(tech_items) < 3:
+    if len(profile.tokens) < 3:
         return False, "Please provide at least 3 skills (mix of technical and soft skills)", {}
     
-    # Categorize technologies
-    categorized = {category: [] for category in TECH_CATEGORIES.keys()}
-    soft_skills = []
-    technical_skills = []
-    
-    # Common soft skills keywords
-    soft_skill_keywords = [
-        'communication', 'teamwork', 'leadership', 'problem solving', 'critical thinking',
-        'adaptability', 'time management', 'creativity', 'collaboration', 'analytical',
-        'interpersonal', 'presentation', 'negotiation', 'mentoring', 'training',
-        'documentation', 'project management', 'agile', 'scrum', 'kanban'
-    ]
-    
-    for item in tech_items:
-        is_soft_skill = any(skill in item for skill in soft_skill_keywords)
-        
-        if is_soft_skill:
-            soft_skills.append(item)
-        else:
-            technical_skills.append(item)
-            
-            # Categorize technical skills
-            categorized_item = False
-            for category, technologies in TECH_CATEGORIES.items():
-                for tech in technologies:
-                    if tech in item or item in tech:
-                        if item not in categorized[category]:
-                            categorized[category].append(item)
-                        categorized_item = True
-                        break
-                if categorized_item:
-                    break
-            
-            if not categorized_item:
-                if 'other' not in categorized:
-                    categorized['other'] = []
-                categorized['other'].append(item)
-    
-    # More flexible validation - just ensure we have some skills
-    if len(technical_skills) + len(soft_skills) < 3:
-        return False, "Please provide at least 3 different skills", {}
-    
-    # Add soft skills to categorized result
-    if soft_skills:
-        categorized['soft_skills'] = soft_skills
-    
-    return True, "", categorized
+    return True, "", profile.as_dict(include_empty=True)
+
+def get_experience_level(experience: int) -> str:
+    """Map years of experience to beginner (0-2), intermediate (3-5) or senior (6+)"""
+    return "beginner" if experience < 3 else "intermediate" if experience < 6 else "senior"
 
 def parse_tech_stack(tech_stack: str) -> Dict[str, List[str]]:
     """
@@ -129,48 +94,7 @@ def parse_tech_stack(tech_stack: str) -> Dict[str, List[str]]:
     if not tech_stack:
         return {}
     
-    # Convert to lowercase and split by common separators
-    tech_items = re.split(r'[,;|\n]+', tech_stack.lower())
-    tech_items = [item.strip() for item in tech_items if item.strip()]
-    
-    categorized = {category: [] for category in TECH_CATEGORIES.keys()}
-    soft_skills = []
-    uncategorized = []
-    
-    # Common soft skills keywords
-    soft_skill_keywords = [
-        'communication', 'teamwork', 'leadership', 'problem solving', 'critical thinking',
-        'adaptability', 'time management', 'creativity', 'collaboration', 'analytical'
-    ]
-    
-    for item in tech_items:
-        is_soft_skill = any(skill in item for skill in soft_skill_keywords)
-        
-        if is_soft_skill:
-            soft_skills.append(item)
-        else:
-            categorized_item = False
-            for category, technologies in TECH_CATEGORIES.items():
-                for tech in technologies:
-                    if tech in item or item in tech:
-                        if item not in categorized[category]:
-                            categorized[category].append(item)
-                        categorized_item = True
-                        break
-                if categorized_item:
-                    break
-            
-            if not categorized_item:
-                uncategorized.append(item)
-    
-    # Add soft skills and uncategorized items
-    if soft_skills:
-        categorized["soft_skills"] = soft_skills
-    if uncategorized:
-        categorized["other"] = uncategorized
-    
-    # Remove empty categories
-    return {k: v for k, v in categorized.items() if v}
+    return parse_skills(tech_stack).as_dict()
 
 def format_candidate_info(candidate_data: Dict) -> str:
     """Format candidate information for display"""
@@ -185,17 +109,13 @@ def format_candidate_info(candidate_data: Dict) -> str:
     
     if candidate_data.get('tech_stack_parsed'):
         info_lines.append("• **Skills:**")
-        tech_skills = []
-        for category, technologies in candidate_data['tech_stack_parsed'].items():
-            if technologies and category != 'soft_skills':
-                tech_skills.extend(technologies)
+        profile = parse_skills(candidate_data.get('tech_stack', ''))
         
-        if tech_skills:
-            info_lines.append(f"  - Technical: {', '.join(tech_skills)}")
+        if profile.technical_skills:
+            info_lines.append(f"  - Technical: {', '.join(profile.technical_skills)}")
         
-        if 'soft_skills' in candidate_data['tech_stack_parsed']:
-            soft_skills_list = ', '.join(candidate_data['tech_stack_parsed']['soft_skills'])
-            info_lines.append(f"  - Soft Skills: {soft_skills_list}")
+        if profile.soft_skills:
+            info_lines.append(f"  - Soft Skills: {', '.join(profile.soft_skills)}")
     
     return '\n'.join(info_lines)
 
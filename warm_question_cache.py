@@ -0,0 +1,119 @@
+"""
+Offline warming of the technical question cache
+
+Mines imported or historical candidate records for their (experience level,
+skill set) profiles, ranks them by frequency and pre-generates question sets
+for the most common ones so that peak-hour candidates hit a warm cache. Run it
+with QUESTION_CACHE_PATH pointing at the SQLite file the app uses.
+
+Usage:
+    python warm_question_cache.py candidates.csv --top 200 --workers 4 --rate 2
+    python warm_question_cache.py --report
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Tuple
+
+from batch_screening import read_records
+from config import QUESTION_CACHE_PATH, LLM_API_URL
+from question_cache import get_question_cache, question_cache_key
+from rate_limiter import TokenBucket
+from utils import validate_experience, validate_tech_stack, get_experience_level
+from skill_index import parse_skills
+
+
+def rank_profiles(records: Iterable[Dict], model: str, top: int) -> List[Tuple[str, int, int]]:
+    """
+    Count candidate profiles by question cache key
+
+    Returns up to `top` (tech stack, experience, candidate count) entries,
+    most common first; the tech stack is a canonical representative of the profile.
+    """
+    counts: Counter = Counter()
+    representatives: Dict[str, Tuple[str, int]] = {}
+    for record in records:
+        exp_valid, _, years = validate_experience(str(record.get('experience') or ''))
+        stack_valid, _, _ = validate_tech_stack(str(record.get('tech_stack') or ''))
+        if not exp_valid or not stack_valid:
+            continue
+        profile = parse_skills(str(record['tech_stack']))
+        key = question_cache_key(record['tech_stack'], get_experience_level(years), model)
+        counts[key] += 1
+        if key not in representatives:
+            canonical_stack = ', '.join(sorted(set(profile.technical_skills)))
+            representatives[key] = (canonical_stack, years)
+    return [(*representatives[key], count) for key, count in counts.most_common(top)]
+
+
+def warm_cache(profiles: List[Tuple[str, int, int]], workers: int, rate: float, refresh: bool = False) -> Dict:
+    """Pre-generate question sets for the given profiles in parallel under a rate limit"""
+    # Imported here so that --report works without API credentials or Streamlit
+    from chatbot import HiringAssistantChatbot
+    from session_store import MemorySessionStore
+
+    chatbot = HiringAssistantChatbot(store=MemorySessionStore())
+    if not chatbot.use_llm:
+        raise SystemExit("HUGGING_FACE_API_KEY is required to pre-generate questions")
+
+    cache = get_question_cache()
+    # A one-token bucket spaces call starts 1/rate seconds apart across workers;
+    # the calls also go through the app's shared upstream rate limiter
+    bucket = TokenBucket(rate, 1) if rate > 0 else None
+    summary = {"profiles": len(profiles), "already_cached": 0, "generated": 0, "failed": 0}
+
+    def generate(tech_stack: str, experience: int) -> bool:
+        while bucket is not None:
+            wait = bucket.try_acquire()
+            if wait == 0.0:
+                break
+            time.sleep(wait)
+        return bool(chatbot.pregenerate_technical_questions(tech_stack, experience))
+
+    pending = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for tech_stack, experience, _ in profiles:
+            key = question_cache_key(tech_stack, get_experience_level(experience), chatbot.api_url)
+            if not refresh and cache.get(key, record_usage=False) is not None:
+                summary["already_cached"] += 1
+                continue
+            pending.append(executor.submit(generate, tech_stack, experience))
+        for future in as_completed(pending):
+            summary["generated" if future.result() else "failed"] += 1
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate technical questions for common skill profiles")
+    parser.add_argument("input", nargs="?", help="Candidate records (.csv or .jsonl, '-' for stdin)")
+    parser.add_argument("--top", type=int, default=100, help="Number of most common profiles to warm")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel generation requests")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum requests started per second")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate profiles that are already cached")
+    parser.add_argument("--report", action="store_true", help="Only print live-session coverage")
+    args = parser.parse_args()
+
+    if not QUESTION_CACHE_PATH:
+        print("QUESTION_CACHE_PATH is not set; warmed questions would not outlive this process",
+              file=sys.stderr)
+
+    if not args.report:
+        if not args.input:
+            parser.error("input is required unless --report is given")
+        profiles = rank_profiles(read_records(args.input), LLM_API_URL, args.top)
+        covered = sum(count for _, _, count in profiles)
+        print(f"Top {len(profiles)} profiles cover {covered} imported candidates")
+        summary = warm_cache(profiles, args.workers, args.rate, args.refresh)
+        print(f"Generated {summary['generated']}, already cached {summary['already_cached']}, "
+              f"failed {summary['failed']}")
+
+    usage = get_question_cache().usage()
+    print(f"Live sessions: {usage['lookups']} - served from precomputed sets: {usage['precomputed']} "
+          f"({usage['coverage']:.1%}), other cache hits: {usage['cached']}, misses: {usage['misses']}")
+
+
+if __name__ == "__main__":
+    main()